@@ -35,11 +35,11 @@ fi
 
 # 验证Python环境
 echo -e "${YELLOW}验证Python环境...${NC}"
-if $SERVICE_PYTHON -c "import yaml, psutil, requests, schedule; print('所有依赖模块可用')" 2>/dev/null; then
+if $SERVICE_PYTHON -c "import yaml, psutil, requests; print('所有依赖模块可用')" 2>/dev/null; then
     echo -e "${GREEN}✅ Python环境正常${NC}"
 else
     echo -e "${YELLOW}⚠️  安装缺失的依赖...${NC}"
-    $SERVICE_PYTHON -m pip install --user PyYAML psutil requests schedule
+    $SERVICE_PYTHON -m pip install --user PyYAML psutil requests
 fi
 
 # 创建测试别名脚本
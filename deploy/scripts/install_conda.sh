@@ -89,7 +89,7 @@ if ! $PYTHON_CMD -m pip --version &>/dev/null; then
 fi
 
 # 安装依赖包
-$PYTHON_CMD -m pip install psutil PyYAML requests schedule
+$PYTHON_CMD -m pip install psutil PyYAML requests
 
 # 验证安装
 echo -e "${YELLOW}验证安装...${NC}"
@@ -56,7 +56,7 @@ cp -r "$SOURCE_DIR"/* "$INSTALL_DIR/"
 # 安装依赖
 echo -e "${YELLOW}安装Python依赖...${NC}"
 cd "$INSTALL_DIR"
-$PYTHON_CMD -m pip install psutil PyYAML requests schedule
+$PYTHON_CMD -m pip install psutil PyYAML requests
 
 # 验证安装
 echo -e "${YELLOW}验证安装...${NC}"
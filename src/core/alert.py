@@ -4,11 +4,19 @@
 """
 
 import time
-from typing import Dict, List, Set, Any
+import asyncio
+import threading
+from typing import Dict, List, Set, Any, Tuple
 from datetime import datetime, timedelta
 
 from .monitor import MonitorData
-from ..services.config import config_manager
+from .rules import compile_rules
+from .anomaly import AnomalyDetector
+from .forecast import CapacityForecaster
+from .rate import RateDetector
+from .silence import SilenceManager
+from .sketch import QuantileTracker
+from ..services.config import config_manager, ConfigSnapshot
 from ..services.logger import logger_manager
 from ..services.dingtalk import dingtalk_notifier
 
@@ -35,6 +43,110 @@ class AlertEngine:
         
         # 存储指标连续超阈值的次数
         self._consecutive_counts: Dict[str, int] = {}
+        
+        # 告警状态锁：控制接口、Prometheus 端点在其它线程读取状态时与告警判断互斥
+        self._state_lock = threading.Lock()
+        
+        # 组合告警规则（配置加载时编译一次）
+        self.rules = compile_rules(self.alert_config.get('rules', []))
+        
+        # 各指标最新采集值，供组合规则计算
+        self._latest_values: Dict[str, float] = {}
+        
+        # 自适应异常检测（EWMA基线）
+        self.anomaly_detector = AnomalyDetector(self.alert_config.get('anomaly', {}))
+        
+        # 容量耗尽时间预测（磁盘写满ETA）
+        self.forecaster = CapacityForecaster(self.alert_config.get('forecast', {}))
+        
+        # 变化率告警（内存泄漏等缓慢增长）
+        self.rate_detector = RateDetector(self.alert_config.get('rate_rules', []))
+        
+        # 告警静默（维护窗口），静默期间仍正常采集，只抑制通知
+        self.silence_manager = SilenceManager(self.alert_config)
+        
+        # 各指标的流式分位数草图（固定内存，可在汇聚端合并）
+        self.quantile_tracker = QuantileTracker(self.alert_config.get('sketch', {}))
+        
+        # 配置文件变化时自动应用新的告警配置
+        config_manager.subscribe(self.apply_config)
+    
+    def apply_config(self, snapshot: ConfigSnapshot) -> None:
+        """
+        应用新的告警配置，告警状态（去重、连续计数、持续告警）保持不变
+        
+        只重建配置发生变化的检测器，未变化的检测器保留已积累的基线和样本。
+        
+        Args:
+            snapshot: 新的配置快照
+        """
+        old_config = self.alert_config
+        alert_config = snapshot.alert
+        
+        # 先编译规则，表达式有误时整体不生效
+        rules = self.rules
+        if alert_config.get('rules') != old_config.get('rules'):
+            rules = compile_rules(alert_config.get('rules', []))
+        
+        self.alert_config = alert_config
+        self.dedup_window = alert_config.get('dedup_window', 600)
+        self.consecutive_checks_threshold = alert_config.get('consecutive_checks', 1)
+        self.rules = rules
+        
+        if alert_config.get('anomaly') != old_config.get('anomaly'):
+            self.anomaly_detector = AnomalyDetector(alert_config.get('anomaly', {}))
+        if alert_config.get('forecast') != old_config.get('forecast'):
+            self.forecaster = CapacityForecaster(alert_config.get('forecast', {}))
+        if alert_config.get('rate_rules') != old_config.get('rate_rules'):
+            self.rate_detector = RateDetector(alert_config.get('rate_rules', []))
+        if (alert_config.get('silences') != old_config.get('silences')
+                or alert_config.get('silence_file') != old_config.get('silence_file')):
+            self.silence_manager = SilenceManager(alert_config)
+        if alert_config.get('sketch') != old_config.get('sketch'):
+            self.quantile_tracker = QuantileTracker(alert_config.get('sketch', {}))
+    
+    def evaluate_rules(self, all_metrics: List[MonitorData]) -> List[MonitorData]:
+        """
+        根据最新指标值计算组合告警规则
+        
+        Args:
+            all_metrics: 本次采集的监控数据列表
+            
+        Returns:
+            规则对应的监控数据列表（引用指标缺失的规则不产生数据）
+        """
+        for metric_data in all_metrics:
+            self._latest_values[metric_data.metric] = metric_data.value
+        
+        if not self.rules or not all_metrics:
+            return []
+        
+        hostname = all_metrics[0].hostname
+        timestamp = all_metrics[0].timestamp
+        batch_metrics = {metric_data.metric for metric_data in all_metrics}
+        rule_metrics = []
+        
+        for rule in self.rules:
+            # 仅在本批次采集到规则引用的指标时计算，规则的连续次数按样本计
+            if not rule.expression.names & batch_metrics:
+                continue
+            
+            triggered = rule.expression.evaluate(self._latest_values)
+            if triggered is None:
+                continue
+            
+            rule_metrics.append(MonitorData(
+                metric=rule.metric,
+                value=1.0 if triggered else 0.0,
+                threshold=1.0,
+                unit='',
+                timestamp=timestamp,
+                hostname=hostname,
+                alert=triggered,
+                detail=rule.describe(self._latest_values)
+            ))
+        
+        return rule_metrics
     
     def should_send_alert(self, monitor_data: MonitorData) -> bool:
         """
@@ -54,51 +166,96 @@ class AlertEngine:
             last_sent_time = self._sent_alerts[metric_name]
             if current_time - last_sent_time < self.dedup_window:
                 # 在去重时间窗口内，不重复发送
-                logger_manager.debug(f"告警去重: {metric_name} 在去重时间窗口内")
+                logger_manager.debug("告警去重: %s 在去重时间窗口内", metric_name)
                 return False
         
         return True
     
-    def process_alert(self, monitor_data: MonitorData) -> bool:
+    def _needs_delivery(self, monitor_data: MonitorData) -> bool:
         """
-        处理单个告警
+        判断告警是否需要实际推送（未被静默且不在去重窗口内）
         
         Args:
             monitor_data: 监控数据
             
         Returns:
-            告警处理是否成功
+            是否需要推送
         """
-        if not self.should_send_alert(monitor_data):
-            return True
+        silence = self.silence_manager.match(monitor_data.metric)
+        if silence is not None:
+            logger_manager.info(f"告警已静默: {monitor_data.metric} (静默 {silence.id})")
+            return False
         
-        # 发送告警
-        success = dingtalk_notifier.send_alert(monitor_data)
+        return self.should_send_alert(monitor_data)
+    
+    def _record_delivery(self, monitor_data: MonitorData, success: bool) -> None:
+        """
+        记录告警推送结果
         
+        Args:
+            monitor_data: 监控数据
+            success: 推送是否成功
+        """
         if success:
-            # 记录告警发送时间
-            self._sent_alerts[monitor_data.metric] = time.time()
-            
-            # 添加到持续告警集合
-            self._persistent_alerts.add(monitor_data.metric)
+            with self._state_lock:
+                # 记录告警发送时间
+                self._sent_alerts[monitor_data.metric] = time.time()
+                
+                # 添加到持续告警集合
+                self._persistent_alerts.add(monitor_data.metric)
             
             logger_manager.info(f"告警处理成功: {monitor_data.metric}")
         else:
             logger_manager.error(f"告警处理失败: {monitor_data.metric}")
+    
+    def process_alert(self, monitor_data: MonitorData) -> bool:
+        """
+        处理单个告警
+        
+        Args:
+            monitor_data: 监控数据
+            
+        Returns:
+            告警处理是否成功
+        """
+        if not self._needs_delivery(monitor_data):
+            return True
+        
+        # 发送告警
+        success = dingtalk_notifier.send_alert(monitor_data)
+        self._record_delivery(monitor_data, success)
         
         return success
     
-    def check_and_process(self, all_metrics: List[MonitorData]) -> Dict[str, bool]:
+    def evaluate(self, all_metrics: List[MonitorData]) -> Tuple[List[MonitorData], List[MonitorData]]:
         """
-        检查所有指标并处理告警
+        更新连续次数和告警状态，得出本次需要处理的告警和恢复
+        
+        只更新内存中的状态，不发送任何通知。
         
         Args:
             all_metrics: 所有监控数据列表
             
         Returns:
-            告警处理结果字典 {metric_name: success}
+            (达到连续次数的告警数据列表, 需要发送恢复通知的数据列表)
         """
+        with self._state_lock:
+            return self._evaluate(all_metrics)
+
+    def _evaluate(self, all_metrics: List[MonitorData]) -> Tuple[List[MonitorData], List[MonitorData]]:
+        """evaluate 的实现（调用方持有状态锁）"""
         alert_metrics_to_process = []
+        recovered_metrics = []
+
+        # 原始采集值计入分位数草图
+        self.quantile_tracker.update(all_metrics)
+
+        # 组合规则、异常检测、容量预测、变化率结果与普通指标共用连续次数、去重和恢复逻辑
+        all_metrics = (list(all_metrics)
+                       + self.evaluate_rules(all_metrics)
+                       + self.anomaly_detector.evaluate(all_metrics)
+                       + self.forecaster.evaluate(all_metrics)
+                       + self.rate_detector.evaluate(all_metrics))
 
         for metric_data in all_metrics:
             metric_name = metric_data.metric
@@ -106,15 +263,16 @@ class AlertEngine:
             if metric_data.is_alert:
                 # 指标超阈值，增加连续次数
                 self._consecutive_counts[metric_name] = self._consecutive_counts.get(metric_name, 0) + 1
-                logger_manager.debug(f"指标持续超标: {metric_name} "
-                                     f"(当前值: {metric_data.value:.2f}%), "
-                                     f"连续次数: {self._consecutive_counts[metric_name]}/{self.consecutive_checks_threshold}")
+                logger_manager.debug("指标持续超标: %s (当前值: %.2f%s), 连续次数: %d/%d",
+                                     metric_name, metric_data.value, metric_data.unit,
+                                     self._consecutive_counts[metric_name], self.consecutive_checks_threshold)
             else:
                 # 指标恢复正常
                 if metric_name in self._persistent_alerts:
                     # 如果之前是告警状态，则发送恢复通知
-                    logger_manager.info(f"告警恢复: {metric_name} 当前值: {metric_data.value:.2f}%")
-                    dingtalk_notifier.send_recovery_notification(metric_data)
+                    logger_manager.info(f"告警恢复: {metric_name} 当前值: {metric_data.value:.2f}{metric_data.unit}")
+                    if self.silence_manager.match(metric_name) is None:
+                        recovered_metrics.append(metric_data)
                     self._persistent_alerts.remove(metric_name)
                     # 从去重记录中移除，以便下次能立即告警
                     if metric_name in self._sent_alerts:
@@ -127,12 +285,75 @@ class AlertEngine:
             if self._consecutive_counts.get(metric_name, 0) >= self.consecutive_checks_threshold:
                 alert_metrics_to_process.append(metric_data)
 
+        return alert_metrics_to_process, recovered_metrics
+
+    def check_and_process(self, all_metrics: List[MonitorData]) -> Dict[str, bool]:
+        """
+        检查所有指标并处理告警
+        
+        Args:
+            all_metrics: 所有监控数据列表
+            
+        Returns:
+            告警处理结果字典 {metric_name: success}
+        """
+        alert_metrics_to_process, recovered_metrics = self.evaluate(all_metrics)
+
+        for metric_data in recovered_metrics:
+            dingtalk_notifier.send_recovery_notification(metric_data)
+
         if not alert_metrics_to_process:
             logger_manager.debug("没有需要处理的告警")
             return {}
 
         return self.process_alerts(alert_metrics_to_process)
 
+    async def async_check_and_process(self, all_metrics: List[MonitorData]) -> Dict[str, bool]:
+        """
+        检查所有指标并并发推送告警和恢复通知（asyncio 运行模式）
+        
+        状态判断与 check_and_process 完全一致，仅推送改为并发执行。
+        
+        Args:
+            all_metrics: 所有监控数据列表
+            
+        Returns:
+            告警处理结果字典 {metric_name: success}
+        """
+        alert_metrics_to_process, recovered_metrics = self.evaluate(all_metrics)
+
+        results = {monitor_data.metric: True for monitor_data in alert_metrics_to_process}
+        to_send = [monitor_data for monitor_data in alert_metrics_to_process
+                   if self._needs_delivery(monitor_data)]
+
+        if not to_send and not recovered_metrics:
+            logger_manager.debug("没有需要处理的告警")
+            return results
+
+        if to_send:
+            logger_manager.info(f"开始处理 {len(to_send)} 个确认的告警")
+
+        outcomes = await asyncio.gather(
+            *([dingtalk_notifier.async_send_recovery_notification(monitor_data)
+               for monitor_data in recovered_metrics]
+              + [dingtalk_notifier.async_send_alert(monitor_data) for monitor_data in to_send]),
+            return_exceptions=True
+        )
+
+        for monitor_data, outcome in zip(to_send, outcomes[len(recovered_metrics):]):
+            if isinstance(outcome, Exception):
+                logger_manager.error(f"处理告警异常 {monitor_data.metric}: {str(outcome)}")
+            success = outcome is True
+            self._record_delivery(monitor_data, success)
+            results[monitor_data.metric] = success
+
+        if to_send:
+            successful_count = sum(1 for success in results.values() if success)
+            logger_manager.info(f"告警处理完成: 成功 {successful_count}, "
+                                f"失败 {len(results) - successful_count}")
+
+        return results
+
     def process_alerts(self, alert_metrics: List[MonitorData]) -> Dict[str, bool]:
         """
         批量处理告警
@@ -174,28 +395,36 @@ class AlertEngine:
         current_time = time.time()
         expired_alerts = []
         
-        for metric_name, sent_time in self._sent_alerts.items():
-            if current_time - sent_time > self.dedup_window * 2:  # 保留2倍去重时间的记录
-                expired_alerts.append(metric_name)
-        
-        for metric_name in expired_alerts:
-            del self._sent_alerts[metric_name]
+        with self._state_lock:
+            for metric_name, sent_time in self._sent_alerts.items():
+                if current_time - sent_time > self.dedup_window * 2:  # 保留2倍去重时间的记录
+                    expired_alerts.append(metric_name)
+            
+            for metric_name in expired_alerts:
+                del self._sent_alerts[metric_name]
         
         if expired_alerts:
-            logger_manager.debug(f"清理了 {len(expired_alerts)} 个过期告警记录")
+            logger_manager.debug("清理了 %d 个过期告警记录", len(expired_alerts))
     
     def get_alert_status(self) -> Dict[str, Any]:
         """
         获取告警状态信息
         
         Returns:
-            告警状态字典
+            告警状态字典（各字段均为副本，可在其它线程中使用）
         """
         current_time = time.time()
         
+        # 在状态锁内复制一份，避免调度线程同时修改导致迭代出错
+        with self._state_lock:
+            sent_alerts = dict(self._sent_alerts)
+            persistent_alerts = list(self._persistent_alerts)
+            consecutive_counts = dict(self._consecutive_counts)
+            quantiles = self.quantile_tracker.summary()
+        
         # 统计活跃告警（去重时间窗口内）
         active_alerts = []
-        for metric_name, sent_time in self._sent_alerts.items():
+        for metric_name, sent_time in sent_alerts.items():
             if current_time - sent_time < self.dedup_window:
                 active_alerts.append({
                     'metric': metric_name,
@@ -204,12 +433,15 @@ class AlertEngine:
                 })
         
         status = {
-            'total_sent_alerts': len(self._sent_alerts),
+            'total_sent_alerts': len(sent_alerts),
             'active_alerts': active_alerts,
-            'persistent_alerts': list(self._persistent_alerts),
+            'persistent_alerts': persistent_alerts,
             'dedup_window': self.dedup_window,
             'consecutive_checks_threshold': self.consecutive_checks_threshold,
-            'consecutive_counts': self._consecutive_counts
+            'consecutive_counts': consecutive_counts,
+            'rules': [rule.name for rule in self.rules],
+            'silences': [silence.describe() for silence in self.silence_manager.list_silences()],
+            'quantiles': quantiles
         }
         
         return status
@@ -229,17 +461,19 @@ class AlertEngine:
         success = dingtalk_notifier.send_alert(monitor_data)
         
         if success:
-            self._sent_alerts[monitor_data.metric] = time.time()
-            self._persistent_alerts.add(monitor_data.metric)
-            self._consecutive_counts[monitor_data.metric] = self.consecutive_checks_threshold
+            with self._state_lock:
+                self._sent_alerts[monitor_data.metric] = time.time()
+                self._persistent_alerts.add(monitor_data.metric)
+                self._consecutive_counts[monitor_data.metric] = self.consecutive_checks_threshold
         
         return success
     
     def reset_alert_history(self) -> None:
         """重置告警历史记录"""
-        self._sent_alerts.clear()
-        self._persistent_alerts.clear()
-        self._consecutive_counts.clear()
+        with self._state_lock:
+            self._sent_alerts.clear()
+            self._persistent_alerts.clear()
+            self._consecutive_counts.clear()
         logger_manager.info("告警历史记录已重置")
 
 
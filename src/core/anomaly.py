@@ -0,0 +1,221 @@
+"""
+自适应异常检测
+为每个指标维护指数加权均值和方差基线，识别"对本机而言异常"的取值
+"""
+
+import math
+from fnmatch import fnmatchcase
+from typing import Any, Dict, List, Optional
+from datetime import datetime
+
+from .monitor import MonitorData
+
+
+# 一周的小时数，季节性基线按 星期×小时 分桶
+HOURS_PER_WEEK = 7 * 24
+
+
+class EWMAState:
+    """指数加权均值/方差状态，每个序列占用常数内存"""
+
+    __slots__ = ('mean', 'var', 'count')
+
+    def __init__(self):
+        """初始化状态"""
+        self.mean = 0.0
+        self.var = 0.0
+        self.count = 0
+
+    @property
+    def std(self) -> float:
+        """标准差"""
+        return math.sqrt(self.var)
+
+    def update(self, value: float, alpha: float) -> None:
+        """
+        用新样本更新均值和方差
+
+        Args:
+            value: 新样本
+            alpha: 平滑系数 (0, 1]，越大对新样本越敏感
+        """
+        if self.count == 0:
+            self.mean = value
+            self.var = 0.0
+        else:
+            diff = value - self.mean
+            increment = alpha * diff
+            self.mean += increment
+            self.var = (1 - alpha) * (self.var + diff * increment)
+        self.count += 1
+
+
+class SeriesBaseline:
+    """单个序列的基线：全局EWMA + 可选的按周小时分桶EWMA"""
+
+    __slots__ = ('overall', 'buckets')
+
+    def __init__(self, seasonality: bool):
+        """
+        初始化序列基线
+
+        Args:
+            seasonality: 是否启用按周小时的季节性分桶
+        """
+        self.overall = EWMAState()
+        self.buckets: Optional[List[EWMAState]] = (
+            [EWMAState() for _ in range(HOURS_PER_WEEK)] if seasonality else None
+        )
+
+    def baseline(self, bucket: int, warmup: int) -> EWMAState:
+        """
+        获取用于比较的基线（季节性分桶样本足够时优先使用分桶）
+
+        Args:
+            bucket: 周小时分桶序号
+            warmup: 基线生效所需的最少样本数
+
+        Returns:
+            基线状态
+        """
+        if self.buckets is not None and self.buckets[bucket].count >= warmup:
+            return self.buckets[bucket]
+        return self.overall
+
+    def update(self, value: float, bucket: int, alpha: float) -> None:
+        """
+        更新全局基线和对应分桶
+
+        Args:
+            value: 新样本
+            bucket: 周小时分桶序号
+            alpha: 平滑系数
+        """
+        self.overall.update(value, alpha)
+        if self.buckets is not None:
+            self.buckets[bucket].update(value, alpha)
+
+
+class AnomalyDetector:
+    """基于EWMA基线的异常检测器"""
+
+    def __init__(self, anomaly_config: Dict[str, Any]):
+        """
+        初始化异常检测器
+
+        Args:
+            anomaly_config: alert.anomaly 配置
+        """
+        anomaly_config = anomaly_config or {}
+        self.enabled = anomaly_config.get('enabled', False)
+
+        # 默认参数，可在 metrics 列表中按指标覆盖
+        self.defaults = {
+            'alpha': float(anomaly_config.get('alpha', 0.05)),
+            'k': float(anomaly_config.get('k', 3.0)),
+            'warmup': int(anomaly_config.get('warmup', 30)),
+            'min_std': float(anomaly_config.get('min_std', 1.0)),
+            'seasonality': bool(anomaly_config.get('seasonality', False)),
+        }
+
+        # 指标匹配规则: [(pattern, settings)]
+        self.patterns = []
+        for entry in anomaly_config.get('metrics', []) or []:
+            if isinstance(entry, str):
+                entry = {'metric': entry}
+            settings = dict(self.defaults)
+            settings.update({key: entry[key] for key in self.defaults if key in entry})
+            self.patterns.append((entry.get('metric', ''), settings))
+
+        # 序列基线 {metric_name: SeriesBaseline}
+        self._baselines: Dict[str, SeriesBaseline] = {}
+
+        # 指标名到检测参数的缓存，None表示未启用检测
+        self._settings_cache: Dict[str, Optional[Dict[str, Any]]] = {}
+
+    def _settings_for(self, metric: str) -> Optional[Dict[str, Any]]:
+        """
+        获取指标的检测参数（首个匹配的规则生效）
+
+        Args:
+            metric: 指标名称
+
+        Returns:
+            检测参数，未启用检测时返回None
+        """
+        if metric not in self._settings_cache:
+            self._settings_cache[metric] = next(
+                (settings for pattern, settings in self.patterns if fnmatchcase(metric, pattern)),
+                None
+            )
+        return self._settings_cache[metric]
+
+    @staticmethod
+    def _bucket_of(timestamp: Optional[datetime]) -> int:
+        """计算时间所在的周小时分桶"""
+        timestamp = timestamp or datetime.now()
+        return timestamp.weekday() * 24 + timestamp.hour
+
+    def evaluate(self, all_metrics: List[MonitorData]) -> List[MonitorData]:
+        """
+        对启用检测的指标打分，并用新样本更新基线
+
+        Args:
+            all_metrics: 本次采集的监控数据列表
+
+        Returns:
+            异常检测结果数据列表（基线预热期内的指标不产生数据）
+        """
+        if not self.enabled:
+            return []
+
+        results = []
+        for metric_data in all_metrics:
+            settings = self._settings_for(metric_data.metric)
+            if settings is None:
+                continue
+
+            baseline = self._baselines.get(metric_data.metric)
+            if baseline is None:
+                baseline = SeriesBaseline(settings['seasonality'])
+                self._baselines[metric_data.metric] = baseline
+
+            bucket = self._bucket_of(metric_data.timestamp)
+            reference = baseline.baseline(bucket, settings['warmup'])
+
+            # 先用历史基线打分，再纳入本次样本
+            if reference.count >= settings['warmup']:
+                std = max(reference.std, settings['min_std'])
+                score = (metric_data.value - reference.mean) / std
+                upper = reference.mean + settings['k'] * std
+                results.append(MonitorData(
+                    metric=f'{metric_data.metric}_anomaly',
+                    value=metric_data.value,
+                    threshold=upper,
+                    unit=metric_data.unit,
+                    timestamp=metric_data.timestamp,
+                    hostname=metric_data.hostname,
+                    alert=score > settings['k'],
+                    detail=f"偏离基线 {score:.1f}σ "
+                           f"(基线 {reference.mean:.2f}±{std:.2f}{metric_data.unit})"
+                ))
+
+            baseline.update(metric_data.value, bucket, settings['alpha'])
+
+        return results
+
+    def get_baselines(self) -> Dict[str, Dict[str, float]]:
+        """
+        获取各指标的全局基线
+
+        Returns:
+            {metric_name: {'mean', 'std', 'count'}}
+        """
+        return {
+            metric: {
+                'mean': baseline.overall.mean,
+                'std': baseline.overall.std,
+                'count': baseline.overall.count
+            }
+            for metric, baseline in self._baselines.items()
+        }
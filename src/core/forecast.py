@@ -0,0 +1,187 @@
+"""
+容量耗尽预测
+基于滚动窗口的增量最小二乘拟合，估算磁盘等指标还剩多少小时写满
+"""
+
+import time
+from collections import deque
+from fnmatch import fnmatchcase
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from .monitor import MonitorData
+
+
+SECONDS_PER_HOUR = 3600.0
+
+
+class LinearTrend:
+    """滚动窗口线性趋势，每次更新 O(1)"""
+
+    def __init__(self, window: float):
+        """
+        初始化线性趋势
+
+        Args:
+            window: 参与拟合的时间窗口（秒）
+        """
+        self.window = window
+        self._samples: Deque[Tuple[float, float]] = deque()
+
+        # 以 origin 为原点的累加和，避免时间戳过大导致精度损失
+        self._origin: Optional[float] = None
+        self._sum_x = 0.0
+        self._sum_y = 0.0
+        self._sum_xx = 0.0
+        self._sum_xy = 0.0
+
+    @property
+    def count(self) -> int:
+        """窗口内样本数"""
+        return len(self._samples)
+
+    @property
+    def span(self) -> float:
+        """窗口内样本覆盖的时间跨度（秒）"""
+        if len(self._samples) < 2:
+            return 0.0
+        return self._samples[-1][0] - self._samples[0][0]
+
+    def _accumulate(self, t: float, y: float, sign: float) -> None:
+        """将样本加入或移出累加和"""
+        x = (t - self._origin) / SECONDS_PER_HOUR
+        self._sum_x += sign * x
+        self._sum_y += sign * y
+        self._sum_xx += sign * x * x
+        self._sum_xy += sign * x * y
+
+    def _rebase(self, origin: float) -> None:
+        """平移原点，O(1) 修正累加和"""
+        shift = (origin - self._origin) / SECONDS_PER_HOUR
+        n = len(self._samples)
+        self._sum_xx += -2 * shift * self._sum_x + n * shift * shift
+        self._sum_xy -= shift * self._sum_y
+        self._sum_x -= n * shift
+        self._origin = origin
+
+    def add(self, t: float, y: float) -> None:
+        """
+        加入新样本并淘汰窗口外的旧样本
+
+        Args:
+            t: 单调时钟时间（秒）
+            y: 样本值
+        """
+        if self._origin is None:
+            self._origin = t
+
+        self._samples.append((t, y))
+        self._accumulate(t, y, 1.0)
+
+        while self._samples and t - self._samples[0][0] > self.window:
+            old_t, old_y = self._samples.popleft()
+            self._accumulate(old_t, old_y, -1.0)
+
+        # 原点落后窗口过多时平移到最早样本
+        if self._samples and self._samples[0][0] - self._origin > self.window:
+            self._rebase(self._samples[0][0])
+
+    def slope(self) -> Optional[float]:
+        """
+        拟合斜率
+
+        Returns:
+            每小时变化量，样本不足时返回None
+        """
+        n = len(self._samples)
+        if n < 2:
+            return None
+        denominator = n * self._sum_xx - self._sum_x * self._sum_x
+        if denominator <= 1e-12:
+            return None
+        return (n * self._sum_xy - self._sum_x * self._sum_y) / denominator
+
+
+class CapacityForecaster:
+    """容量耗尽时间预测器"""
+
+    def __init__(self, forecast_config: Dict[str, Any]):
+        """
+        初始化预测器
+
+        Args:
+            forecast_config: alert.forecast 配置
+        """
+        forecast_config = forecast_config or {}
+        self.enabled = forecast_config.get('enabled', False)
+        self.metrics = forecast_config.get('metrics', ['disk_*']) or []
+        self.window = float(forecast_config.get('window', 21600))
+        self.horizon_hours = float(forecast_config.get('horizon_hours', 24))
+        self.min_samples = int(forecast_config.get('min_samples', 10))
+        self.min_span = float(forecast_config.get('min_span', 1800))
+        self.capacity = float(forecast_config.get('capacity', 100.0))
+
+        # 各序列的趋势 {metric_name: LinearTrend}
+        self._trends: Dict[str, LinearTrend] = {}
+
+    def _matches(self, metric: str) -> bool:
+        """指标是否启用预测"""
+        return any(fnmatchcase(metric, pattern) for pattern in self.metrics)
+
+    def evaluate(self, all_metrics: List[MonitorData],
+                 now: Optional[float] = None) -> List[MonitorData]:
+        """
+        更新趋势并预测耗尽时间
+
+        Args:
+            all_metrics: 本次采集的监控数据列表
+            now: 单调时钟时间，默认取当前时间
+
+        Returns:
+            预测结果数据列表（样本不足的指标不产生数据）
+        """
+        if not self.enabled:
+            return []
+
+        now = time.monotonic() if now is None else now
+        results = []
+
+        for metric_data in all_metrics:
+            if metric_data.metric.endswith('_forecast') or not self._matches(metric_data.metric):
+                continue
+
+            trend = self._trends.get(metric_data.metric)
+            if trend is None:
+                trend = LinearTrend(self.window)
+                self._trends[metric_data.metric] = trend
+            trend.add(now, metric_data.value)
+
+            if trend.count < self.min_samples or trend.span < self.min_span:
+                continue
+
+            slope = trend.slope()
+            if slope is None:
+                continue
+
+            remaining = max(self.capacity - metric_data.value, 0.0)
+            if slope > 0:
+                eta_hours = remaining / slope
+                detail = (f"预计 {eta_hours:.1f} 小时后写满 "
+                          f"(当前 {metric_data.value:.2f}{metric_data.unit}, "
+                          f"增长 {slope:.2f}{metric_data.unit}/小时)")
+            else:
+                # 未增长时仍产生数据（无穷大，消息中显示为"不会写满"），之前的预测告警据此恢复
+                eta_hours = float('inf')
+                detail = f"用量未增长 (变化 {slope:.2f}{metric_data.unit}/小时)"
+
+            results.append(MonitorData(
+                metric=f'{metric_data.metric}_forecast',
+                value=eta_hours,
+                threshold=self.horizon_hours,
+                unit='小时',
+                timestamp=metric_data.timestamp,
+                hostname=metric_data.hostname,
+                alert=eta_hours <= self.horizon_hours,
+                detail=detail
+            ))
+
+        return results
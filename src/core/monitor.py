@@ -5,21 +5,27 @@
 
 import psutil
 import socket
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
 from datetime import datetime
 
-from ..services.config import config_manager
+from ..services.config import config_manager, ConfigSnapshot
 from ..services.logger import logger_manager
 
 
+# 支持的采集项，每项可在 monitor.<name>.interval 中单独配置采集间隔
+COLLECTORS = ('cpu', 'memory', 'disk', 'network')
+
+
 class MonitorData:
     """监控数据结构"""
     
-    def __init__(self, metric: str, value: float, threshold: float, 
-                 unit: str, timestamp: datetime, hostname: str):
+    def __init__(self, metric: str, value: float, threshold: float,
+                 unit: str, timestamp: datetime, hostname: str,
+                 alert: Optional[bool] = None, detail: str = '',
+                 server_ip: Optional[str] = None):
         """
         初始化监控数据
-        
+
         Args:
             metric: 监控指标名称
             value: 当前值
@@ -27,6 +33,9 @@ class MonitorData:
             unit: 单位
             timestamp: 时间戳
             hostname: 主机名
+            alert: 显式指定的告警状态，为None时按 value >= threshold 判断
+            detail: 附加说明，会追加到告警消息中
+            server_ip: 数据来源服务器的IP（集群汇聚端收到的远端数据），为None时消息中使用本机IP
         """
         self.metric = metric
         self.value = value
@@ -34,10 +43,15 @@ class MonitorData:
         self.unit = unit
         self.timestamp = timestamp
         self.hostname = hostname
-    
+        self.alert = alert
+        self.detail = detail
+        self.server_ip = server_ip
+
     @property
     def is_alert(self) -> bool:
         """是否需要告警"""
+        if self.alert is not None:
+            return self.alert
         return self.value >= self.threshold
 
 
@@ -48,6 +62,18 @@ class ResourceMonitor:
         """初始化资源监控器"""
         self.hostname = socket.gethostname()
         self.monitor_config = config_manager.get_monitor_config()
+        
+        # 配置文件变化时自动更新采集配置（如磁盘路径）
+        config_manager.subscribe(self.apply_config)
+    
+    def apply_config(self, snapshot: ConfigSnapshot) -> None:
+        """
+        应用新的监控配置
+        
+        Args:
+            snapshot: 新的配置快照
+        """
+        self.monitor_config = snapshot.monitor
     
     def get_cpu_usage(self) -> Optional[MonitorData]:
         """
@@ -56,13 +82,14 @@ class ResourceMonitor:
         Returns:
             CPU监控数据，如果监控未启用则返回None
         """
-        if not config_manager.is_metric_enabled('cpu'):
+        settings = config_manager.get_metric_settings('cpu')
+        if not settings.enabled:
             return None
         
         try:
             # 获取CPU使用率（1秒采样）
             cpu_percent = psutil.cpu_percent(interval=1)
-            threshold = config_manager.get_metric_threshold('cpu')
+            threshold = settings.threshold
             
             monitor_data = MonitorData(
                 metric='cpu',
@@ -87,14 +114,15 @@ class ResourceMonitor:
         Returns:
             内存监控数据，如果监控未启用则返回None
         """
-        if not config_manager.is_metric_enabled('memory'):
+        settings = config_manager.get_metric_settings('memory')
+        if not settings.enabled:
             return None
         
         try:
             # 获取内存信息
             memory = psutil.virtual_memory()
             memory_percent = memory.percent
-            threshold = config_manager.get_metric_threshold('memory')
+            threshold = settings.threshold
             
             monitor_data = MonitorData(
                 metric='memory',
@@ -121,13 +149,14 @@ class ResourceMonitor:
         """
         disk_data = []
         
-        if not config_manager.is_metric_enabled('disk'):
+        settings = config_manager.get_metric_settings('disk')
+        if not settings.enabled:
             return disk_data
         
         try:
             # 获取配置的磁盘路径
             disk_paths = self.monitor_config.get('disk', {}).get('paths', ['/'])
-            threshold = config_manager.get_metric_threshold('disk')
+            threshold = settings.threshold
             
             for path in disk_paths:
                 try:
@@ -167,7 +196,8 @@ class ResourceMonitor:
         Returns:
             网络监控数据，如果监控未启用则返回None
         """
-        if not config_manager.is_metric_enabled('network'):
+        settings = config_manager.get_metric_settings('network')
+        if not settings.enabled:
             return None
         
         try:
@@ -177,7 +207,7 @@ class ResourceMonitor:
             # 这里简化实现，实际应该计算速率
             # 需要保存上一次的值来计算差值
             total_bytes = net_io.bytes_sent + net_io.bytes_recv
-            threshold = config_manager.get_metric_threshold('network')
+            threshold = settings.threshold
             
             monitor_data = MonitorData(
                 metric='network',
@@ -215,36 +245,52 @@ class ResourceMonitor:
             logger_manager.error(f"获取系统信息失败: {str(e)}")
             return {'hostname': self.hostname}
     
-    def collect_all_metrics(self) -> List[MonitorData]:
+    def collect_metrics(self, collectors: Iterable[str]) -> List[MonitorData]:
         """
-        收集所有启用的监控指标
+        收集指定采集项的监控指标
         
+        Args:
+            collectors: 采集项名称 (cpu, memory, disk, network)
+            
         Returns:
-            所有监控数据列表
+            监控数据列表
         """
         all_metrics = []
+        collectors = set(collectors)
         
         # 收集CPU数据
-        cpu_data = self.get_cpu_usage()
-        if cpu_data:
-            all_metrics.append(cpu_data)
+        if 'cpu' in collectors:
+            cpu_data = self.get_cpu_usage()
+            if cpu_data:
+                all_metrics.append(cpu_data)
         
         # 收集内存数据
-        memory_data = self.get_memory_usage()
-        if memory_data:
-            all_metrics.append(memory_data)
+        if 'memory' in collectors:
+            memory_data = self.get_memory_usage()
+            if memory_data:
+                all_metrics.append(memory_data)
         
         # 收集磁盘数据
-        disk_data = self.get_disk_usage()
-        all_metrics.extend(disk_data)
+        if 'disk' in collectors:
+            all_metrics.extend(self.get_disk_usage())
         
         # 收集网络数据（如果启用）
-        network_data = self.get_network_io()
-        if network_data:
-            all_metrics.append(network_data)
+        if 'network' in collectors:
+            network_data = self.get_network_io()
+            if network_data:
+                all_metrics.append(network_data)
         
         return all_metrics
     
+    def collect_all_metrics(self) -> List[MonitorData]:
+        """
+        收集所有启用的监控指标
+        
+        Returns:
+            所有监控数据列表
+        """
+        return self.collect_metrics(COLLECTORS)
+    
     def get_alert_metrics(self) -> List[MonitorData]:
         """
         获取需要告警的监控指标
@@ -0,0 +1,144 @@
+"""
+变化率告警
+基于单调时钟时间戳的环形缓冲区，识别内存泄漏等缓慢但持续的增长
+"""
+
+import time
+from collections import deque
+from fnmatch import fnmatchcase
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from .monitor import MonitorData
+
+
+class SampleRing:
+    """定长的 (单调时钟时间, 值) 环形缓冲区，按窗口抽稀写入，容量不随采集频率增长"""
+
+    def __init__(self, capacity: int):
+        """
+        初始化环形缓冲区
+
+        Args:
+            capacity: 最多保留的样本数（至少3个）
+        """
+        self.capacity = max(3, capacity)
+        self._samples: Deque[Tuple[float, float]] = deque(maxlen=self.capacity)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def add(self, t: float, value: float, window: float) -> None:
+        """
+        写入样本，并淘汰窗口起点之前多余的旧样本
+
+        只保留窗口起点之前的最后一个样本作为比较基准，均摊 O(1)。
+        与上一个保留样本的间隔小于 window / (capacity - 2) 的样本不写入（抽稀），
+        窗口内最多 capacity - 1 个样本，加上基准样本正好放满，基准样本不会被覆盖。
+
+        Args:
+            t: 单调时钟时间（秒）
+            value: 样本值
+            window: 比较窗口（秒）
+        """
+        if self._samples and t - self._samples[-1][0] < window / (self.capacity - 2):
+            return
+        self._samples.append((t, value))
+        start = t - window
+        while len(self._samples) >= 2 and self._samples[1][0] <= start:
+            self._samples.popleft()
+
+    def oldest(self) -> Optional[Tuple[float, float]]:
+        """窗口基准样本"""
+        return self._samples[0] if self._samples else None
+
+
+class RateDetector:
+    """变化率检测器"""
+
+    def __init__(self, rate_rules: List[Dict[str, Any]]):
+        """
+        初始化变化率检测器
+
+        Args:
+            rate_rules: alert.rate_rules 配置列表
+
+        Raises:
+            ValueError: 规则配置不合法
+        """
+        self.rules = []
+        for index, rule in enumerate(rate_rules or []):
+            if not isinstance(rule, dict) or 'metric' not in rule or 'increase' not in rule:
+                raise ValueError(f"变化率规则需要 metric 和 increase: 第{index + 1}条")
+            window = float(rule.get('window', 1800))
+            if window <= 0:
+                raise ValueError(f"变化率规则的 window 必须大于0: 第{index + 1}条")
+            self.rules.append({
+                'metric': rule['metric'],
+                'increase': float(rule['increase']),
+                'window': window,
+                'min_coverage': float(rule.get('min_coverage', 0.8)),
+                'capacity': int(rule.get('max_samples', 1024)),
+            })
+
+        # 各指标的样本缓冲区 {metric_name: SampleRing}
+        self._rings: Dict[str, SampleRing] = {}
+
+        # 指标名到规则的缓存，None表示没有匹配的规则
+        self._rule_cache: Dict[str, Optional[Dict[str, Any]]] = {}
+
+    def _rule_for(self, metric: str) -> Optional[Dict[str, Any]]:
+        """获取指标匹配的首条规则"""
+        if metric not in self._rule_cache:
+            self._rule_cache[metric] = next(
+                (rule for rule in self.rules if fnmatchcase(metric, rule['metric'])), None
+            )
+        return self._rule_cache[metric]
+
+    def evaluate(self, all_metrics: List[MonitorData],
+                 now: Optional[float] = None) -> List[MonitorData]:
+        """
+        记录样本并计算窗口内的变化量
+
+        Args:
+            all_metrics: 本次采集的监控数据列表
+            now: 单调时钟时间，默认取当前时间
+
+        Returns:
+            变化率数据列表（历史不足一个窗口的指标不产生数据）
+        """
+        if not self.rules:
+            return []
+
+        now = time.monotonic() if now is None else now
+        results = []
+
+        for metric_data in all_metrics:
+            rule = self._rule_for(metric_data.metric)
+            if rule is None:
+                continue
+
+            ring = self._rings.get(metric_data.metric)
+            if ring is None:
+                ring = SampleRing(rule['capacity'])
+                self._rings[metric_data.metric] = ring
+            ring.add(now, metric_data.value, rule['window'])
+
+            base_time, base_value = ring.oldest()
+            elapsed = now - base_time
+            if elapsed < rule['window'] * rule['min_coverage']:
+                continue
+
+            delta = metric_data.value - base_value
+            results.append(MonitorData(
+                metric=f'{metric_data.metric}_rate',
+                value=delta,
+                threshold=rule['increase'],
+                unit=metric_data.unit,
+                timestamp=metric_data.timestamp,
+                hostname=metric_data.hostname,
+                alert=delta >= rule['increase'],
+                detail=f"{elapsed / 60:.0f}分钟内变化 {delta:+.2f}{metric_data.unit} "
+                       f"({base_value:.2f} → {metric_data.value:.2f})"
+            ))
+
+        return results
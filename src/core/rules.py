@@ -0,0 +1,253 @@
+"""
+组合告警规则引擎
+负责解析 alert.rules 中的规则表达式，并将其编译为可重复执行的闭包
+"""
+
+import ast
+import operator
+from typing import Any, Callable, Dict, FrozenSet, List, Optional
+
+
+# 编译后的表达式节点：接收最新指标值字典，返回计算结果
+Evaluator = Callable[[Dict[str, float]], Any]
+
+
+class RuleSyntaxError(ValueError):
+    """规则表达式语法错误"""
+
+
+class _MissingMetric(Exception):
+    """表达式引用的指标当前没有采集值"""
+
+
+_BIN_OPS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.Mod: operator.mod,
+}
+
+_UNARY_OPS = {
+    ast.Not: operator.not_,
+    ast.USub: operator.neg,
+    ast.UAdd: operator.pos,
+}
+
+_COMPARE_OPS = {
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+}
+
+
+def _compile_node(node: ast.AST, names: set) -> Evaluator:
+    """
+    将语法树节点编译为闭包
+
+    仅允许数字常量、指标名、算术运算、比较运算和 and/or/not，
+    其余语法一律拒绝，保证规则无法执行任意代码。
+
+    Args:
+        node: 语法树节点
+        names: 收集表达式中引用的指标名
+
+    Returns:
+        编译后的闭包
+
+    Raises:
+        RuleSyntaxError: 表达式包含不支持的语法
+    """
+    if isinstance(node, ast.Expression):
+        return _compile_node(node.body, names)
+
+    # Python 3.8+ 解析为 ast.Constant，3.6/3.7 解析为 ast.Num
+    if isinstance(node, ast.Constant) or type(node).__name__ == 'Num':
+        value = node.n if type(node).__name__ == 'Num' else node.value
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise RuleSyntaxError(f"不支持的常量: {value!r}")
+        constant = float(value)
+        return lambda values: constant
+
+    if isinstance(node, ast.Name):
+        name = node.id
+        names.add(name)
+
+        def lookup(values: Dict[str, float]) -> float:
+            try:
+                return values[name]
+            except KeyError:
+                raise _MissingMetric(name)
+        return lookup
+
+    if isinstance(node, ast.BoolOp):
+        operands = [_compile_node(value, names) for value in node.values]
+        if isinstance(node.op, ast.And):
+            return lambda values: all(operand(values) for operand in operands)
+        return lambda values: any(operand(values) for operand in operands)
+
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY_OPS:
+        unary_op = _UNARY_OPS[type(node.op)]
+        operand = _compile_node(node.operand, names)
+        return lambda values: unary_op(operand(values))
+
+    if isinstance(node, ast.BinOp) and type(node.op) in _BIN_OPS:
+        bin_op = _BIN_OPS[type(node.op)]
+        left = _compile_node(node.left, names)
+        right = _compile_node(node.right, names)
+        return lambda values: bin_op(left(values), right(values))
+
+    if isinstance(node, ast.Compare):
+        if not all(type(op) in _COMPARE_OPS for op in node.ops):
+            raise RuleSyntaxError("不支持的比较运算符")
+        first = _compile_node(node.left, names)
+        pairs = [(_COMPARE_OPS[type(op)], _compile_node(comparator, names))
+                 for op, comparator in zip(node.ops, node.comparators)]
+
+        def compare(values: Dict[str, float]) -> bool:
+            # 链式比较: a < b < c 等价于 a < b and b < c
+            left_value = first(values)
+            for compare_op, right in pairs:
+                right_value = right(values)
+                if not compare_op(left_value, right_value):
+                    return False
+                left_value = right_value
+            return True
+        return compare
+
+    raise RuleSyntaxError(f"不支持的语法: {type(node).__name__}")
+
+
+def compile_expression(expression: str) -> 'CompiledExpression':
+    """
+    解析并编译规则表达式
+
+    Args:
+        expression: 规则表达式，例如 "cpu > 85 and memory > 90"
+
+    Returns:
+        编译后的表达式
+
+    Raises:
+        RuleSyntaxError: 表达式为空或语法错误
+    """
+    if not isinstance(expression, str) or not expression.strip():
+        raise RuleSyntaxError("规则表达式不能为空")
+
+    try:
+        tree = ast.parse(expression.strip(), mode='eval')
+    except SyntaxError as e:
+        raise RuleSyntaxError(f"规则表达式解析失败: {expression} ({e.msg})")
+
+    names: set = set()
+    evaluator = _compile_node(tree, names)
+    return CompiledExpression(expression.strip(), evaluator, frozenset(names))
+
+
+class CompiledExpression:
+    """编译后的规则表达式"""
+
+    def __init__(self, source: str, evaluator: Evaluator, names: FrozenSet[str]):
+        """
+        初始化编译后的表达式
+
+        Args:
+            source: 原始表达式文本
+            evaluator: 编译得到的闭包
+            names: 表达式引用的指标名
+        """
+        self.source = source
+        self.names = names
+        self._evaluator = evaluator
+
+    def evaluate(self, values: Dict[str, float]) -> Optional[bool]:
+        """
+        计算表达式
+
+        Args:
+            values: 最新指标值 {metric_name: value}
+
+        Returns:
+            表达式结果；引用的指标尚无数据或计算出错时返回None
+        """
+        try:
+            return bool(self._evaluator(values))
+        except (_MissingMetric, ZeroDivisionError):
+            return None
+
+
+class AlertRule:
+    """组合告警规则"""
+
+    def __init__(self, name: str, expression: str, description: str = ''):
+        """
+        初始化告警规则
+
+        Args:
+            name: 规则名称
+            expression: 规则表达式
+            description: 规则说明，会显示在告警消息中
+        """
+        self.name = name
+        self.metric = f'rule_{name}'
+        self.description = description
+        self.expression = compile_expression(expression)
+
+    def describe(self, values: Dict[str, float]) -> str:
+        """
+        生成规则的详情文本
+
+        Args:
+            values: 最新指标值
+
+        Returns:
+            包含表达式和相关指标当前值的说明
+        """
+        current = ', '.join(f"{name}={values[name]:.2f}"
+                            for name in sorted(self.expression.names) if name in values)
+        detail = f"{self.expression.source} ({current})" if current else self.expression.source
+        if self.description:
+            detail = f"{self.description}: {detail}"
+        return detail
+
+
+def compile_rules(rules_config: List[Dict[str, Any]]) -> List[AlertRule]:
+    """
+    根据配置编译全部告警规则
+
+    Args:
+        rules_config: alert.rules 配置列表
+
+    Returns:
+        已编译的规则列表（跳过 enabled: false 的规则）
+
+    Raises:
+        ValueError: 规则配置不合法
+    """
+    rules = []
+    seen = set()
+
+    for index, rule_config in enumerate(rules_config or []):
+        if not isinstance(rule_config, dict):
+            raise ValueError(f"告警规则配置格式错误: 第{index + 1}条")
+
+        name = str(rule_config.get('name', '')).strip()
+        if not name:
+            raise ValueError(f"告警规则缺少名称: 第{index + 1}条")
+        if name in seen:
+            raise ValueError(f"告警规则名称重复: {name}")
+        seen.add(name)
+
+        if not rule_config.get('enabled', True):
+            continue
+
+        rules.append(AlertRule(
+            name=name,
+            expression=rule_config.get('expression', ''),
+            description=rule_config.get('description', '')
+        ))
+
+    return rules
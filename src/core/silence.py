@@ -0,0 +1,450 @@
+"""
+告警静默管理
+支持配置文件中的静态静默、运行时通过命令行添加的静默，以及类cron的周期性维护窗口
+"""
+
+import json
+import os
+import re
+import time
+import uuid
+from fnmatch import fnmatchcase
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+from datetime import datetime
+
+from ..services.logger import logger_manager
+
+
+_DURATION_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400, 'w': 604800}
+
+_WEEKDAY_NAMES = {'sun': 0, 'mon': 1, 'tue': 2, 'wed': 3, 'thu': 4, 'fri': 5, 'sat': 6}
+
+# cron 各字段的取值范围: 分 时 日 月 周
+_CRON_RANGES = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 7)]
+
+_TIME_FORMATS = ('%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%d')
+
+
+def parse_duration(value: Any) -> float:
+    """
+    解析时长
+
+    Args:
+        value: 秒数，或 "90s"、"30m"、"2h"、"1d"、"1h30m" 形式的字符串
+
+    Returns:
+        秒数
+
+    Raises:
+        ValueError: 格式错误
+    """
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        seconds = float(value)
+    else:
+        text = str(value).strip().lower()
+        parts = re.findall(r'(\d+(?:\.\d+)?)([smhdw]?)', text)
+        if not parts or ''.join(number + unit for number, unit in parts) != text:
+            raise ValueError(f"无法解析时长: {value}")
+        seconds = sum(float(number) * _DURATION_UNITS[unit or 's'] for number, unit in parts)
+
+    if seconds <= 0:
+        raise ValueError(f"时长必须大于0: {value}")
+    return seconds
+
+
+def parse_time(value: Any) -> float:
+    """
+    解析时间点
+
+    Args:
+        value: 时间戳，或 "YYYY-MM-DD HH:MM[:SS]" 形式的本地时间
+
+    Returns:
+        时间戳
+
+    Raises:
+        ValueError: 格式错误
+    """
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    if isinstance(value, datetime):
+        return value.timestamp()
+
+    for time_format in _TIME_FORMATS:
+        try:
+            return datetime.strptime(str(value).strip(), time_format).timestamp()
+        except ValueError:
+            continue
+    raise ValueError(f"无法解析时间: {value}")
+
+
+class CronWindow:
+    """类cron的周期性时间窗口：cron 表达式给出开始时刻，duration 给出持续时长"""
+
+    def __init__(self, expression: str, duration: float):
+        """
+        初始化周期窗口
+
+        Args:
+            expression: 5段式cron表达式 "分 时 日 月 周"，周支持 0-7 或 mon-sun；
+                与标准cron一致，日和周都不是 * 时两者满足其一即可（如 "0 2 1 * sun" 为每月1日及每周日）
+            duration: 每次窗口的持续时长（秒）
+
+        Raises:
+            ValueError: 表达式格式错误
+        """
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"cron表达式需要5个字段: {expression}")
+
+        self.expression = expression
+        self.duration = duration
+        self._fields = [self._parse_field(field, low, high, index == 4)
+                        for index, (field, (low, high)) in enumerate(zip(fields, _CRON_RANGES))]
+        # 周日可写作 0 或 7
+        if 7 in self._fields[4]:
+            self._fields[4].add(0)
+
+        # 日、周字段是否受限（不以 * 开头），两者都受限时按"或"匹配
+        self._days_or = not fields[2].startswith('*') and not fields[4].startswith('*')
+
+        # 按分钟缓存计算结果 (minute, active)
+        self._cache: Tuple[int, bool] = (-1, False)
+
+    @staticmethod
+    def _parse_field(field: str, low: int, high: int, weekday: bool) -> Set[int]:
+        """解析cron单个字段为取值集合"""
+        def to_int(text: str) -> int:
+            if weekday and text in _WEEKDAY_NAMES:
+                return _WEEKDAY_NAMES[text]
+            return int(text)
+
+        values: Set[int] = set()
+        for part in field.lower().split(','):
+            step = 1
+            if '/' in part:
+                part, step_text = part.split('/', 1)
+                step = int(step_text)
+            if part == '*':
+                start, end = low, high
+            elif '-' in part:
+                start_text, end_text = part.split('-', 1)
+                start, end = to_int(start_text), to_int(end_text)
+            else:
+                start = end = to_int(part)
+            if start < low or end > high or start > end or step <= 0:
+                raise ValueError(f"cron字段超出范围: {field}")
+            values.update(range(start, end + 1, step))
+        return values
+
+    def _fires_at(self, minute: int) -> bool:
+        """指定分钟是否为窗口开始时刻"""
+        moment = time.localtime(minute * 60)
+        # time.struct_time 的 tm_wday 以周一为0，cron 以周日为0
+        weekday = (moment.tm_wday + 1) % 7
+        minutes, hours, days, months, weekdays = self._fields
+        if self._days_or:
+            day_matches = moment.tm_mday in days or weekday in weekdays
+        else:
+            day_matches = moment.tm_mday in days and weekday in weekdays
+        return (moment.tm_min in minutes and moment.tm_hour in hours
+                and moment.tm_mon in months and day_matches)
+
+    def active(self, now: float) -> bool:
+        """
+        判断当前是否处于窗口内
+
+        向前回溯 duration 内的每个整分钟，查找是否有窗口开始时刻，结果按分钟缓存。
+
+        Args:
+            now: 当前时间戳
+
+        Returns:
+            是否处于窗口内
+        """
+        current_minute = int(now // 60)
+        if self._cache[0] == current_minute:
+            return self._cache[1]
+
+        earliest = now - self.duration
+        minute = current_minute
+        active = False
+        while minute * 60 > earliest:
+            if self._fires_at(minute):
+                active = True
+                break
+            minute -= 1
+
+        self._cache = (current_minute, active)
+        return active
+
+
+class Silence:
+    """单条静默规则"""
+
+    def __init__(self, metric: str, start: Optional[float] = None, end: Optional[float] = None,
+                 cron: Optional[str] = None, duration: Optional[float] = None,
+                 comment: str = '', silence_id: Optional[str] = None, runtime: bool = False):
+        """
+        初始化静默规则
+
+        Args:
+            metric: 指标名称或通配符模式
+            start: 开始时间戳（一次性静默）
+            end: 结束时间戳（一次性静默）
+            cron: 周期窗口的cron表达式
+            duration: 周期窗口持续时长（秒）
+            comment: 备注
+            silence_id: 静默ID
+            runtime: 是否为运行时添加（持久化到静默文件）
+
+        Raises:
+            ValueError: 参数不合法
+        """
+        if not metric:
+            raise ValueError("静默规则缺少 metric")
+        if cron is None and end is None:
+            raise ValueError(f"静默规则需要 end 或 cron: {metric}")
+
+        self.id = silence_id or uuid.uuid4().hex[:8]
+        self.metric = metric
+        self.start = start
+        self.end = end
+        self.comment = comment
+        self.runtime = runtime
+        self.cron = cron
+        self.duration = duration
+        self.window = CronWindow(cron, duration or 3600.0) if cron else None
+
+    @property
+    def is_pattern(self) -> bool:
+        """指标名是否包含通配符"""
+        return any(char in self.metric for char in '*?[')
+
+    def active(self, now: float) -> bool:
+        """是否处于生效时间内"""
+        if self.start is not None and now < self.start:
+            return False
+        if self.end is not None and now >= self.end:
+            return False
+        if self.window is not None:
+            return self.window.active(now)
+        return True
+
+    def expired(self, now: float) -> bool:
+        """是否已永久失效"""
+        return self.end is not None and now >= self.end
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], runtime: bool = False) -> 'Silence':
+        """
+        根据配置构造静默规则
+
+        Args:
+            config: 静默配置字典
+            runtime: 是否为运行时静默
+
+        Returns:
+            静默规则
+        """
+        start = parse_time(config['start']) if config.get('start') is not None else None
+        end = parse_time(config['end']) if config.get('end') is not None else None
+        duration = parse_duration(config['duration']) if config.get('duration') is not None else None
+
+        # 一次性静默可以只给出时长
+        if config.get('cron') is None and end is None and duration is not None:
+            end = (start if start is not None else time.time()) + duration
+
+        return cls(
+            metric=config.get('metric', ''),
+            start=start,
+            end=end,
+            cron=config.get('cron'),
+            duration=duration,
+            comment=config.get('comment', ''),
+            silence_id=config.get('id'),
+            runtime=runtime
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为可序列化的字典"""
+        data: Dict[str, Any] = {'id': self.id, 'metric': self.metric, 'comment': self.comment}
+        if self.start is not None:
+            data['start'] = self.start
+        if self.end is not None:
+            data['end'] = self.end
+        if self.cron is not None:
+            data['cron'] = self.cron
+            data['duration'] = self.duration
+        return data
+
+    def describe(self) -> str:
+        """生成便于阅读的说明"""
+        def fmt(timestamp: float) -> str:
+            return datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S')
+
+        if self.cron:
+            when = f"周期 '{self.cron}' 持续 {self.duration:.0f}秒"
+        else:
+            when = f"{fmt(self.start) if self.start else '现在'} ~ {fmt(self.end)}"
+        comment = f" ({self.comment})" if self.comment else ''
+        return f"[{self.id}] {self.metric} {when}{comment}"
+
+
+class SilenceManager:
+    """静默管理器，按指标名建立索引以加速匹配"""
+
+    def __init__(self, alert_config: Dict[str, Any]):
+        """
+        初始化静默管理器
+
+        Args:
+            alert_config: 告警配置
+
+        Raises:
+            ValueError: 静默配置不合法
+        """
+        alert_config = alert_config or {}
+        self.silence_file = Path(alert_config.get('silence_file', 'data/silences.json'))
+        self._static = [Silence.from_config(config) for config in alert_config.get('silences', []) or []]
+        self._runtime: List[Silence] = []
+        self._file_version: Optional[Tuple[int, int]] = None
+
+        # 精确匹配索引 {metric_name: [Silence]}，以及含通配符的静默列表
+        self._exact: Dict[str, List[Silence]] = {}
+        self._patterns: List[Silence] = []
+
+        # 指标名到候选静默的缓存，索引变化时清空
+        self._candidates: Dict[str, List[Silence]] = {}
+
+        self._load_runtime()
+        self._rebuild_index()
+
+    def _rebuild_index(self) -> None:
+        """重建静默索引，丢弃已过期的规则"""
+        now = time.time()
+        self._exact = {}
+        self._patterns = []
+        for silence in self._static + self._runtime:
+            if silence.expired(now):
+                continue
+            if silence.is_pattern:
+                self._patterns.append(silence)
+            else:
+                self._exact.setdefault(silence.metric, []).append(silence)
+        self._candidates = {}
+
+    def _load_runtime(self) -> None:
+        """从静默文件加载运行时静默"""
+        try:
+            stat = self.silence_file.stat()
+        except OSError:
+            if self._file_version is not None:
+                self._runtime = []
+                self._file_version = None
+                self._rebuild_index()
+            return
+
+        # 以 (修改时间, 文件大小) 判断文件是否变化
+        version = (stat.st_mtime_ns, stat.st_size)
+        if version == self._file_version:
+            return
+
+        try:
+            with open(self.silence_file, 'r', encoding='utf-8') as file:
+                entries = json.load(file)
+            self._runtime = [Silence.from_config(entry, runtime=True) for entry in entries]
+            self._file_version = version
+        except (OSError, ValueError, KeyError) as e:
+            logger_manager.error(f"静默文件加载失败 {self.silence_file}: {str(e)}")
+            return
+
+        self._rebuild_index()
+
+    def _save_runtime(self) -> None:
+        """将运行时静默原子写入静默文件"""
+        now = time.time()
+        self._runtime = [silence for silence in self._runtime if not silence.expired(now)]
+        self.silence_file.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.silence_file.with_suffix('.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            json.dump([silence.to_dict() for silence in self._runtime], file, ensure_ascii=False, indent=2)
+        os.replace(str(temp_path), str(self.silence_file))
+        stat = self.silence_file.stat()
+        self._file_version = (stat.st_mtime_ns, stat.st_size)
+        self._rebuild_index()
+
+    def match(self, metric: str, now: Optional[float] = None) -> Optional[Silence]:
+        """
+        查找当前对指标生效的静默
+
+        Args:
+            metric: 指标名称
+            now: 当前时间戳，默认取当前时间
+
+        Returns:
+            生效的静默规则，没有则返回None
+        """
+        self._load_runtime()
+        now = time.time() if now is None else now
+
+        candidates = self._candidates.get(metric)
+        if candidates is None:
+            candidates = self._exact.get(metric, []) + [
+                silence for silence in self._patterns if fnmatchcase(metric, silence.metric)
+            ]
+            self._candidates[metric] = candidates
+
+        for silence in candidates:
+            if silence.active(now):
+                return silence
+        return None
+
+    def add(self, metric: str, duration: Any, comment: str = '',
+            start: Optional[Any] = None) -> Silence:
+        """
+        添加运行时静默
+
+        Args:
+            metric: 指标名称或通配符模式
+            duration: 持续时长
+            comment: 备注
+            start: 开始时间，默认立即生效
+
+        Returns:
+            新增的静默规则
+        """
+        self._load_runtime()
+        start_time = parse_time(start) if start is not None else time.time()
+        silence = Silence(metric=metric, start=start_time, end=start_time + parse_duration(duration),
+                          comment=comment, runtime=True)
+        self._runtime.append(silence)
+        self._save_runtime()
+        logger_manager.info(f"已添加静默: {silence.describe()}")
+        return silence
+
+    def remove(self, silence_id: str) -> bool:
+        """
+        删除运行时静默
+
+        Args:
+            silence_id: 静默ID
+
+        Returns:
+            是否删除成功
+        """
+        self._load_runtime()
+        remaining = [silence for silence in self._runtime if silence.id != silence_id]
+        if len(remaining) == len(self._runtime):
+            return False
+        self._runtime = remaining
+        self._save_runtime()
+        logger_manager.info(f"已删除静默: {silence_id}")
+        return True
+
+    def list_silences(self) -> List[Silence]:
+        """获取全部未过期的静默"""
+        self._load_runtime()
+        now = time.time()
+        return [silence for silence in self._static + self._runtime if not silence.expired(now)]
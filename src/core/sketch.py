@@ -0,0 +1,348 @@
+"""
+流式分位数草图
+为每个指标维护一个 DDSketch：按对数间隔分桶计数，任意分位数的相对误差不超过 relative_accuracy，
+桶数有上限因此内存固定；草图可序列化为 JSON 兼容的字典，并可在汇聚端按桶相加合并
+"""
+
+import math
+from fnmatch import fnmatchcase
+from typing import Any, Dict, Iterable, List, Optional
+
+from .monitor import MonitorData
+
+
+# 绝对值小于该值的样本计入零桶
+MIN_INDEXABLE = 1e-9
+
+
+class DDSketch:
+    """相对误差有保证、可合并的分位数草图"""
+
+    __slots__ = ('relative_accuracy', 'max_buckets', '_gamma_log', 'positive', 'negative',
+                 'zero', 'count', 'sum', 'min', 'max')
+
+    def __init__(self, relative_accuracy: float = 0.01, max_buckets: int = 2048):
+        """
+        初始化草图
+
+        Args:
+            relative_accuracy: 分位数的相对误差上限 (0, 1)
+            max_buckets: 正、负值各自最多保留的桶数，超过时合并最小的桶
+
+        Raises:
+            ValueError: 参数超出范围
+        """
+        if not 0 < relative_accuracy < 1:
+            raise ValueError(f"relative_accuracy 必须在 (0, 1) 之间: {relative_accuracy}")
+        if max_buckets < 1:
+            raise ValueError(f"max_buckets 必须大于0: {max_buckets}")
+
+        self.relative_accuracy = float(relative_accuracy)
+        self.max_buckets = int(max_buckets)
+        gamma = (1 + self.relative_accuracy) / (1 - self.relative_accuracy)
+        self._gamma_log = math.log(gamma)
+
+        # 桶计数 {桶序号: 样本数}，负值按绝对值分桶
+        self.positive: Dict[int, int] = {}
+        self.negative: Dict[int, int] = {}
+        self.zero = 0
+
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def _index(self, magnitude: float) -> int:
+        """样本绝对值对应的桶序号"""
+        return int(math.ceil(math.log(magnitude) / self._gamma_log))
+
+    def _value(self, index: int) -> float:
+        """桶的代表值（桶上下界的调和中点，保证相对误差）"""
+        return 2 * math.exp(index * self._gamma_log) / (1 + math.exp(self._gamma_log))
+
+    def _collapse(self, store: Dict[int, int]) -> None:
+        """桶数超过上限时，把最小的若干桶合并到保留的最小桶中"""
+        if len(store) <= self.max_buckets:
+            return
+        indexes = sorted(store)
+        excess = len(indexes) - self.max_buckets
+        target = indexes[excess]
+        store[target] += sum(store.pop(index) for index in indexes[:excess])
+
+    def add(self, value: float, count: int = 1) -> None:
+        """
+        加入样本
+
+        Args:
+            value: 样本值
+            count: 样本重复次数
+        """
+        if value != value:  # NaN
+            return
+
+        if value > MIN_INDEXABLE:
+            store = self.positive
+            index = self._index(value)
+        elif value < -MIN_INDEXABLE:
+            store = self.negative
+            index = self._index(-value)
+        else:
+            store = None
+            self.zero += count
+
+        if store is not None:
+            if index in store:
+                store[index] += count
+            else:
+                store[index] = count
+                self._collapse(store)
+
+        self.count += count
+        self.sum += value * count
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        估算分位数
+
+        Args:
+            q: 分位 [0, 1]，如 0.99
+
+        Returns:
+            分位数估计值，没有样本时返回None
+        """
+        if self.count == 0:
+            return None
+        if q <= 0:
+            return self.min
+        if q >= 1:
+            return self.max
+
+        rank = q * (self.count - 1)
+        seen = 0
+        value = self.max
+
+        # 由小到大：负值（绝对值从大到小）、零、正值
+        for index in sorted(self.negative, reverse=True):
+            seen += self.negative[index]
+            if seen > rank:
+                value = -self._value(index)
+                break
+        else:
+            seen += self.zero
+            if seen > rank:
+                value = 0.0
+            else:
+                for index in sorted(self.positive):
+                    seen += self.positive[index]
+                    if seen > rank:
+                        value = self._value(index)
+                        break
+
+        return min(max(value, self.min), self.max)
+
+    def quantiles(self, qs: Iterable[float]) -> List[Optional[float]]:
+        """
+        一次估算多个分位数
+
+        Args:
+            qs: 分位列表
+
+        Returns:
+            与 qs 对应的估计值列表
+        """
+        return [self.quantile(q) for q in qs]
+
+    @property
+    def avg(self) -> Optional[float]:
+        """平均值（精确）"""
+        return self.sum / self.count if self.count else None
+
+    def merge(self, other: 'DDSketch') -> None:
+        """
+        合并另一个草图（如其他主机或其他时间段的同一指标）
+
+        Args:
+            other: 相对误差相同的草图
+
+        Raises:
+            ValueError: 两个草图的相对误差不同
+        """
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError(f"相对误差不同的草图无法合并: "
+                             f"{self.relative_accuracy} != {other.relative_accuracy}")
+        if other.count == 0:
+            return
+
+        for store, other_store in ((self.positive, other.positive), (self.negative, other.negative)):
+            for index, count in other_store.items():
+                store[index] = store.get(index, 0) + count
+            self._collapse(store)
+
+        self.zero += other.zero
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        序列化为 JSON 兼容的字典
+
+        Returns:
+            草图字典，可用 from_dict 还原
+        """
+        return {
+            'relative_accuracy': self.relative_accuracy,
+            'max_buckets': self.max_buckets,
+            'count': self.count,
+            'sum': self.sum,
+            'min': self.min if self.count else None,
+            'max': self.max if self.count else None,
+            'zero': self.zero,
+            'positive': sorted(self.positive.items()),
+            'negative': sorted(self.negative.items()),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'DDSketch':
+        """
+        从字典还原草图
+
+        Args:
+            data: to_dict 的结果
+
+        Returns:
+            草图
+
+        Raises:
+            ValueError: 数据格式错误
+        """
+        try:
+            sketch = cls(data['relative_accuracy'], data.get('max_buckets', 2048))
+            sketch.positive = {int(index): int(count) for index, count in data.get('positive', ())}
+            sketch.negative = {int(index): int(count) for index, count in data.get('negative', ())}
+            sketch.zero = int(data.get('zero', 0))
+            sketch.count = int(data['count'])
+            sketch.sum = float(data.get('sum', 0.0))
+            if sketch.count:
+                sketch.min = float(data['min'])
+                sketch.max = float(data['max'])
+        except (KeyError, TypeError) as e:
+            raise ValueError(f"草图数据格式错误: {e}")
+        return sketch
+
+
+class QuantileTracker:
+    """按指标维护分位数草图"""
+
+    def __init__(self, sketch_config: Dict[str, Any]):
+        """
+        初始化分位数跟踪器
+
+        Args:
+            sketch_config: alert.sketch 配置
+        """
+        sketch_config = sketch_config or {}
+        self.enabled = sketch_config.get('enabled', False)
+        self.metrics = list(sketch_config.get('metrics', ['*']) or [])
+        self.relative_accuracy = float(sketch_config.get('relative_accuracy', 0.01))
+        self.max_buckets = int(sketch_config.get('max_buckets', 2048))
+
+        # 各指标的草图 {metric_name: DDSketch}
+        self._sketches: Dict[str, DDSketch] = {}
+
+        # 指标名是否需要跟踪的缓存
+        self._match_cache: Dict[str, bool] = {}
+
+    def _tracked(self, metric: str) -> bool:
+        """指标是否匹配 metrics 中的某个通配符"""
+        if metric not in self._match_cache:
+            self._match_cache[metric] = any(fnmatchcase(metric, pattern) for pattern in self.metrics)
+        return self._match_cache[metric]
+
+    def update(self, all_metrics: List[MonitorData]) -> None:
+        """
+        用本次采集的样本更新草图
+
+        Args:
+            all_metrics: 监控数据列表
+        """
+        if not self.enabled:
+            return
+
+        for metric_data in all_metrics:
+            if not self._tracked(metric_data.metric):
+                continue
+            sketch = self._sketches.get(metric_data.metric)
+            if sketch is None:
+                sketch = DDSketch(self.relative_accuracy, self.max_buckets)
+                self._sketches[metric_data.metric] = sketch
+            sketch.add(float(metric_data.value))
+
+    def get_sketch(self, metric: str) -> Optional[DDSketch]:
+        """
+        获取指标的草图
+
+        Args:
+            metric: 指标名称
+
+        Returns:
+            草图，尚无样本时返回None
+        """
+        return self._sketches.get(metric)
+
+    def summary(self, qs: Iterable[float] = (0.5, 0.95, 0.99)) -> Dict[str, Dict[str, Any]]:
+        """
+        各指标的统计摘要
+
+        Args:
+            qs: 需要估算的分位
+
+        Returns:
+            {metric_name: {'count', 'min', 'avg', 'max', 'p50', 'p95', ...}}
+        """
+        qs = list(qs)
+        result = {}
+        for metric, sketch in self._sketches.items():
+            item = {'count': sketch.count, 'min': sketch.min, 'avg': sketch.avg, 'max': sketch.max}
+            for q, value in zip(qs, sketch.quantiles(qs)):
+                item[f'p{q * 100:g}'] = value
+            result[metric] = item
+        return result
+
+    def export(self, reset: bool = False) -> Dict[str, Dict[str, Any]]:
+        """
+        序列化全部草图（供汇聚端合并或按天保存）
+
+        Args:
+            reset: 导出后是否清空，用于按时间段（如每天）统计
+
+        Returns:
+            {metric_name: 草图字典}
+        """
+        exported = {metric: sketch.to_dict() for metric, sketch in self._sketches.items()}
+        if reset:
+            self._sketches = {}
+        return exported
+
+    def merge(self, exported: Dict[str, Dict[str, Any]]) -> None:
+        """
+        合并导出的草图
+
+        Args:
+            exported: export 的结果
+
+        Raises:
+            ValueError: 草图数据格式错误或相对误差不一致
+        """
+        for metric, data in exported.items():
+            other = DDSketch.from_dict(data)
+            sketch = self._sketches.get(metric)
+            if sketch is None:
+                self._sketches[metric] = other
+            else:
+                sketch.merge(other)
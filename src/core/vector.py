@@ -0,0 +1,274 @@
+"""
+列式阈值告警判断
+按序列号（如 主机 + 指标）把连续次数、持续告警状态和最近推送时间保存为 numpy 数组，
+一轮样本的超阈值判断、连续次数更新、恢复判断和去重窗口过滤都是向量运算，
+语义与 AlertEngine.evaluate 的阈值判断一致；只有需要推送的告警和恢复才回到 Python 逐个处理，
+适合汇聚端每轮判断上万个序列
+"""
+
+import bisect
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # 可选依赖，缺失时汇聚端使用逐主机的告警引擎
+    np = None
+
+
+# 显式告警状态列的取值：未指定（按 value >= threshold 判断）、正常、告警
+ALERT_UNSET = -1
+
+
+class MetricBatch:
+    """一轮待判断的样本（列式），按来源（如一台主机的一个周期）整块追加，同一来源在一轮中最多出现一次"""
+
+    def __init__(self):
+        """初始化空批次"""
+        self._ids: List['np.ndarray'] = []
+        self._values: List['np.ndarray'] = []
+        self._thresholds: List['np.ndarray'] = []
+        self._alerts: List[Optional['np.ndarray']] = []
+
+        # 每块的附加信息，仅在需要推送时使用（如主机、原始样本、时间戳）
+        self.contexts: List[Any] = []
+
+        # 各块在批次中的起始下标
+        self._offsets = [0]
+        self._groups = set()
+        self._columns: Optional[Tuple['np.ndarray', ...]] = None
+
+    def __len__(self) -> int:
+        return self._offsets[-1]
+
+    def add(self, group: Hashable, ids: Sequence[int], values: Sequence[float], thresholds: Sequence[float],
+            alerts: Optional[Sequence[Optional[bool]]] = None, context: Any = None) -> bool:
+        """
+        追加一块样本
+
+        Args:
+            group: 来源标识，同一来源在本批次中已有样本时不追加
+            ids: 序列号
+            values: 当前值
+            thresholds: 阈值
+            alerts: 显式指定的告警状态（元素为None时按 value >= threshold 判断），为None表示都未指定
+            context: 本块的附加信息
+
+        Returns:
+            是否追加成功；返回False时调用方应先判断本批次再开始新批次
+
+        Raises:
+            ValueError, TypeError: 数值无法转换为浮点数
+        """
+        if group in self._groups:
+            return False
+
+        values = np.asarray(values, dtype=np.float64)
+        thresholds = np.asarray(thresholds, dtype=np.float64)
+        if alerts is not None:
+            alerts = np.array([ALERT_UNSET if alert is None else int(bool(alert)) for alert in alerts],
+                              dtype=np.int8)
+        if not len(ids) == len(values) == len(thresholds):
+            raise ValueError("序列号、当前值、阈值的个数不一致")
+
+        self._groups.add(group)
+        self._ids.append(np.asarray(ids, dtype=np.intp))
+        self._values.append(values)
+        self._thresholds.append(thresholds)
+        self._alerts.append(alerts)
+        self.contexts.append(context)
+        self._offsets.append(self._offsets[-1] + len(values))
+        self._columns = None
+        return True
+
+    def columns(self) -> Tuple['np.ndarray', 'np.ndarray', 'np.ndarray', 'np.ndarray']:
+        """
+        拼接为完整的列
+
+        Returns:
+            (序列号, 当前值, 阈值, 显式告警状态)
+        """
+        if self._columns is None:
+            # 显式告警状态只在少数块中出现，其余位置为 ALERT_UNSET
+            alerts = np.full(len(self), ALERT_UNSET, dtype=np.int8)
+            for offset, chunk in zip(self._offsets, self._alerts):
+                if chunk is not None:
+                    alerts[offset:offset + len(chunk)] = chunk
+            self._columns = (
+                np.concatenate(self._ids) if self._ids else np.zeros(0, dtype=np.intp),
+                np.concatenate(self._values) if self._values else np.zeros(0),
+                np.concatenate(self._thresholds) if self._thresholds else np.zeros(0),
+                alerts,
+            )
+        return self._columns
+
+    def locate(self, position: int) -> Tuple[Any, int]:
+        """
+        查找批次下标所在的块
+
+        Args:
+            position: 批次中的下标
+
+        Returns:
+            (该块的附加信息, 在块内的下标)
+        """
+        chunk = bisect.bisect_right(self._offsets, position) - 1
+        return self.contexts[chunk], position - self._offsets[chunk]
+
+
+class VectorEvaluator:
+    """按序列号保存告警状态的列式判断器"""
+
+    def __init__(self, consecutive_checks: int = 1, dedup_window: float = 600, capacity: int = 1024):
+        """
+        初始化判断器
+
+        Args:
+            consecutive_checks: 连续N次超阈值才告警
+            dedup_window: 告警去重时间窗口（秒）
+            capacity: 初始序列容量，不足时按倍数扩容
+
+        Raises:
+            ImportError: 未安装 numpy
+        """
+        if np is None:
+            raise ImportError("列式告警判断需要安装 numpy")
+
+        self.consecutive_checks = consecutive_checks
+        self.dedup_window = dedup_window
+
+        # 序列键与序列号的映射
+        self._ids: Dict[Hashable, int] = {}
+        self._keys: List[Hashable] = []
+
+        # 各序列状态：连续超阈值次数、是否处于持续告警、最近一次推送时间（NaN 表示没有）
+        self._counts = np.zeros(capacity, dtype=np.int64)
+        self._persistent = np.zeros(capacity, dtype=bool)
+        self._sent_at = np.full(capacity, np.nan)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def series_id(self, key: Hashable) -> int:
+        """
+        获取序列号，新序列自动分配
+
+        Args:
+            key: 序列键，如 (hostname, metric)
+
+        Returns:
+            序列号
+        """
+        series_id = self._ids.get(key)
+        if series_id is None:
+            series_id = len(self._keys)
+            self._ids[key] = series_id
+            self._keys.append(key)
+            if series_id >= len(self._counts):
+                self._grow(series_id + 1)
+        return series_id
+
+    def series_ids(self, keys: Sequence[Hashable]) -> 'np.ndarray':
+        """
+        批量获取序列号
+
+        Args:
+            keys: 序列键列表
+
+        Returns:
+            序列号数组
+        """
+        return np.array([self.series_id(key) for key in keys], dtype=np.intp)
+
+    def key(self, series_id: int) -> Hashable:
+        """序列号对应的序列键"""
+        return self._keys[series_id]
+
+    def _grow(self, size: int) -> None:
+        """扩容状态数组"""
+        capacity = max(size, len(self._counts) * 2)
+        extra = capacity - len(self._counts)
+        self._counts = np.concatenate([self._counts, np.zeros(extra, dtype=np.int64)])
+        self._persistent = np.concatenate([self._persistent, np.zeros(extra, dtype=bool)])
+        self._sent_at = np.concatenate([self._sent_at, np.full(extra, np.nan)])
+
+    def evaluate(self, batch: MetricBatch, now: float) -> Tuple['np.ndarray', 'np.ndarray']:
+        """
+        判断一轮样本，更新连续次数和持续告警状态
+
+        与 AlertEngine.evaluate 一致：超阈值时连续次数加一，否则清零；
+        处于持续告警的序列恢复正常时产生恢复并清除推送记录；连续次数达到阈值且不在去重窗口内的序列需要推送。
+        只更新状态，不发送任何通知，推送成功后由调用方调用 record_delivery。
+
+        Args:
+            batch: 本轮样本（每个序列最多一个）
+            now: 当前时间戳
+
+        Returns:
+            (需要推送告警的样本下标, 需要发送恢复通知的样本下标)，下标对应 batch 中的位置
+        """
+        if not len(batch):
+            empty = np.zeros(0, dtype=np.intp)
+            return empty, empty
+
+        ids, values, thresholds, alerts = batch.columns()
+
+        # 显式告警状态优先，其余按 value >= threshold 判断
+        breach = np.where(alerts == ALERT_UNSET, values >= thresholds, alerts == 1)
+
+        counts = np.where(breach, self._counts[ids] + 1, 0)
+        self._counts[ids] = counts
+
+        # 持续告警的序列恢复正常：清除状态，下次超阈值可立即告警
+        recovered = ~breach & self._persistent[ids]
+        recovered_ids = ids[recovered]
+        self._persistent[recovered_ids] = False
+        self._sent_at[recovered_ids] = np.nan
+
+        # 达到连续次数、且不在去重窗口内（NaN 比较结果为 False，即从未推送）
+        due = (counts >= self.consecutive_checks) & ~(now - self._sent_at[ids] < self.dedup_window)
+
+        return np.flatnonzero(due), np.flatnonzero(recovered)
+
+    def record_delivery(self, series_id: int, now: float) -> None:
+        """
+        记录告警推送成功
+
+        Args:
+            series_id: 序列号
+            now: 推送时间戳
+        """
+        self._sent_at[series_id] = now
+        self._persistent[series_id] = True
+
+    def cleanup(self, now: float) -> int:
+        """
+        清理过期的推送记录（保留2倍去重时间，与 AlertEngine.cleanup_old_alerts 一致）
+
+        Args:
+            now: 当前时间戳
+
+        Returns:
+            清理的记录数
+        """
+        size = len(self._keys)
+        expired = now - self._sent_at[:size] > self.dedup_window * 2
+        self._sent_at[:size][expired] = np.nan
+        return int(expired.sum())
+
+    def get_status(self) -> Dict[str, Any]:
+        """
+        获取状态统计
+
+        Returns:
+            状态字典
+        """
+        size = len(self._keys)
+        return {
+            'series': size,
+            'breaching': int(np.count_nonzero(self._counts[:size])),
+            'persistent_alerts': int(np.count_nonzero(self._persistent[:size])),
+        }
+
+    def persistent_keys(self) -> List[Hashable]:
+        """处于持续告警的序列键"""
+        return [self._keys[series_id] for series_id in np.flatnonzero(self._persistent[:len(self._keys)])]
@@ -0,0 +1,4 @@
+"""
+集群模式模块
+各服务器上的 agent 把采集结果批量压缩后推送到中心汇聚端，由汇聚端统一做告警判断和钉钉推送
+"""
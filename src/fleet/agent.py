@@ -0,0 +1,322 @@
+"""
+集群 agent
+每个监控周期的采集结果压缩为紧凑的周期数据，凑满 batch_cycles 个周期后由后台线程编码为帧，
+通过 HTTP 或 UDP 推送到汇聚端；发送失败的帧保留在有界队列中按间隔重试，队列满时丢弃最旧的帧
+"""
+
+import uuid
+import socket
+import threading
+import urllib.parse
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import requests
+
+from .protocol import pack_cycle, split_payloads, encode_frame
+from ..core.monitor import MonitorData
+from ..services.config import config_manager, ConfigSnapshot
+from ..services.logger import logger_manager
+from ..services.dingtalk import dingtalk_notifier
+
+
+# 集群运行模式
+FLEET_MODES = ('standalone', 'agent', 'aggregator')
+
+# 汇聚端默认端口（HTTP 和 UDP 相同）
+DEFAULT_PORT = 9470
+
+# HTTP 推送的默认路径
+INGEST_PATH = '/ingest'
+
+
+def parse_aggregator_url(url: str) -> Tuple[str, Any]:
+    """
+    解析汇聚端地址
+
+    Args:
+        url: http://host:port/ingest 或 udp://host:port
+
+    Returns:
+        ('http', 完整URL) 或 ('udp', (host, port))
+
+    Raises:
+        ValueError: 地址格式不支持
+    """
+    parts = urllib.parse.urlsplit(url)
+    if parts.scheme == 'udp':
+        if not parts.hostname:
+            raise ValueError(f"汇聚端地址缺少主机名: {url}")
+        return 'udp', (parts.hostname, parts.port or DEFAULT_PORT)
+    if parts.scheme in ('http', 'https'):
+        if not parts.hostname:
+            raise ValueError(f"汇聚端地址缺少主机名: {url}")
+        if parts.path in ('', '/'):
+            url = urllib.parse.urlunsplit(parts._replace(path=INGEST_PATH))
+        return 'http', url
+    raise ValueError(f"不支持的汇聚端地址（需要 http://、https:// 或 udp://）: {url}")
+
+
+class FleetAgent:
+    """集群 agent，把采集结果推送到汇聚端"""
+
+    def __init__(self):
+        """初始化 agent"""
+        self.hostname = socket.gethostname()
+
+        # 进程启动标识，汇聚端据此区分 agent 重启后重新计数的帧序号
+        self.boot_id = uuid.uuid4().hex[:8]
+
+        # 服务器IP（发送线程首次发送前解析，外网IP查询可能较慢）
+        self.server_ip: Optional[str] = None
+
+        # 尚未凑满一批的周期，以及等待发送线程编码的批次
+        self._cycles: List[List[Any]] = []
+        self._batches: Deque[List[List[Any]]] = deque()
+        self._condition = threading.Condition()
+
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self._started = False
+        self._socket: Optional[socket.socket] = None
+        self._seq = 0
+
+        # 发送统计
+        self.sent_frames = 0
+        self.sent_bytes = 0
+        self.failures = 0
+        self.dropped = 0
+        self.last_error: Optional[str] = None
+
+        self._load_settings(config_manager.get('fleet', {}))
+
+        # 配置文件变化时更新汇聚端地址、批量大小等
+        config_manager.subscribe(self.apply_config)
+
+    def _load_settings(self, fleet_config: Dict[str, Any]) -> None:
+        """
+        读取集群配置
+
+        Args:
+            fleet_config: fleet 配置
+        """
+        self.fleet_config = fleet_config
+        self.mode = fleet_config.get('mode', 'standalone')
+        if self.mode not in FLEET_MODES:
+            logger_manager.warning(f"未知的集群模式 {self.mode}，按 standalone 处理")
+            self.mode = 'standalone'
+
+        self.token = fleet_config.get('token', '') or ''
+        self.local_alerts = bool(fleet_config.get('local_alerts', False))
+        self.batch_cycles = max(1, int(fleet_config.get('batch_cycles', 1)))
+        self.max_pending = max(1, int(fleet_config.get('max_pending', 1000)))
+        self.retry_interval = float(fleet_config.get('retry_interval', 10))
+        self.timeout = float(fleet_config.get('timeout', 5))
+        self.use_msgpack = fleet_config.get('format', 'json') == 'msgpack'
+
+        self.transport: Optional[str] = None
+        self.target: Any = None
+        self.enabled = False
+        if self.mode == 'agent':
+            try:
+                self.transport, self.target = parse_aggregator_url(fleet_config.get('aggregator', ''))
+                self.enabled = True
+            except ValueError as e:
+                logger_manager.error(f"集群 agent 未启用: {str(e)}")
+
+    def apply_config(self, snapshot: ConfigSnapshot) -> None:
+        """
+        应用新的集群配置，按需启动或停止发送线程
+
+        Args:
+            snapshot: 新的配置快照
+        """
+        fleet_config = snapshot.get('fleet', {})
+        if fleet_config == self.fleet_config:
+            return
+
+        self._load_settings(fleet_config)
+        if self.running and not self.enabled:
+            self.stop()
+        elif self.enabled and self._started and not self.running:
+            self.start()
+
+    @property
+    def running(self) -> bool:
+        """发送线程是否在运行"""
+        return self._thread is not None
+
+    @property
+    def alerts_locally(self) -> bool:
+        """本机是否仍自行告警（agent 模式下默认交给汇聚端）"""
+        return not self.enabled or self.local_alerts
+
+    def start(self) -> bool:
+        """
+        启动发送线程
+
+        Returns:
+            是否启动（未启用时返回False）
+        """
+        self._started = True
+        if not self.enabled or self.running:
+            return self.running
+
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name='fleet-agent', daemon=True)
+        self._thread.start()
+        logger_manager.info(f"集群 agent 已启动 - 汇聚端: {self.fleet_config.get('aggregator')}, "
+                            f"每 {self.batch_cycles} 个周期推送一次")
+        return True
+
+    def stop(self) -> None:
+        """停止发送线程，停止前尽力发送队列中剩余的数据"""
+        thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        with self._condition:
+            if self._cycles:
+                self._batches.append(self._cycles)
+                self._cycles = []
+            self._running = False
+            self._condition.notify_all()
+        thread.join(timeout=self.timeout * 2 + 1)
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+        logger_manager.info("集群 agent 已停止")
+
+    def push(self, all_metrics: List[MonitorData]) -> None:
+        """
+        加入一个监控周期的采集结果（未启用时直接返回）
+
+        Args:
+            all_metrics: 本批次的监控数据
+        """
+        if not self.enabled or not all_metrics:
+            return
+
+        cycle = pack_cycle(all_metrics)
+        with self._condition:
+            self._cycles.append(cycle)
+            if len(self._cycles) < self.batch_cycles:
+                return
+            self._batches.append(self._cycles)
+            self._cycles = []
+            while len(self._batches) > self.max_pending:
+                self._batches.popleft()
+                self.dropped += 1
+            self._condition.notify()
+
+    def _encode(self, cycles: List[List[Any]]) -> List[bytes]:
+        """
+        把一批周期编码为帧，并分配帧序号
+
+        Args:
+            cycles: 周期数据列表
+
+        Returns:
+            帧列表
+        """
+        header = {'h': self.hostname, 'ip': self.server_ip, 'b': self.boot_id}
+        frames = []
+        for payload in split_payloads(header, cycles, self.token, self.use_msgpack):
+            self._seq += 1
+            payload['q'] = self._seq
+            frames.append(encode_frame(payload, self.token, self.use_msgpack))
+        return frames
+
+    def _send(self, frame: bytes) -> None:
+        """
+        发送一帧
+
+        Args:
+            frame: 帧字节串
+
+        Raises:
+            OSError, requests.RequestException: 发送失败
+        """
+        if self.transport == 'udp':
+            if self._socket is None:
+                self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self._socket.sendto(frame, self.target)
+            return
+
+        response = requests.post(self.target, data=frame, timeout=self.timeout,
+                                 headers={'Content-Type': 'application/octet-stream'})
+        response.raise_for_status()
+
+    def _resolve_ip(self) -> str:
+        """解析本机IP（与钉钉消息中的IP模式一致）"""
+        try:
+            return dingtalk_notifier._get_server_ip()
+        except Exception as e:
+            logger_manager.warning(f"获取服务器IP失败: {str(e)}")
+            return ''
+
+    def _run(self) -> None:
+        """发送线程：编码新批次，按顺序发送，失败时等待 retry_interval 后重试"""
+        outbox: Deque[bytes] = deque()
+
+        while True:
+            with self._condition:
+                while self._running and not self._batches and not outbox:
+                    self._condition.wait()
+                batches = list(self._batches)
+                self._batches.clear()
+                running = self._running
+
+            if self.server_ip is None:
+                self.server_ip = self._resolve_ip()
+
+            for cycles in batches:
+                outbox.extend(self._encode(cycles))
+            while len(outbox) > self.max_pending:
+                outbox.popleft()
+                self.dropped += 1
+
+            while outbox:
+                try:
+                    self._send(outbox[0])
+                except (OSError, requests.RequestException) as e:
+                    self.failures += 1
+                    self.last_error = str(e)
+                    logger_manager.warning(f"推送到汇聚端失败，{len(outbox)} 帧待重试: {str(e)}")
+                    break
+                frame = outbox.popleft()
+                self.sent_frames += 1
+                self.sent_bytes += len(frame)
+
+            if not running:
+                self.dropped += len(outbox)
+                return
+
+            if outbox:
+                with self._condition:
+                    if self._running:
+                        self._condition.wait(self.retry_interval)
+
+    def get_status(self) -> Dict[str, Any]:
+        """
+        获取发送统计
+
+        Returns:
+            状态字典
+        """
+        with self._condition:
+            pending = sum(len(cycles) for cycles in self._batches) + len(self._cycles)
+        return {
+            'mode': self.mode,
+            'aggregator': self.fleet_config.get('aggregator'),
+            'running': self.running,
+            'pending_cycles': pending,
+            'sent_frames': self.sent_frames,
+            'sent_bytes': self.sent_bytes,
+            'failures': self.failures,
+            'dropped': self.dropped,
+            'last_error': self.last_error,
+        }
+
+
+# 全局集群 agent 实例
+fleet_agent = FleetAgent()
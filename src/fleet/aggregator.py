@@ -0,0 +1,699 @@
+"""
+集群汇聚端
+通过 HTTP（POST /ingest）和 UDP 接收各 agent 推送的指标帧，接收线程只做解码和签名校验后放入有界队列，
+由单个工作线程按主机维护告警状态并统一推送钉钉消息；
+告警判断可以是每台主机一个告警引擎（engine，支持组合规则、异常检测等），
+也可以是全部主机共用的列式阈值判断（vector，每轮把队列中的帧合并为一批做向量运算）；
+超过 host_timeout 没有上报的主机产生 agent_offline 告警，恢复上报后发送恢复通知；
+两种方式的告警和恢复通知都经过告警风暴合并（fleet.grouping），多台主机同时告警时合并为一条消息
+"""
+
+import time
+import queue
+import socket
+import functools
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler
+from typing import Any, Dict, List, Optional, Tuple
+
+from .protocol import decode_frame, pack_cycle, unpack_cycle, FrameError, MAX_PAYLOAD_SIZE
+from .agent import DEFAULT_PORT, INGEST_PATH
+from .grouping import AlertGrouper
+from ..core.monitor import MonitorData
+from ..core.alert import AlertEngine
+from ..core.silence import SilenceManager
+from ..core.vector import VectorEvaluator, MetricBatch
+from ..services.config import config_manager, ConfigSnapshot
+from ..services.logger import logger_manager
+from ..utils.httpserver import ThreadingHTTPServer
+
+
+# 主机离线告警的指标名
+OFFLINE_METRIC = 'agent_offline'
+
+# UDP 数据报的最大字节数
+MAX_DATAGRAM_SIZE = 65535
+
+# 告警判断方式
+EVALUATORS = ('engine', 'vector')
+
+# 工作线程每轮最多合并处理的帧数
+MAX_BATCH_FRAMES = 4096
+
+# 清理过期推送记录的间隔（秒）
+CLEANUP_INTERVAL = 3600
+
+
+class HostState:
+    """单台主机的上报状态（engine 模式下还有该主机的告警引擎）"""
+
+    __slots__ = ('hostname', 'engine', 'server_ip', 'boot_id', 'last_seq', 'last_seen',
+                 'frames', 'samples', 'offline', 'series_names', 'series_ids')
+
+    def __init__(self, hostname: str, now: float, engine: Optional[AlertEngine] = None):
+        """
+        初始化主机状态
+
+        Args:
+            hostname: 主机名
+            now: 首次上报时间
+            engine: 该主机的告警引擎，vector 模式下为None
+        """
+        self.hostname = hostname
+        self.engine = engine
+        self.server_ip: Optional[str] = None
+        self.boot_id: Optional[str] = None
+        self.last_seq = 0
+        self.last_seen = now
+        self.frames = 0
+        self.samples = 0
+        self.offline = False
+
+        # vector 模式下缓存的指标名和对应序列号（各周期的指标列表通常相同）
+        self.series_names: Tuple[str, ...] = ()
+        self.series_ids: Any = None
+
+    def heartbeat(self, now: float, timeout: float, offline: bool) -> MonitorData:
+        """
+        生成主机离线（或恢复在线）的监控数据
+
+        Args:
+            now: 当前时间戳
+            timeout: 离线判定时长（秒）
+            offline: 是否离线
+
+        Returns:
+            agent_offline 监控数据
+        """
+        return MonitorData(
+            metric=OFFLINE_METRIC,
+            value=round(now - self.last_seen, 1) if offline else 0.0,
+            threshold=timeout,
+            unit='秒',
+            timestamp=datetime.fromtimestamp(now),
+            hostname=self.hostname,
+            alert=offline,
+            detail=f"超过 {timeout:g} 秒未收到该主机的上报" if offline else '',
+            server_ip=self.server_ip
+        )
+
+
+class FleetAggregator:
+    """集群汇聚端"""
+
+    def __init__(self):
+        """初始化汇聚端"""
+        # 各主机状态 {hostname: HostState}，仅由工作线程修改
+        self._hosts: Dict[str, HostState] = {}
+
+        self._http: Optional[ThreadingHTTPServer] = None
+        self._udp: Optional[socket.socket] = None
+        self._threads: List[threading.Thread] = []
+        self._running = False
+
+        # 接收统计
+        self.frames = 0
+        self.bytes = 0
+        self.samples = 0
+        self.rejected = 0
+        self.dropped = 0
+        self.duplicates = 0
+
+        # 告警和恢复通知的推送（按指标合并多台主机的告警）
+        self.grouper = AlertGrouper()
+
+        self._load_settings(config_manager.get('fleet', {}))
+
+        # 接收线程解码后的负载，由工作线程按顺序处理
+        self._queue: queue.Queue = queue.Queue(maxsize=self.queue_size)
+
+        # vector 模式的列式判断器和静默（engine 模式下由各主机的告警引擎负责）
+        self.evaluator: Optional[VectorEvaluator] = None
+        self.silence_manager: Optional[SilenceManager] = None
+        self._alert_config: Dict[str, Any] = {}
+        self._configure_evaluator(config_manager.get_alert_config())
+
+        # 配置文件变化时按需重启监听
+        config_manager.subscribe(self.apply_config)
+
+    def _load_settings(self, fleet_config: Dict[str, Any]) -> None:
+        """
+        读取集群配置
+
+        Args:
+            fleet_config: fleet 配置
+        """
+        self.fleet_config = fleet_config
+        self.enabled = fleet_config.get('mode', 'standalone') == 'aggregator'
+        self.token = fleet_config.get('token', '') or ''
+        self.listen_host = fleet_config.get('listen_host', '0.0.0.0')
+        self.http_port = int(fleet_config.get('http_port', DEFAULT_PORT))
+        self.udp_port = int(fleet_config.get('udp_port', DEFAULT_PORT))
+        self.queue_size = int(fleet_config.get('queue_size', 10000))
+        self.host_timeout = float(fleet_config.get('host_timeout', 300))
+        self.evaluator_mode = fleet_config.get('evaluator', 'engine')
+        if self.evaluator_mode not in EVALUATORS:
+            logger_manager.warning(f"未知的告警判断方式 {self.evaluator_mode}，使用 engine")
+            self.evaluator_mode = 'engine'
+
+        self.grouper.configure(fleet_config.get('grouping', {}))
+        if not self.grouper.enabled:
+            # 关闭合并时推送仍在等待的分组
+            self.grouper.flush(time.time(), force=True)
+
+    def _configure_evaluator(self, alert_config: Dict[str, Any]) -> None:
+        """
+        按 fleet.evaluator 创建或更新列式判断器（连续次数、去重窗口、静默取自告警配置）
+
+        Args:
+            alert_config: 告警配置
+        """
+        if self.evaluator_mode != 'vector':
+            self.evaluator = None
+            self.silence_manager = None
+            return
+
+        consecutive_checks = alert_config.get('consecutive_checks', 1)
+        dedup_window = alert_config.get('dedup_window', 600)
+        if self.evaluator is None:
+            try:
+                self.evaluator = VectorEvaluator(consecutive_checks, dedup_window)
+            except ImportError:
+                logger_manager.warning("未安装 numpy，汇聚端改用逐主机的告警引擎")
+                self.evaluator_mode = 'engine'
+                return
+        self.evaluator.consecutive_checks = consecutive_checks
+        self.evaluator.dedup_window = dedup_window
+
+        if (self.silence_manager is None
+                or alert_config.get('silences') != self._alert_config.get('silences')
+                or alert_config.get('silence_file') != self._alert_config.get('silence_file')):
+            self.silence_manager = SilenceManager(alert_config)
+        self._alert_config = alert_config
+
+    def apply_config(self, snapshot: ConfigSnapshot) -> None:
+        """
+        应用新的集群配置，监听参数变化时重启（主机状态保留），并更新列式判断器的告警参数
+
+        Args:
+            snapshot: 新的配置快照
+        """
+        fleet_config = snapshot.get('fleet', {})
+        if fleet_config == self.fleet_config:
+            self._configure_evaluator(snapshot.alert)
+            return
+
+        running = self.running
+        self.stop()
+        self._load_settings(fleet_config)
+        self._configure_evaluator(snapshot.alert)
+        if running and self.enabled:
+            self.start()
+
+    @property
+    def running(self) -> bool:
+        """是否正在接收"""
+        return self._running
+
+    def _make_handler(self):
+        """创建请求处理类（闭包引用汇聚端）"""
+        aggregator = self
+
+        class IngestHandler(BaseHTTPRequestHandler):
+            """POST /ingest 请求处理"""
+
+            def do_POST(self):
+                """接收一帧，已入队返回202，帧错误返回400，队列满返回503（agent 稍后重试）"""
+                if self.path.split('?', 1)[0] != INGEST_PATH:
+                    self.send_error(404)
+                    return
+                length = int(self.headers.get('Content-Length') or 0)
+                if length <= 0 or length > MAX_PAYLOAD_SIZE:
+                    self.send_error(413 if length > 0 else 411)
+                    return
+                result = aggregator.submit(self.rfile.read(length))
+                self.send_response({'accepted': 202, 'rejected': 400, 'dropped': 503}[result])
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                """访问日志降为 DEBUG，避免大量 agent 推送刷屏"""
+                logger_manager.debug("汇聚端请求: " + format, *args)
+
+        return IngestHandler
+
+    def start(self) -> bool:
+        """
+        启动 HTTP、UDP 监听和工作线程
+
+        Returns:
+            是否启动成功（未启用时返回False）
+        """
+        if not self.enabled or self.running:
+            return self.running
+
+        try:
+            if self.http_port:
+                self._http = ThreadingHTTPServer((self.listen_host, self.http_port), self._make_handler())
+            if self.udp_port:
+                self._udp = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+                self._udp.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
+                self._udp.bind((self.listen_host, self.udp_port))
+                self._udp.settimeout(1.0)
+        except OSError as e:
+            logger_manager.error(f"汇聚端启动失败 {self.listen_host}: {str(e)}")
+            self._close(serving=False)
+            return False
+
+        if self._queue.maxsize != self.queue_size:
+            self._queue = queue.Queue(maxsize=self.queue_size)
+        self._running = True
+        self._threads = [threading.Thread(target=self._run, name='fleet-worker', daemon=True)]
+        if self._http is not None:
+            self._threads.append(threading.Thread(target=self._http.serve_forever, daemon=True))
+        if self._udp is not None:
+            self._threads.append(threading.Thread(target=self._receive_udp, name='fleet-udp', daemon=True))
+        for thread in self._threads:
+            thread.start()
+
+        logger_manager.info(f"集群汇聚端已启动 - {self.listen_host} HTTP:{self.http_port or '关闭'} "
+                            f"UDP:{self.udp_port or '关闭'}, 离线判定: {self.host_timeout:g}秒")
+        return True
+
+    def _close(self, serving: bool = True) -> None:
+        """
+        关闭监听套接字
+
+        Args:
+            serving: HTTP 服务是否已在运行（未运行时 shutdown 会一直等待）
+        """
+        http, self._http = self._http, None
+        if http is not None:
+            if serving:
+                http.shutdown()
+            http.server_close()
+        udp, self._udp = self._udp, None
+        if udp is not None:
+            udp.close()
+
+    def stop(self) -> None:
+        """停止接收，工作线程处理完已取出的帧后退出"""
+        if not self._running:
+            return
+        self._running = False
+        self._close()
+        for thread in self._threads:
+            thread.join(timeout=5)
+        self._threads = []
+        self.grouper.flush(time.time(), force=True)
+        logger_manager.info("集群汇聚端已停止")
+
+    def submit(self, frame: bytes) -> str:
+        """
+        解码一帧并放入处理队列（在接收线程中调用）
+
+        Args:
+            frame: 帧字节串
+
+        Returns:
+            accepted（已入队）、rejected（帧错误或签名不符）或 dropped（队列已满）
+        """
+        try:
+            payload = decode_frame(frame, self.token)
+        except FrameError as e:
+            self.rejected += 1
+            logger_manager.debug("丢弃无效帧: %s", e)
+            return 'rejected'
+
+        try:
+            self._queue.put_nowait(payload)
+        except queue.Full:
+            self.dropped += 1
+            return 'dropped'
+        self.bytes += len(frame)
+        return 'accepted'
+
+    def _receive_udp(self) -> None:
+        """UDP 接收线程"""
+        while self._running:
+            udp = self._udp
+            if udp is None:
+                return
+            try:
+                frame, _ = udp.recvfrom(MAX_DATAGRAM_SIZE)
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+            self.submit(frame)
+
+    def _run(self) -> None:
+        """工作线程：每轮取出队列中已有的帧合并处理，推送到期的告警分组，并定期检查离线主机、清理过期记录"""
+        check_interval = max(1.0, min(self.host_timeout / 4, 30.0))
+        next_check = time.monotonic() + check_interval
+        next_cleanup = time.monotonic() + CLEANUP_INTERVAL
+
+        while self._running:
+            payloads = []
+            try:
+                payloads.append(self._queue.get(timeout=1.0))
+                while len(payloads) < MAX_BATCH_FRAMES:
+                    payloads.append(self._queue.get_nowait())
+            except queue.Empty:
+                pass
+
+            if payloads:
+                try:
+                    self.process_batch(payloads)
+                except Exception as e:
+                    logger_manager.error(f"处理上报失败: {str(e)}")
+
+            try:
+                self.grouper.flush(time.time())
+            except Exception as e:
+                logger_manager.error(f"推送告警分组失败: {str(e)}")
+
+            if time.monotonic() >= next_check:
+                next_check = time.monotonic() + check_interval
+                try:
+                    self.check_offline()
+                except Exception as e:
+                    logger_manager.error(f"离线主机检查失败: {str(e)}")
+
+            if time.monotonic() >= next_cleanup:
+                next_cleanup = time.monotonic() + CLEANUP_INTERVAL
+                self.cleanup()
+
+    def _admit(self, payload: Dict[str, Any], now: float) -> Optional[HostState]:
+        """
+        更新上报主机的状态
+
+        Args:
+            payload: decode_frame 的结果
+            now: 接收时间
+
+        Returns:
+            主机状态，重复帧返回None
+        """
+        hostname = str(payload['h'])
+        host = self._hosts.get(hostname)
+        if host is None:
+            host = HostState(hostname, now, AlertEngine() if self.evaluator is None else None)
+            self._hosts[hostname] = host
+            logger_manager.debug("新主机接入: %s (%s)", hostname, payload.get('ip') or '未知IP')
+        elif host.engine is None and self.evaluator is None:
+            # 运行中从 vector 切换到 engine
+            host.engine = AlertEngine()
+
+        # 同一次启动内序号不增加的帧是重试造成的重复（或 UDP 乱序），直接丢弃
+        boot_id, seq = payload.get('b'), payload.get('q', 0)
+        if boot_id == host.boot_id and isinstance(seq, int) and seq <= host.last_seq:
+            self.duplicates += 1
+            return None
+        host.boot_id = boot_id
+        host.last_seq = seq if isinstance(seq, int) else 0
+        host.server_ip = payload.get('ip') or host.server_ip
+        host.last_seen = now
+        host.frames += 1
+        self.frames += 1
+        return host
+
+    def process(self, payload: Dict[str, Any], now: Optional[float] = None) -> int:
+        """
+        处理一帧的负载
+
+        Args:
+            payload: decode_frame 的结果
+            now: 接收时间，默认取当前时间
+
+        Returns:
+            处理的样本数（重复帧返回0）
+        """
+        return self.process_batch([payload], now)
+
+    def process_batch(self, payloads: List[Dict[str, Any]], now: Optional[float] = None) -> int:
+        """
+        处理一批帧：更新主机状态，engine 模式下逐个周期交由该主机的告警引擎处理，
+        vector 模式下把全部样本合并为列式批次统一判断（同一主机再次出现时先判断已有的批次）
+
+        Args:
+            payloads: decode_frame 的结果列表
+            now: 接收时间，默认取当前时间
+
+        Returns:
+            处理的样本数
+        """
+        now = time.time() if now is None else now
+        batch = MetricBatch() if self.evaluator is not None else None
+        total = 0
+        known_hosts = len(self._hosts)
+
+        for payload in payloads:
+            host = self._admit(payload, now)
+            if host is None:
+                continue
+
+            count = 0
+            try:
+                for cycle in payload['c']:
+                    if batch is None:
+                        metrics = unpack_cycle(cycle, host.hostname, host.server_ip)
+                        if host.offline:
+                            metrics.append(self._set_online(host, now))
+                        self._evaluate_host(host, metrics, now)
+                        count += len(metrics)
+                        continue
+
+                    batch = self._add_cycle(batch, host, cycle, now)
+                    count += len(cycle[1])
+                    if host.offline:
+                        batch = self._add_cycle(batch, host, pack_cycle([self._set_online(host, now)]), now,
+                                                heartbeat=True)
+            except FrameError as e:
+                self.rejected += 1
+                logger_manager.warning(f"主机 {host.hostname} 的上报数据格式错误: {str(e)}")
+
+            host.samples += count
+            total += count
+
+        if batch is not None:
+            self._flush(batch, now)
+        self.grouper.flush(now)
+
+        # 汇聚端重启后所有主机会在几轮内重新接入，每批只记一条汇总
+        if len(self._hosts) > known_hosts:
+            logger_manager.info(f"新主机接入 {len(self._hosts) - known_hosts} 台，当前共 {len(self._hosts)} 台")
+
+        self.samples += total
+        return total
+
+    def _evaluate_host(self, host: HostState, metrics: List[MonitorData], now: float) -> None:
+        """
+        engine 模式：由该主机的告警引擎判断，需要推送的告警和恢复交给合并推送
+
+        Args:
+            host: 主机状态
+            metrics: 本周期的监控数据
+            now: 当前时间戳
+        """
+        engine = host.engine
+        alert_metrics, recovered_metrics = engine.evaluate(metrics)
+        for data in recovered_metrics:
+            self.grouper.add_recovery(data, now)
+        for data in alert_metrics:
+            # 静默和去重与 AlertEngine.process_alert 一致，推送结果回写该主机的告警引擎
+            if engine._needs_delivery(data):
+                self.grouper.add_alert(data, now, functools.partial(engine._record_delivery, data))
+
+    def _set_online(self, host: HostState, now: float) -> MonitorData:
+        """标记离线主机恢复上报，返回用于触发恢复通知的 agent_offline 数据"""
+        host.offline = False
+        logger_manager.info(f"主机恢复上报: {host.hostname}")
+        return host.heartbeat(now, self.host_timeout, offline=False)
+
+    def _add_cycle(self, batch: MetricBatch, host: HostState, cycle: List[Any], now: float,
+                   heartbeat: bool = False) -> MetricBatch:
+        """
+        把一个周期的样本整块加入列式批次，该主机已在批次中时先判断已有批次再开始新批次
+
+        Args:
+            batch: 当前批次
+            host: 主机状态
+            cycle: 紧凑的周期数据
+            now: 当前时间戳
+            heartbeat: 是否为 agent_offline 数据（不使用主机的序列号缓存）
+
+        Returns:
+            当前批次
+
+        Raises:
+            FrameError: 周期数据格式错误
+        """
+        try:
+            timestamp, samples = float(cycle[0]), cycle[1]
+            if not samples:
+                return batch
+            # 按列拆开（样本至少包含指标、当前值、阈值）
+            names, values, thresholds = list(zip(*samples))[:3]
+            alerts = None
+            if max(map(len, samples)) > 4:
+                alerts = [sample[4] if len(sample) > 4 else None for sample in samples]
+        except (TypeError, ValueError, IndexError) as e:
+            raise FrameError(f"周期数据格式错误: {e}")
+
+        if heartbeat:
+            ids = self.evaluator.series_ids([(host.hostname, name) for name in names])
+        else:
+            if names != host.series_names:
+                host.series_ids = self.evaluator.series_ids([(host.hostname, str(name)) for name in names])
+                host.series_names = names
+            ids = host.series_ids
+
+        group = (host.hostname, heartbeat)
+        context = (host, samples, timestamp)
+        try:
+            if not batch.add(group, ids, values, thresholds, alerts, context):
+                self._flush(batch, now)
+                batch = MetricBatch()
+                batch.add(group, ids, values, thresholds, alerts, context)
+        except (TypeError, ValueError) as e:
+            raise FrameError(f"周期数据格式错误: {e}")
+        return batch
+
+    def _monitor_data(self, batch: MetricBatch, position: int) -> MonitorData:
+        """把列式批次中的一个样本还原为监控数据（仅用于需要推送的告警和恢复）"""
+        (host, samples, timestamp), index = batch.locate(position)
+        sample = samples[index]
+        _, values, thresholds, alerts = batch.columns()
+        return MonitorData(
+            metric=str(sample[0]),
+            value=float(values[position]),
+            threshold=float(thresholds[position]),
+            unit=str(sample[3]) if len(sample) > 3 else '',
+            timestamp=datetime.fromtimestamp(timestamp),
+            hostname=host.hostname,
+            alert=None if alerts[position] < 0 else bool(alerts[position]),
+            detail=sample[5] if len(sample) > 5 else '',
+            server_ip=host.server_ip
+        )
+
+    def _flush(self, batch: MetricBatch, now: float) -> None:
+        """
+        判断一个列式批次，告警和恢复通知交给合并推送（与告警引擎一致：静默的告警和恢复不推送）
+
+        Args:
+            batch: 列式批次
+            now: 当前时间戳
+        """
+        due, recovered = self.evaluator.evaluate(batch, now)
+        ids = batch.columns()[0]
+
+        for position in recovered:
+            data = self._monitor_data(batch, position)
+            logger_manager.info(f"告警恢复: {data.hostname} {data.metric} 当前值: {data.value:.2f}{data.unit}")
+            if self.silence_manager.match(data.metric) is None:
+                self.grouper.add_recovery(data, now)
+
+        for position in due:
+            data = self._monitor_data(batch, position)
+            silence = self.silence_manager.match(data.metric)
+            if silence is not None:
+                logger_manager.info(f"告警已静默: {data.hostname} {data.metric} (静默 {silence.id})")
+                continue
+            self.grouper.add_alert(data, now,
+                                   functools.partial(self._record_delivery, data, int(ids[position]), now))
+
+    def _record_delivery(self, data: MonitorData, series_id: int, now: float, success: bool) -> None:
+        """vector 模式的推送结果回调：推送成功后记录去重时间和持续告警状态"""
+        if not success:
+            logger_manager.error(f"告警处理失败: {data.hostname} {data.metric}")
+        elif self.evaluator is not None:
+            self.evaluator.record_delivery(series_id, now)
+
+    def check_offline(self, now: Optional[float] = None) -> List[str]:
+        """
+        对超过 host_timeout 未上报的主机计一次 agent_offline 告警（连续次数、去重与普通指标一致）
+
+        Args:
+            now: 当前时间戳，默认取当前时间
+
+        Returns:
+            离线主机名列表
+        """
+        now = time.time() if now is None else now
+        batch = MetricBatch() if self.evaluator is not None else None
+        offline = []
+        for host in list(self._hosts.values()):
+            if now - host.last_seen <= self.host_timeout:
+                continue
+            if not host.offline:
+                logger_manager.warning(f"主机 {host.hostname} 已 {now - host.last_seen:.0f} 秒未上报")
+            host.offline = True
+            data = host.heartbeat(now, self.host_timeout, offline=True)
+            if batch is None:
+                if host.engine is None:
+                    host.engine = AlertEngine()
+                self._evaluate_host(host, [data], now)
+            else:
+                batch = self._add_cycle(batch, host, pack_cycle([data]), now, heartbeat=True)
+            offline.append(host.hostname)
+
+        if batch is not None:
+            self._flush(batch, now)
+        self.grouper.flush(now)
+        return offline
+
+    def cleanup(self, now: Optional[float] = None) -> None:
+        """
+        清理过期的告警推送记录
+
+        Args:
+            now: 当前时间戳，默认取当前时间
+        """
+        now = time.time() if now is None else now
+        if self.evaluator is not None:
+            self.evaluator.cleanup(now)
+        for host in list(self._hosts.values()):
+            if host.engine is not None:
+                host.engine.cleanup_old_alerts()
+
+    def get_host(self, hostname: str) -> Optional[HostState]:
+        """
+        获取主机状态
+
+        Args:
+            hostname: 主机名
+
+        Returns:
+            主机状态，未上报过时返回None
+        """
+        return self._hosts.get(hostname)
+
+    def get_status(self) -> Dict[str, Any]:
+        """
+        获取汇聚端状态
+
+        Returns:
+            状态字典
+        """
+        hosts = list(self._hosts.values())
+        return {
+            'running': self.running,
+            'hosts': len(hosts),
+            'offline_hosts': sorted(host.hostname for host in hosts if host.offline),
+            'frames': self.frames,
+            'bytes': self.bytes,
+            'samples': self.samples,
+            'rejected': self.rejected,
+            'dropped': self.dropped,
+            'duplicates': self.duplicates,
+            'queue': self._queue.qsize(),
+            'evaluator': (dict(self.evaluator.get_status(), mode='vector') if self.evaluator is not None
+                          else {'mode': 'engine'}),
+            'grouping': self.grouper.get_status(),
+        }
+
+
+# 全局集群汇聚端实例
+fleet_aggregator = FleetAggregator()
@@ -0,0 +1,189 @@
+"""
+告警风暴合并
+共享存储、交换机等故障会让大量主机在同一时刻对同一指标告警，逐台推送会刷屏并触发钉钉限流；
+汇聚端把 window 秒内同一指标、同一告警级别的告警（以及同一指标的恢复通知）合并为一条消息，列出受影响的主机。
+分组按 (类型, 指标, 级别) 建索引，并按开启顺序排队等待到期，每轮的开销只与本轮的告警数成正比
+"""
+
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+from ..core.monitor import MonitorData
+from ..services.logger import logger_manager
+from ..services.dingtalk import dingtalk_notifier
+
+
+# 推送结果回调，参数为是否推送成功（用于记录去重时间和持续告警状态）
+DeliveryCallback = Callable[[bool], None]
+
+
+class AlertGroup:
+    """一个等待合并推送的分组"""
+
+    __slots__ = ('key', 'deadline', 'entries')
+
+    def __init__(self, key: Tuple[str, str, str], deadline: float):
+        """
+        初始化分组
+
+        Args:
+            key: (类型 alert/recovery, 指标名, 告警级别)
+            deadline: 到期推送的时间戳
+        """
+        self.key = key
+        self.deadline = deadline
+
+        # 每台主机一条 {hostname: (监控数据, 推送结果回调)}，同一主机再次出现时更新为最新的数据
+        self.entries: Dict[str, Tuple[MonitorData, Optional[DeliveryCallback]]] = {}
+
+
+class AlertGrouper:
+    """按指标合并多台主机告警的推送器"""
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        """
+        初始化推送器
+
+        Args:
+            config: fleet.grouping 配置
+        """
+        # 分组索引 {(类型, 指标, 级别): AlertGroup}，以及按开启顺序（即到期顺序）排列的队列
+        self._groups: Dict[Tuple[str, str, str], AlertGroup] = {}
+        self._order: Deque[AlertGroup] = deque()
+
+        # 每台主机每个指标所在的分组，级别变化时仍留在原分组，避免同一告警推送两次
+        self._pending: Dict[Tuple[str, str, str], AlertGroup] = {}
+
+        # 推送统计
+        self.grouped_messages = 0
+        self.grouped_items = 0
+        self.single_messages = 0
+
+        self.configure(config or {})
+
+    def configure(self, config: Dict[str, Any]) -> None:
+        """
+        应用合并配置（已在等待的分组保持原到期时间）
+
+        Args:
+            config: fleet.grouping 配置
+        """
+        self.enabled = bool(config.get('enabled', False))
+        self.window = float(config.get('window', 30))
+        self.min_hosts = max(2, int(config.get('min_hosts', 3)))
+        self.max_listed = int(config.get('max_listed', 50))
+
+    def add_alert(self, monitor_data: MonitorData, now: float,
+                  on_result: Optional[DeliveryCallback] = None) -> None:
+        """
+        加入一条待推送的告警，未启用合并时立即推送
+
+        Args:
+            monitor_data: 监控数据
+            now: 当前时间戳
+            on_result: 推送结果回调
+        """
+        if not self.enabled:
+            self._send_single('alert', monitor_data, on_result)
+            return
+        key = ('alert', monitor_data.metric, dingtalk_notifier.get_alert_level(monitor_data))
+        self._add(key, monitor_data, now, on_result)
+
+    def add_recovery(self, monitor_data: MonitorData, now: float) -> None:
+        """
+        加入一条待推送的恢复通知，未启用合并时立即推送
+
+        Args:
+            monitor_data: 监控数据
+            now: 当前时间戳
+        """
+        if not self.enabled:
+            self._send_single('recovery', monitor_data, None)
+            return
+        self._add(('recovery', monitor_data.metric, ''), monitor_data, now, None)
+
+    def _add(self, key: Tuple[str, str, str], monitor_data: MonitorData, now: float,
+             on_result: Optional[DeliveryCallback]) -> None:
+        """把监控数据放入对应分组，分组不存在时开启新分组"""
+        pending_key = (key[0], key[1], monitor_data.hostname)
+        group = self._pending.get(pending_key)
+        if group is None:
+            group = self._groups.get(key)
+            if group is None:
+                group = AlertGroup(key, now + self.window)
+                self._groups[key] = group
+                self._order.append(group)
+            self._pending[pending_key] = group
+        group.entries[monitor_data.hostname] = (monitor_data, on_result)
+
+    def flush(self, now: float, force: bool = False) -> int:
+        """
+        推送已到期的分组：主机数达到 min_hosts 的合并为一条消息，其余逐条推送
+
+        Args:
+            now: 当前时间戳
+            force: 是否不等到期全部推送（停止或关闭合并时使用）
+
+        Returns:
+            推送的分组数
+        """
+        count = 0
+        while self._order and (force or self._order[0].deadline <= now):
+            group = self._order.popleft()
+            del self._groups[group.key]
+            kind, metric, _ = group.key
+            for hostname in group.entries:
+                del self._pending[(kind, metric, hostname)]
+            self._deliver(group)
+            count += 1
+        return count
+
+    def _deliver(self, group: AlertGroup) -> None:
+        """推送一个分组"""
+        kind = group.key[0]
+        entries = list(group.entries.values())
+        if len(entries) < self.min_hosts:
+            for monitor_data, on_result in entries:
+                self._send_single(kind, monitor_data, on_result)
+            return
+
+        items = [monitor_data for monitor_data, _ in entries]
+        if kind == 'alert':
+            success = dingtalk_notifier.send_group_alert(items, self.max_listed)
+        else:
+            success = dingtalk_notifier.send_group_recovery(items, self.max_listed)
+        logger_manager.info(f"合并推送{'告警' if kind == 'alert' else '恢复通知'}: "
+                            f"{group.key[1]} {len(items)} 台主机, {'成功' if success else '失败'}")
+        self.grouped_messages += 1
+        self.grouped_items += len(items)
+
+        for _, on_result in entries:
+            if on_result is not None:
+                on_result(success)
+
+    def _send_single(self, kind: str, monitor_data: MonitorData, on_result: Optional[DeliveryCallback]) -> None:
+        """逐条推送一条告警或恢复通知"""
+        if kind == 'alert':
+            success = dingtalk_notifier.send_alert(monitor_data)
+        else:
+            success = dingtalk_notifier.send_recovery_notification(monitor_data)
+        self.single_messages += 1
+        if on_result is not None:
+            on_result(success)
+
+    def get_status(self) -> Dict[str, Any]:
+        """
+        获取合并状态
+
+        Returns:
+            状态字典
+        """
+        return {
+            'enabled': self.enabled,
+            'window': self.window,
+            'pending_groups': len(self._order),
+            'pending_items': len(self._pending),
+            'grouped_messages': self.grouped_messages,
+            'grouped_items': self.grouped_items,
+            'single_messages': self.single_messages,
+        }
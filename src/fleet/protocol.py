@@ -0,0 +1,230 @@
+"""
+集群指标帧协议
+agent 把若干个监控周期的采集结果打包为一帧：定长帧头 + 可选 HMAC-SHA256 签名 + zlib 压缩的负载，
+负载为 JSON（或 msgpack）编码的字典，同一份字节既可作为 HTTP 请求体，也可作为一个 UDP 数据报发送
+
+帧格式:
+    magic(2字节 b'M4') | version(1) | flags(1) | [签名(32)] | zlib(负载)
+
+负载:
+    {'h': 主机名, 'ip': 服务器IP, 'b': 启动标识, 'q': 帧序号,
+     'c': [[时间戳, [[指标, 当前值, 阈值, 单位(, 告警状态, 附加说明)], ...]], ...]}
+"""
+
+import hmac
+import json
+import zlib
+import struct
+import hashlib
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from ..core.monitor import MonitorData
+
+try:
+    import msgpack
+except ImportError:  # 可选依赖，仅 fleet.format: msgpack 时使用
+    msgpack = None
+
+
+MAGIC = b'M4'
+VERSION = 1
+
+# 帧头标志位
+FLAG_MSGPACK = 0x01
+FLAG_SIGNED = 0x02
+
+HEADER = struct.Struct('<2sBB')
+DIGEST_SIZE = hashlib.sha256().digest_size
+
+# 单帧的最大字节数（UDP 数据报上限以内）
+MAX_FRAME_SIZE = 60000
+
+# 负载解压后的最大字节数，防止压缩炸弹
+MAX_PAYLOAD_SIZE = 16 * 1024 * 1024
+
+
+class FrameError(ValueError):
+    """帧格式错误或签名校验失败"""
+
+
+def _sign(token: str, body: bytes) -> bytes:
+    """计算负载的 HMAC-SHA256 签名"""
+    return hmac.new(token.encode('utf-8'), body, hashlib.sha256).digest()
+
+
+def encode_frame(payload: Dict[str, Any], token: str = '', use_msgpack: bool = False) -> bytes:
+    """
+    编码一帧
+
+    Args:
+        payload: 负载字典
+        token: 共享密钥，非空时附加签名
+        use_msgpack: 是否用 msgpack 编码负载（未安装时回退到 JSON）
+
+    Returns:
+        帧字节串
+    """
+    flags = 0
+    if use_msgpack and msgpack is not None:
+        flags |= FLAG_MSGPACK
+        raw = msgpack.packb(payload, use_bin_type=True)
+    else:
+        raw = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    body = zlib.compress(raw, 6)
+
+    if token:
+        flags |= FLAG_SIGNED
+        return HEADER.pack(MAGIC, VERSION, flags) + _sign(token, body) + body
+    return HEADER.pack(MAGIC, VERSION, flags) + body
+
+
+def decode_frame(frame: bytes, token: str = '') -> Dict[str, Any]:
+    """
+    解码并校验一帧
+
+    Args:
+        frame: 帧字节串
+        token: 共享密钥，非空时要求帧带有正确的签名
+
+    Returns:
+        负载字典
+
+    Raises:
+        FrameError: 帧格式错误、签名缺失或不匹配
+    """
+    if len(frame) < HEADER.size:
+        raise FrameError("帧长度不足")
+    magic, version, flags = HEADER.unpack_from(frame)
+    if magic != MAGIC:
+        raise FrameError("不是监控指标帧")
+    if version != VERSION:
+        raise FrameError(f"不支持的帧版本: {version}")
+
+    offset = HEADER.size
+    if flags & FLAG_SIGNED:
+        digest = frame[offset:offset + DIGEST_SIZE]
+        offset += DIGEST_SIZE
+        body = frame[offset:]
+        if token and not hmac.compare_digest(digest, _sign(token, body)):
+            raise FrameError("帧签名不匹配")
+    elif token:
+        raise FrameError("帧缺少签名")
+    else:
+        body = frame[offset:]
+
+    decompressor = zlib.decompressobj()
+    try:
+        raw = decompressor.decompress(body, MAX_PAYLOAD_SIZE)
+    except zlib.error as e:
+        raise FrameError(f"负载解压失败: {e}")
+    if decompressor.unconsumed_tail:
+        raise FrameError("负载过大")
+
+    try:
+        if flags & FLAG_MSGPACK:
+            if msgpack is None:
+                raise FrameError("未安装 msgpack，无法解码 msgpack 帧")
+            payload = msgpack.unpackb(raw, raw=False)
+        else:
+            payload = json.loads(raw.decode('utf-8'))
+    except FrameError:
+        raise
+    except Exception as e:
+        raise FrameError(f"负载解码失败: {e}")
+
+    if not isinstance(payload, dict) or not payload.get('h') or not isinstance(payload.get('c'), list):
+        raise FrameError("负载缺少主机名或采集数据")
+    return payload
+
+
+def pack_cycle(all_metrics: List[MonitorData]) -> List[Any]:
+    """
+    把一个监控周期的采集结果压缩为紧凑的列表
+
+    Args:
+        all_metrics: 监控数据列表
+
+    Returns:
+        [时间戳, [[指标, 当前值, 阈值, 单位(, 告警状态, 附加说明)], ...]]
+    """
+    timestamp = all_metrics[0].timestamp.timestamp() if all_metrics else 0.0
+    samples = []
+    for data in all_metrics:
+        sample = [data.metric, data.value, data.threshold, data.unit]
+        if data.alert is not None or data.detail:
+            sample += [data.alert, data.detail]
+        samples.append(sample)
+    return [round(timestamp, 3), samples]
+
+
+def iter_samples(cycle: List[Any]) -> Iterator[Tuple[float, str, float, float, str, Optional[bool], str]]:
+    """
+    逐个解析 pack_cycle 结果中的样本（不构造监控数据对象）
+
+    Args:
+        cycle: 紧凑的周期数据
+
+    Yields:
+        (时间戳, 指标, 当前值, 阈值, 单位, 告警状态, 附加说明)
+
+    Raises:
+        FrameError: 数据格式错误
+    """
+    try:
+        timestamp = float(cycle[0])
+        for sample in cycle[1]:
+            yield (timestamp, str(sample[0]), float(sample[1]), float(sample[2]), str(sample[3]),
+                   sample[4] if len(sample) > 4 else None, sample[5] if len(sample) > 5 else '')
+    except (TypeError, ValueError, IndexError) as e:
+        raise FrameError(f"周期数据格式错误: {e}")
+
+
+def unpack_cycle(cycle: List[Any], hostname: str, server_ip: Optional[str] = None) -> List[MonitorData]:
+    """
+    把 pack_cycle 的结果还原为监控数据
+
+    Args:
+        cycle: 紧凑的周期数据
+        hostname: 来源主机名
+        server_ip: 来源服务器IP
+
+    Returns:
+        监控数据列表
+
+    Raises:
+        FrameError: 数据格式错误
+    """
+    metrics = []
+    for timestamp, metric, value, threshold, unit, alert, detail in iter_samples(cycle):
+        try:
+            moment = datetime.fromtimestamp(timestamp)
+        except (ValueError, OverflowError, OSError) as e:
+            raise FrameError(f"周期数据格式错误: {e}")
+        metrics.append(MonitorData(metric=metric, value=value, threshold=threshold, unit=unit,
+                                   timestamp=moment, hostname=hostname, alert=alert, detail=detail,
+                                   server_ip=server_ip))
+    return metrics
+
+
+def split_payloads(header: Dict[str, Any], cycles: List[List[Any]], token: str = '',
+                   use_msgpack: bool = False, max_size: int = MAX_FRAME_SIZE) -> List[Dict[str, Any]]:
+    """
+    把若干周期组装为负载，编码后单帧超过 max_size 时按周期对半拆分
+
+    Args:
+        header: 负载的公共字段（h、ip、b）
+        cycles: pack_cycle 结果列表
+        token: 共享密钥
+        use_msgpack: 是否用 msgpack 编码
+        max_size: 单帧最大字节数
+
+    Returns:
+        负载列表，帧序号 q 由调用方在发送前填入
+    """
+    payload = dict(header, q=0, c=cycles)
+    if len(cycles) <= 1 or len(encode_frame(payload, token, use_msgpack)) <= max_size:
+        return [payload]
+    middle = len(cycles) // 2
+    return (split_payloads(header, cycles[:middle], token, use_msgpack, max_size)
+            + split_payloads(header, cycles[middle:], token, use_msgpack, max_size))
@@ -5,18 +5,21 @@ Monitor4DingTalk 主程序
 
 import sys
 import signal
+import socket
+import time
 import argparse
+from datetime import datetime
 from pathlib import Path
 
 # 添加项目根目录到Python路径
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+# 只在模块级导入轻量组件；采集、告警、调度等组件在用到时再导入，
+# 使 --status 等查询运行中守护进程的命令无需导入 psutil/numpy/requests 即可返回
 from src.services.config import config_manager
 from src.services.logger import logger_manager
-from src.services.dingtalk import dingtalk_notifier
-from src.core.monitor import resource_monitor
-from src.core.alert import alert_engine
-from src.utils.scheduler import monitor_scheduler
+from src.services.config_watcher import config_watcher
+from src.utils.control_client import ControlClient, ControlError, DEFAULT_SOCKET
 
 
 class Monitor4DingTalk:
@@ -25,6 +28,9 @@ class Monitor4DingTalk:
     def __init__(self):
         """初始化应用"""
         self.running = False
+        
+        # 运行中守护进程的控制接口客户端
+        self.client = ControlClient(config_manager.get('control.socket', DEFAULT_SOCKET))
     
     def signal_handler(self, signum, frame):
         """信号处理器"""
@@ -39,6 +45,13 @@ class Monitor4DingTalk:
     
     def start(self):
         """启动监控服务"""
+        from src.core.monitor import resource_monitor
+        from src.utils.exporter import prometheus_exporter
+        from src.utils.scheduler import monitor_scheduler
+        from src.utils.control import control_server
+        from src.fleet.agent import fleet_agent
+        from src.fleet.aggregator import fleet_aggregator
+        
         try:
             logger_manager.log_system_start()
             
@@ -46,10 +59,28 @@ class Monitor4DingTalk:
             system_info = resource_monitor.get_system_info()
             logger_manager.info(f"系统信息: {system_info}")
             
+            # 配置文件变化时自动重新加载并推送给各组件
+            config_watcher.start()
+            
+            # Prometheus 指标端点（未启用时不监听）
+            prometheus_exporter.start()
+            
+            # 集群模式：agent 推送采集结果，汇聚端接收并统一告警（standalone 时均不启动）
+            fleet_agent.start()
+            fleet_aggregator.start()
+            
+            # asyncio 运行模式：调度、采集、推送都在事件循环中完成，无需主循环
+            if config_manager.get('monitor.runtime', 'thread') == 'asyncio':
+                self._start_async()
+                return
+            
             # 启动调度器
             monitor_scheduler.start()
             self.running = True
             
+            # 本地控制接口（--status 等命令通过它查询本进程）
+            control_server.start(monitor_scheduler)
+            
             logger_manager.info("Monitor4DingTalk 启动成功，按 Ctrl+C 退出")
             
             # 主循环
@@ -62,11 +93,42 @@ class Monitor4DingTalk:
     def stop(self):
         """停止监控服务"""
         if self.running:
+            from src.utils.exporter import prometheus_exporter
+            from src.utils.scheduler import monitor_scheduler
+            from src.utils.control import control_server
+            from src.fleet.agent import fleet_agent
+            from src.fleet.aggregator import fleet_aggregator
+            
             logger_manager.info("正在停止监控服务...")
+            control_server.stop()
             monitor_scheduler.stop()
+            fleet_agent.stop()
+            fleet_aggregator.stop()
+            prometheus_exporter.stop()
+            config_watcher.stop()
             self.running = False
             logger_manager.log_system_stop()
     
+    def _start_async(self):
+        """以 asyncio 运行模式启动（阻塞直到收到停止信号）"""
+        from src.utils.async_runtime import async_monitor_scheduler
+        from src.utils.exporter import prometheus_exporter
+        from src.utils.control import control_server
+        from src.fleet.agent import fleet_agent
+        from src.fleet.aggregator import fleet_aggregator
+        
+        self.running = True
+        logger_manager.info("Monitor4DingTalk 启动成功 (asyncio 模式)，按 Ctrl+C 退出")
+        control_server.start(async_monitor_scheduler)
+        async_monitor_scheduler.start()
+        control_server.stop()
+        fleet_agent.stop()
+        fleet_aggregator.stop()
+        prometheus_exporter.stop()
+        config_watcher.stop()
+        self.running = False
+        logger_manager.log_system_stop()
+    
     def _main_loop(self):
         """主循环"""
         try:
@@ -79,6 +141,8 @@ class Monitor4DingTalk:
     
     def test_dingtalk(self):
         """测试钉钉连接"""
+        from src.services.dingtalk import dingtalk_notifier
+        
         logger_manager.info("开始测试钉钉连接...")
         
         success = dingtalk_notifier.test_connection()
@@ -91,6 +155,9 @@ class Monitor4DingTalk:
     
     def run_monitor_once(self):
         """执行一次监控检查"""
+        from src.core.monitor import resource_monitor
+        from src.core.alert import alert_engine
+        
         logger_manager.info("执行一次监控检查...")
         
         # 收集所有监控数据
@@ -123,43 +190,234 @@ class Monitor4DingTalk:
             else:
                  print("\n🟡 指标超标，但未达到连续告警阈值，本次不发送告警")
     
-    def show_status(self):
-        """显示系统状态"""
+    def query_daemon(self, command: str, **args):
+        """
+        向运行中的监控进程发送控制命令
+        
+        Returns:
+            命令结果，监控进程未运行（套接字不存在或拒绝连接）时返回None
+            
+        Raises:
+            ControlError: 监控进程执行命令失败，或监控进程在运行但无法通信（超时、无权限等）
+        """
+        if not hasattr(socket, 'AF_UNIX'):
+            return None
+        try:
+            return self.client.request(command, **args)
+        except (FileNotFoundError, ConnectionRefusedError):
+            return None
+        except socket.timeout:
+            raise ControlError(f"等待监控进程响应超时 ({self.client.path})")
+        except OSError as e:
+            # 权限不足、连接被重置等：监控进程可能仍在运行，不能当作未运行处理
+            raise ControlError(f"无法与监控进程通信 ({self.client.path}): {e}")
+    
+    def show_status(self) -> bool:
+        """显示系统状态（优先查询运行中的监控进程）"""
+        try:
+            status = self.query_daemon('status')
+        except ControlError as e:
+            print(f"❌ 查询状态失败: {e}")
+            return False
+        if status is None:
+            from src.utils.control import collect_status
+            from src.utils.scheduler import monitor_scheduler
+            
+            print("ℹ️  未检测到运行中的监控进程，以下为本地配置和状态\n")
+            status = collect_status(monitor_scheduler)
+        self.print_status(status)
+        return True
+    
+    @staticmethod
+    def print_status(status: dict):
+        """打印状态字典"""
         print("📈 Monitor4DingTalk 系统状态")
         print("=" * 60)
         
         # 系统信息
-        system_info = resource_monitor.get_system_info()
+        system_info = status['system']
         print(f"主机名: {system_info.get('hostname', 'Unknown')}")
         print(f"CPU核心数: {system_info.get('cpu_count', 'Unknown')}")
         print(f"总内存: {system_info.get('memory_total', 'Unknown')}")
         print(f"系统启动时间: {system_info.get('boot_time', 'Unknown')}")
+        if status.get('uptime') is not None:
+            print(f"监控进程: PID {status['pid']}, 已运行 {status['uptime'] / 3600:.1f} 小时")
         
         # 监控配置
-        monitor_config = config_manager.get_monitor_config()
-        print(f"\n监控间隔: {monitor_config.get('interval', 60)}秒")
-        
-        enabled_metrics = []
-        for metric in ['cpu', 'memory', 'disk', 'network']:
-            if config_manager.is_metric_enabled(metric):
-                threshold = config_manager.get_metric_threshold(metric)
-                enabled_metrics.append(f"{metric}({threshold}%)")
-        
+        print(f"\n监控间隔: {status['monitor_interval']}秒")
+        enabled_metrics = [f"{item['name']}({item['threshold']}%, 每{item['interval']}秒)"
+                           for item in status['metrics']]
         print(f"启用的监控项: {', '.join(enabled_metrics) if enabled_metrics else '无'}")
         
         # 告警状态
-        alert_status = alert_engine.get_alert_status()
+        alert_status = status['alerts']
         print(f"\n告警去重窗口: {alert_status['dedup_window']}秒")
         print(f"历史告警数量: {alert_status['total_sent_alerts']}")
         print(f"持续告警指标: {alert_status['persistent_alerts'] if alert_status['persistent_alerts'] else '无'}")
+        if alert_status['silences']:
+            print(f"生效中的静默: {len(alert_status['silences'])} 条")
+        
+        # 本地历史存储
+        storage = status['storage']
+        if storage['enabled']:
+            print(f"\n本地历史: {storage['series']} 个序列 ({storage['directory']})")
+            if storage['archive'] is not None:
+                stats = storage['archive']
+                print(f"压缩归档: {stats['samples']} 个样本, {stats['bytes'] / 1024:.1f} KB, "
+                      f"压缩率 {stats['ratio']:.1f}x")
         
         # 调度器状态
-        if monitor_scheduler.running:
-            next_run = monitor_scheduler.get_next_run_time()
-            print(f"\n调度器状态: 运行中")
-            print(f"下次执行时间: {next_run if next_run else '未知'}")
+        scheduler = status['scheduler']
+        if scheduler['running']:
+            print(f"\n调度器状态: 运行中 ({scheduler['runtime']})")
+            print(f"下次执行时间: {scheduler['next_run'] if scheduler['next_run'] else '未知'}")
+            print(f"超时策略: {scheduler['overrun_policy']}, 积压任务: {scheduler['due_jobs']}")
+            for job in scheduler['jobs']:
+                stats = job['stats']
+                print(f"  {job['job_func']}: 执行 {stats['runs']} 次, 延迟 {stats['late_runs']}, "
+                      f"错过 {stats['missed']}, 合并 {stats['coalesced']}, 超时 {stats['overruns']}, "
+                      f"平均耗时 {stats['avg_duration']}秒, 最大耗时 {stats['max_duration']}秒")
         else:
             print(f"\n调度器状态: 已停止")
+        
+        # 队列和配置
+        queues = status['queues']
+        print(f"\n日志队列: 待写入 {queues['log']['queued']}, 已丢弃 {queues['log']['dropped']}")
+        config = status['config']
+        print(f"配置文件: {config['path']} (自动重新加载 {config['reloads']} 次"
+              f"{', 最近错误: ' + config['last_error'] if config['last_error'] else ''})")
+
+        # 集群模式
+        fleet = status.get('fleet') or {}
+        if 'hosts' in fleet:
+            print(f"\n集群汇聚端: 主机 {fleet['hosts']} 台, 离线 {len(fleet['offline_hosts'])} 台, "
+                  f"已接收 {fleet['frames']} 帧/{fleet['samples']} 个样本, 无效 {fleet['rejected']}, "
+                  f"丢弃 {fleet['dropped']}, 待处理 {fleet['queue']}")
+            grouping = fleet.get('grouping') or {}
+            if grouping.get('enabled'):
+                print(f"告警合并: 已合并 {grouping['grouped_messages']} 条消息/{grouping['grouped_items']} 条告警, "
+                      f"等待中 {grouping['pending_items']} 条")
+        elif fleet.get('mode') == 'agent':
+            print(f"\n集群 agent: 汇聚端 {fleet['aggregator']}, 已发送 {fleet['sent_frames']} 帧, "
+                  f"待发送 {fleet['pending_cycles']} 个周期, 失败 {fleet['failures']}, 丢弃 {fleet['dropped']}")
+
+    def send_command(self, command: str) -> bool:
+        """向运行中的监控进程发送 reload / flush / run_once 命令"""
+        try:
+            result = self.query_daemon(command, timeout=60.0)
+        except ControlError as e:
+            print(f"❌ 命令执行失败: {e}")
+            return False
+        if result is None:
+            print(f"❌ 未检测到运行中的监控进程 ({self.client.path})")
+            return False
+        
+        if command == 'reload':
+            for error in result['errors']:
+                print(f"⚠️  {error}")
+            print("🔄 配置已重新加载")
+        elif command == 'run_once':
+            for item in result:
+                status = "🔴 关注" if item['alert'] else "✅ 正常"
+                print(f"{item['metric']}: {item['value']:.2f}{item['unit']} "
+                      f"(阈值: {item['threshold']:.2f}{item['unit']}) - {status}")
+            print("⚙️  已由监控进程完成采集和告警判断")
+        else:
+            print("💾 已同步到磁盘")
+        return True
+    
+    def add_silence(self, metric: str, duration: str, comment: str) -> bool:
+        """添加运行时静默（优先交给运行中的监控进程）"""
+        try:
+            description = self.query_daemon('silence', metric=metric, duration=duration, comment=comment)
+            if description is None:
+                from src.core.alert import alert_engine
+                description = alert_engine.silence_manager.add(metric, duration, comment).describe()
+        except (ValueError, ControlError) as e:
+            print(f"❌ 添加静默失败: {e}")
+            return False
+        print(f"🔕 已添加静默: {description}")
+        return True
+    
+    def remove_silence(self, silence_id: str) -> bool:
+        """删除运行时静默（优先交给运行中的监控进程）"""
+        try:
+            removed = self.query_daemon('unsilence', silence_id=silence_id)
+        except ControlError as e:
+            print(f"❌ 删除静默失败: {e}")
+            return False
+        if removed is None:
+            from src.core.alert import alert_engine
+            removed = alert_engine.silence_manager.remove(silence_id)
+        if removed:
+            print(f"🔔 已删除静默: {silence_id}")
+            return True
+        print(f"❌ 未找到运行时静默: {silence_id}")
+        return False
+    
+    def list_silences(self) -> bool:
+        """列出全部生效中的静默"""
+        try:
+            silences = self.query_daemon('silences')
+        except ControlError as e:
+            print(f"❌ 查询静默失败: {e}")
+            return False
+        if silences is None:
+            from src.core.alert import alert_engine
+            silences = [{'description': silence.describe(), 'runtime': silence.runtime}
+                        for silence in alert_engine.silence_manager.list_silences()]
+        if not silences:
+            print("当前没有静默规则")
+            return True
+        print("🔕 静默规则:")
+        for silence in silences:
+            source = "运行时" if silence['runtime'] else "配置"
+            print(f"  {silence['description']} [{source}]")
+        return True
+    
+    def show_history(self, pattern: str, since: str, until: str = None) -> bool:
+        """查询本地指标历史"""
+        from src.core.silence import parse_duration, parse_time
+        from src.storage.ringbuffer import np
+        from src.storage.query import summarize_history
+        from src.storage.tsdb import TimeSeriesStore
+        
+        if np is None:
+            print("❌ 未安装 numpy，无法查询本地历史")
+            return False
+        
+        try:
+            end = parse_time(until) if until else time.time()
+            try:
+                start = end - parse_duration(since)
+            except ValueError:
+                start = parse_time(since)
+        except ValueError as e:
+            print(f"❌ {e}")
+            return False
+        if start >= end:
+            print("❌ 起始时间必须早于结束时间")
+            return False
+        
+        # 只读打开，不影响正在运行的监控进程
+        store = TimeSeriesStore(readonly=True)
+        results = summarize_history(store, pattern, start, end)
+        store.close()
+        
+        print(f"📊 {pattern}: {datetime.fromtimestamp(start):%Y-%m-%d %H:%M} ~ "
+              f"{datetime.fromtimestamp(end):%Y-%m-%d %H:%M}")
+        if not results:
+            print(f"没有匹配的历史数据 ({store.directory})")
+            return False
+        
+        for item in results:
+            approximate = '≈' if item['approximate'] else ''
+            print(f"\n{item['metric']} [{item['source']}, {item['points']} 点/{item['samples']} 样本]")
+            print(f"  min {item['min']:.2f}  avg {item['avg']:.2f}  "
+                  f"p50 {approximate}{item['p50']:.2f}  p95 {approximate}{item['p95']:.2f}  "
+                  f"p99 {approximate}{item['p99']:.2f}  max {item['max']:.2f}")
+            print(f"  {item['sparkline']}")
+        return True
 
 
 def main():
@@ -172,7 +430,29 @@ def main():
     parser.add_argument('--once', action='store_true', 
                        help='执行一次监控检查后退出')
     parser.add_argument('--status', action='store_true', 
-                       help='显示系统状态')
+                       help='显示系统状态（监控进程运行中时显示其实时状态）')
+    parser.add_argument('--silence', metavar='METRIC',
+                       help='静默指定指标的告警（支持通配符，如 "disk_*"）')
+    parser.add_argument('--duration', default='1h',
+                       help='静默时长，如 30m、2h、1d (默认: 1h)')
+    parser.add_argument('--comment', default='',
+                       help='静默备注')
+    parser.add_argument('--unsilence', metavar='ID',
+                       help='删除指定ID的运行时静默')
+    parser.add_argument('--list-silences', action='store_true',
+                       help='列出生效中的静默')
+    parser.add_argument('--reload', action='store_true',
+                       help='让运行中的监控进程重新加载配置文件')
+    parser.add_argument('--run-now', action='store_true',
+                       help='让运行中的监控进程立即执行一次采集和告警判断')
+    parser.add_argument('--flush', action='store_true',
+                       help='让运行中的监控进程把时序数据和指标输出同步到磁盘')
+    parser.add_argument('--history', metavar='METRIC',
+                       help='查询本地指标历史（支持通配符，如 "disk_*"）')
+    parser.add_argument('--since', default='1h',
+                       help='历史查询起点：时长如 30m、7d，或 "YYYY-MM-DD HH:MM" (默认: 1h)')
+    parser.add_argument('--until', default=None,
+                       help='历史查询终点 "YYYY-MM-DD HH:MM" (默认: 当前时间)')
     parser.add_argument('--version', action='version', version='Monitor4DingTalk 1.0.0')
     
     args = parser.parse_args()
@@ -201,8 +481,34 @@ def main():
     
     elif args.status:
         # 显示状态
-        app.show_status()
-        sys.exit(0)
+        success = app.show_status()
+        sys.exit(0 if success else 1)
+    
+    elif args.silence:
+        # 添加静默
+        success = app.add_silence(args.silence, args.duration, args.comment)
+        sys.exit(0 if success else 1)
+    
+    elif args.unsilence:
+        # 删除静默
+        success = app.remove_silence(args.unsilence)
+        sys.exit(0 if success else 1)
+    
+    elif args.list_silences:
+        # 列出静默
+        success = app.list_silences()
+        sys.exit(0 if success else 1)
+    
+    elif args.reload or args.run_now or args.flush:
+        # 控制运行中的监控进程
+        command = 'reload' if args.reload else 'run_once' if args.run_now else 'flush'
+        success = app.send_command(command)
+        sys.exit(0 if success else 1)
+    
+    elif args.history:
+        # 查询本地历史
+        success = app.show_history(args.history, args.since, args.until)
+        sys.exit(0 if success else 1)
     
     else:
         # 启动监控服务
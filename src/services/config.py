@@ -5,10 +5,125 @@
 
 import os
 import yaml
-from typing import Dict, Any, Optional
+import hashlib
+import weakref
+from typing import Callable, Dict, Any, List, NamedTuple, Optional, Tuple
 from pathlib import Path
 
 
+class FrozenDict(dict):
+    """只读字典，用于配置快照中的各级配置节（仍可通过 isinstance(x, dict) 判断）"""
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("配置快照是只读的，请修改配置文件后重新加载")
+
+    __setitem__ = __delitem__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+
+def freeze(value: Any) -> Any:
+    """
+    递归冻结配置值：字典转为 FrozenDict，列表转为元组
+
+    Args:
+        value: 从 YAML 解析出的配置值
+
+    Returns:
+        冻结后的配置值
+    """
+    if isinstance(value, dict):
+        return FrozenDict((key, freeze(item)) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+class MetricSettings(NamedTuple):
+    """单个采集项的预计算配置"""
+    name: str
+    enabled: bool
+    threshold: float
+    interval: float
+
+
+class ConfigSnapshot:
+    """
+    已验证的只读配置快照
+
+    加载时一次性展开所有点号路径并预计算各采集项配置，
+    运行期间的读取都是属性访问或单次字典查找；重新加载时整体替换快照。
+    """
+
+    __slots__ = ('dingtalk', 'monitor', 'alert', 'logging', 'server',
+                 'monitor_interval', 'metrics', '_flat')
+
+    def __init__(self, config: Dict[str, Any]):
+        """
+        构建配置快照
+
+        Args:
+            config: 已通过验证的原始配置字典
+        """
+        frozen = freeze(config)
+        self.dingtalk = frozen.get('dingtalk') or FrozenDict()
+        self.monitor = frozen.get('monitor') or FrozenDict()
+        self.alert = frozen.get('alert') or FrozenDict()
+        self.logging = frozen.get('logging') or FrozenDict()
+        self.server = frozen.get('server') or FrozenDict()
+        self.monitor_interval = self.monitor.get('interval', 60)
+
+        # 各采集项（monitor 下的字典节）的预计算配置
+        self.metrics = {
+            name: MetricSettings(
+                name=name,
+                enabled=bool(section.get('enabled', False)),
+                threshold=section.get('threshold', 0.0),
+                interval=section.get('interval', self.monitor_interval),
+            )
+            for name, section in self.monitor.items() if isinstance(section, dict)
+        }
+
+        # 所有点号路径到值的映射
+        self._flat: Dict[str, Any] = {}
+        self._flatten('', frozen)
+
+    def _flatten(self, prefix: str, value: Any) -> None:
+        """递归展开配置，记录每一级的点号路径"""
+        if prefix:
+            self._flat[prefix] = value
+        if isinstance(value, dict):
+            for key, item in value.items():
+                self._flatten(f'{prefix}.{key}' if prefix else str(key), item)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """
+        按点号路径获取配置值
+
+        Args:
+            key: 配置键，支持 'section.subsection.key' 格式
+            default: 默认值
+
+        Returns:
+            配置值
+        """
+        return self._flat.get(key, default)
+
+    def metric(self, name: str) -> MetricSettings:
+        """
+        获取采集项配置
+
+        Args:
+            name: 监控指标名称
+
+        Returns:
+            采集项配置，未配置的指标视为未启用
+        """
+        settings = self.metrics.get(name)
+        if settings is None:
+            return MetricSettings(name, False, 0.0, self.monitor_interval)
+        return settings
+
+
 class ConfigManager:
     """配置管理器"""
     
@@ -21,12 +136,32 @@ class ConfigManager:
         """
         self.config_path = Path(config_path)
         self._config: Optional[Dict[str, Any]] = None
+        self.snapshot: Optional[ConfigSnapshot] = None
+        
+        # 已加载文件的 (mtime_ns, size, inode) 及内容摘要，用于判断文件是否真正变化
+        self._file_key: Optional[Tuple[int, int, int]] = None
+        self.digest: Optional[str] = None
+        
+        # 配置变更订阅者（绑定方法以弱引用保存，不会阻止组件被回收）
+        self._subscribers: List[Callable[[], Optional[Callable]]] = []
+        
         self.load_config()
     
-    def load_config(self) -> None:
+    def _stat_key(self) -> Optional[Tuple[int, int, int]]:
+        """获取配置文件的 (mtime_ns, size, inode)，文件不存在时返回None"""
+        try:
+            stat = os.stat(str(self.config_path))
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+    
+    def load_config(self) -> List[Tuple[str, Exception]]:
         """
-        加载配置文件
+        加载配置文件，成功后将新快照推送给所有订阅者
         
+        Returns:
+            推送失败的订阅者列表 [(订阅者名称, 异常)]
+            
         Raises:
             FileNotFoundError: 配置文件不存在
             yaml.YAMLError: 配置文件格式错误
@@ -35,46 +170,142 @@ class ConfigManager:
         if not self.config_path.exists():
             raise FileNotFoundError(f"配置文件不存在: {self.config_path}")
         
+        file_key = self._stat_key()
+        with open(self.config_path, 'rb') as file:
+            content = file.read()
+        
         try:
-            with open(self.config_path, 'r', encoding='utf-8') as file:
-                self._config = yaml.safe_load(file)
+            config = yaml.safe_load(content.decode('utf-8'))
         except yaml.YAMLError as e:
             raise yaml.YAMLError(f"配置文件解析失败: {e}")
         
-        # 验证配置
-        self._validate_config()
+        # 验证通过后再整体替换快照，验证失败时保留原配置，
+        # 其它线程只会看到完整的旧快照或新快照
+        self._validate_config(config)
+        snapshot = ConfigSnapshot(config)
+        self._config = config
+        self.snapshot = snapshot
+        self._file_key = file_key
+        self.digest = hashlib.sha256(content).hexdigest()
+        
+        return self._notify(snapshot)
     
-    def _validate_config(self) -> None:
+    def has_changed(self) -> bool:
+        """
+        检查配置文件自上次加载后是否变化
+        
+        先比较文件元数据，元数据变化时再比较内容摘要，
+        只是 touch 或原样保存的文件不会触发重新加载。
+        
+        Returns:
+            内容是否变化
+        """
+        file_key = self._stat_key()
+        if file_key is None or file_key == self._file_key:
+            return False
+        
+        try:
+            with open(self.config_path, 'rb') as file:
+                digest = hashlib.sha256(file.read()).hexdigest()
+        except OSError:
+            return False
+        
+        if digest == self.digest:
+            self._file_key = file_key
+            return False
+        return True
+    
+    def subscribe(self, callback: Callable[[ConfigSnapshot], None]) -> None:
+        """
+        订阅配置变更，每次成功加载配置后以新快照调用 callback
+        
+        Args:
+            callback: 回调函数，绑定方法以弱引用保存
+        """
+        if hasattr(callback, '__self__'):
+            ref = weakref.WeakMethod(callback)
+        else:
+            ref = lambda: callback
+        self._subscribers.append(ref)
+    
+    def _notify(self, snapshot: ConfigSnapshot) -> List[Tuple[str, Exception]]:
+        """
+        将新快照推送给所有订阅者，单个订阅者失败不影响其它订阅者
+        
+        Args:
+            snapshot: 新的配置快照
+            
+        Returns:
+            推送失败的订阅者列表 [(订阅者名称, 异常)]
+        """
+        errors = []
+        alive = []
+        for ref in list(self._subscribers):
+            callback = ref()
+            if callback is None:
+                continue
+            alive.append(ref)
+            try:
+                callback(snapshot)
+            except Exception as e:
+                # 去掉调用栈，避免异常引用本函数的栈帧而延长订阅者的生命周期
+                errors.append((getattr(callback, '__qualname__', repr(callback)), e.with_traceback(None)))
+        self._subscribers = alive
+        return errors
+    
+    def _validate_config(self, config: Optional[Dict[str, Any]]) -> None:
         """
         验证配置文件的完整性和正确性
         
+        Args:
+            config: 待验证的配置字典
+            
         Raises:
             ValueError: 配置验证失败
         """
-        if not self._config:
+        if not config:
             raise ValueError("配置文件为空")
+        if not isinstance(config, dict):
+            raise ValueError("配置文件格式错误")
         
         # 验证必需的配置项
         required_sections = ['dingtalk', 'monitor', 'alert', 'logging']
         for section in required_sections:
-            if section not in self._config:
+            if section not in config:
                 raise ValueError(f"缺少必需的配置节: {section}")
         
         # 验证钉钉配置
-        dingtalk_config = self._config['dingtalk']
+        dingtalk_config = config['dingtalk']
         if 'webhook_url' not in dingtalk_config:
             raise ValueError("缺少钉钉webhook_url配置")
         
         # 验证监控配置
-        monitor_config = self._config['monitor']
+        monitor_config = config['monitor']
         if 'interval' not in monitor_config:
             raise ValueError("缺少监控间隔配置")
         
+        # 验证采集间隔（全局及各采集项单独配置的 interval）
+        intervals = [('monitor', monitor_config['interval'])] + [
+            (metric, section['interval']) for metric, section in monitor_config.items()
+            if isinstance(section, dict) and 'interval' in section
+        ]
+        for name, interval in intervals:
+            if isinstance(interval, bool) or not isinstance(interval, (int, float)) or interval <= 0:
+                raise ValueError(f"{name}采集间隔必须是正数: {interval}")
+        
         # 验证阈值配置
         for metric in ['cpu', 'memory', 'disk']:
             if metric in monitor_config and monitor_config[metric].get('enabled', False):
                 if 'threshold' not in monitor_config[metric]:
                     raise ValueError(f"缺少{metric}阈值配置")
+        
+        # 验证组合告警规则
+        rules = config['alert'].get('rules') or []
+        if not isinstance(rules, list):
+            raise ValueError("alert.rules 必须是列表")
+        for rule in rules:
+            if not isinstance(rule, dict) or not rule.get('name') or not rule.get('expression'):
+                raise ValueError("alert.rules 中的每条规则都需要 name 和 expression")
     
     def get(self, key: str, default: Any = None) -> Any:
         """
@@ -87,42 +318,39 @@ class ConfigManager:
         Returns:
             配置值
         """
-        if not self._config:
-            return default
-        
-        keys = key.split('.')
-        value = self._config
-        
-        try:
-            for k in keys:
-                value = value[k]
-            return value
-        except (KeyError, TypeError):
+        snapshot = self.snapshot
+        if snapshot is None:
             return default
+        return snapshot.get(key, default)
     
     def get_dingtalk_config(self) -> Dict[str, Any]:
-        """获取钉钉配置"""
-        return self.get('dingtalk', {})
+        """获取钉钉配置（只读）"""
+        return self.snapshot.dingtalk
     
     def get_monitor_config(self) -> Dict[str, Any]:
-        """获取监控配置"""
-        return self.get('monitor', {})
+        """获取监控配置（只读）"""
+        return self.snapshot.monitor
     
     def get_alert_config(self) -> Dict[str, Any]:
-        """获取告警配置"""
-        return self.get('alert', {})
+        """获取告警配置（只读）"""
+        return self.snapshot.alert
     
     def get_logging_config(self) -> Dict[str, Any]:
-        """获取日志配置"""
-        return self.get('logging', {})
+        """获取日志配置（只读）"""
+        return self.snapshot.logging
     
     def get_server_config(self) -> Dict[str, Any]:
-        """获取服务器配置"""
-        return self.get('server', {})
+        """获取服务器配置（只读）"""
+        return self.snapshot.server
     
-    def reload_config(self) -> None:
-        """重新加载配置文件"""
-        self.load_config()
+    def reload_config(self) -> List[Tuple[str, Exception]]:
+        """
+        重新加载配置文件并推送给所有订阅者
+        
+        Returns:
+            推送失败的订阅者列表 [(订阅者名称, 异常)]
+        """
+        return self.load_config()
     
     def is_metric_enabled(self, metric: str) -> bool:
         """
@@ -134,7 +362,7 @@ class ConfigManager:
         Returns:
             是否启用
         """
-        return self.get(f'monitor.{metric}.enabled', False)
+        return self.snapshot.metric(metric).enabled
     
     def get_metric_threshold(self, metric: str) -> float:
         """
@@ -146,7 +374,31 @@ class ConfigManager:
         Returns:
             阈值
         """
-        return self.get(f'monitor.{metric}.threshold', 0.0)
+        return self.snapshot.metric(metric).threshold
+    
+    def get_metric_interval(self, metric: str) -> float:
+        """
+        获取指定监控指标的采集间隔
+        
+        Args:
+            metric: 监控指标名称
+            
+        Returns:
+            采集间隔（秒），未单独配置时使用全局监控间隔
+        """
+        return self.snapshot.metric(metric).interval
+    
+    def get_metric_settings(self, metric: str) -> MetricSettings:
+        """
+        获取指定监控指标的预计算配置（启用状态、阈值、采集间隔）
+        
+        Args:
+            metric: 监控指标名称
+            
+        Returns:
+            采集项配置
+        """
+        return self.snapshot.metric(metric)
 
 
 # 全局配置管理器实例
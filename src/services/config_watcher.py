@@ -0,0 +1,205 @@
+"""
+配置文件监听服务
+配置文件变化时（Linux 下使用 inotify，其它平台回退为轮询文件元数据）防抖后重新加载一次，
+新配置由 ConfigManager 推送给所有订阅的组件，无需重启也无需定期重新解析
+"""
+
+import os
+import time
+import select
+import ctypes
+import ctypes.util
+import threading
+from typing import Optional
+
+from .config import config_manager, ConfigManager
+from .logger import logger_manager
+
+
+# inotify 事件掩码：写入完成、被移动进目录（编辑器原子保存）、新建、修改
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+# 使用 inotify 时仍定期检查一次文件元数据，防止事件丢失
+INOTIFY_SAFETY_INTERVAL = 60.0
+
+
+def _inotify_watch(directory: str) -> Optional[int]:
+    """
+    为目录创建 inotify 监听
+
+    监听目录而不是文件本身，编辑器先写临时文件再重命名的保存方式也能被捕获。
+
+    Args:
+        directory: 配置文件所在目录
+
+    Returns:
+        inotify 文件描述符，平台不支持时返回None
+    """
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        fd = libc.inotify_init1(os.O_NONBLOCK | getattr(os, 'O_CLOEXEC', 0))
+    except (OSError, AttributeError):
+        return None
+    if fd < 0:
+        return None
+
+    if libc.inotify_add_watch(fd, os.fsencode(directory), WATCH_MASK) < 0:
+        os.close(fd)
+        return None
+    return fd
+
+
+class ConfigWatcher:
+    """配置文件监听器"""
+
+    def __init__(self, manager: ConfigManager = config_manager):
+        """
+        初始化配置文件监听器
+
+        Args:
+            manager: 被监听的配置管理器
+        """
+        self.manager = manager
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._inotify_fd: Optional[int] = None
+        self._wake_pipe = None
+
+        # 加载失败时文件的元数据，文件再次变化前不重复尝试
+        self._failed_key = None
+
+        # 重新加载次数及最近一次失败原因
+        self.reload_count = 0
+        self.last_error: Optional[str] = None
+
+    @property
+    def poll_interval(self) -> float:
+        """未使用 inotify 时检查文件元数据的间隔（秒）"""
+        return float(self.manager.get('monitor.config_poll_interval', 2.0))
+
+    @property
+    def debounce(self) -> float:
+        """文件连续变化时等待其稳定的时长（秒）"""
+        return float(self.manager.get('monitor.config_debounce', 1.0))
+
+    @property
+    def running(self) -> bool:
+        """监听线程是否在运行"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """启动监听线程"""
+        if self.running or not self.manager.get('monitor.config_watch', True):
+            return
+
+        self._stop_event.clear()
+        self._inotify_fd = _inotify_watch(str(self.manager.config_path.resolve().parent))
+        self._wake_pipe = os.pipe()
+
+        self._thread = threading.Thread(target=self._run, name='config-watcher', daemon=True)
+        self._thread.start()
+
+        mode = 'inotify' if self._inotify_fd is not None else f'轮询({self.poll_interval}秒)'
+        logger_manager.info(f"配置文件监听已启动: {self.manager.config_path} [{mode}]")
+
+    def stop(self) -> None:
+        """停止监听线程"""
+        if self._thread is None:
+            return
+
+        self._stop_event.set()
+        os.write(self._wake_pipe[1], b'x')
+        self._thread.join(timeout=5)
+        self._thread = None
+
+        for fd in (self._inotify_fd,) + self._wake_pipe:
+            if fd is not None:
+                os.close(fd)
+        self._inotify_fd = None
+        self._wake_pipe = None
+
+    def _wait(self, timeout: float) -> bool:
+        """
+        等待文件事件或超时
+
+        Returns:
+            是否收到 inotify 事件
+        """
+        fds = [self._wake_pipe[0]]
+        if self._inotify_fd is not None:
+            fds.append(self._inotify_fd)
+
+        readable, _, _ = select.select(fds, [], [], timeout)
+        if self._inotify_fd not in readable:
+            return False
+
+        # 读空事件队列，具体是哪个文件变化由 has_changed 判断
+        try:
+            while os.read(self._inotify_fd, 65536):
+                pass
+        except BlockingIOError:
+            pass
+        return True
+
+    def _settle(self) -> None:
+        """防抖：等待文件在 debounce 时长内不再变化"""
+        deadline = time.monotonic() + self.debounce
+        while not self._stop_event.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            if self._inotify_fd is not None:
+                if self._wait(remaining):
+                    deadline = time.monotonic() + self.debounce
+            else:
+                key = self.manager._stat_key()
+                self._stop_event.wait(remaining)
+                if self.manager._stat_key() != key:
+                    deadline = time.monotonic() + self.debounce
+
+    def _run(self) -> None:
+        """监听循环"""
+        while not self._stop_event.is_set():
+            timeout = INOTIFY_SAFETY_INTERVAL if self._inotify_fd is not None else self.poll_interval
+            self._wait(timeout)
+            if self._stop_event.is_set():
+                break
+            if self.manager._stat_key() != self._failed_key and self.manager.has_changed():
+                self._settle()
+                if not self._stop_event.is_set():
+                    self.check()
+
+    def check(self) -> bool:
+        """
+        文件内容变化时重新加载一次配置
+
+        Returns:
+            是否重新加载成功
+        """
+        file_key = self.manager._stat_key()
+        if file_key == self._failed_key or not self.manager.has_changed():
+            return False
+
+        try:
+            errors = self.manager.reload_config()
+        except Exception as e:
+            # 新配置无效时保留原配置继续运行
+            self._failed_key = file_key
+            self.last_error = str(e)
+            logger_manager.error(f"配置文件已变化但加载失败，继续使用原配置: {str(e)}")
+            return False
+
+        self.reload_count += 1
+        self.last_error = None
+        logger_manager.log_config_reload()
+        for name, error in errors:
+            logger_manager.error(f"配置变更应用失败 - {name}: {str(error)}")
+        return True
+
+
+# 全局配置监听器实例
+config_watcher = ConfigWatcher()
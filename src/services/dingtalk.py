@@ -4,18 +4,25 @@
 """
 
 import time
+import math
 import hmac
+import asyncio
 import hashlib
 import base64
 import urllib.parse
 import requests
 import socket
-from typing import Dict, Any, Optional, TYPE_CHECKING
+from typing import Dict, Any, List, Optional, TYPE_CHECKING
 from datetime import datetime
 
-from .config import config_manager
+from .config import config_manager, ConfigSnapshot
 from .logger import logger_manager
 
+try:
+    import aiohttp
+except ImportError:  # 可选依赖，仅 asyncio 运行模式使用，缺失时回退到线程池中的 requests
+    aiohttp = None
+
 if TYPE_CHECKING:
     from ..core.monitor import MonitorData
 
@@ -29,6 +36,24 @@ class DingTalkNotifier:
         self.webhook_url = self.config.get('webhook_url', '')
         self.secret = self.config.get('secret', '')
         self.timeout = self.config.get('timeout', 10)
+        
+        # asyncio 运行模式下复用的HTTP会话
+        self._session = None
+        
+        # 配置文件变化时自动更新 webhook、签名密钥等
+        config_manager.subscribe(self.apply_config)
+    
+    def apply_config(self, snapshot: ConfigSnapshot) -> None:
+        """
+        应用新的钉钉配置
+        
+        Args:
+            snapshot: 新的配置快照
+        """
+        self.config = snapshot.dingtalk
+        self.webhook_url = self.config.get('webhook_url', '')
+        self.secret = self.config.get('secret', '')
+        self.timeout = self.config.get('timeout', 10)
     
     def _generate_signature(self, timestamp: int) -> str:
         """
@@ -77,8 +102,10 @@ class DingTalkNotifier:
         
         return webhook_url
     
-    def _format_alert_message(self, metric: str, current_value: float, 
-                            threshold: float, hostname: str) -> Dict[str, Any]:
+    def _format_alert_message(self, metric: str, current_value: float,
+                            threshold: float, hostname: str,
+                            unit: str = '%', detail: str = '',
+                            server_ip: Optional[str] = None) -> Dict[str, Any]:
         """
         格式化告警消息
         
@@ -87,6 +114,9 @@ class DingTalkNotifier:
             current_value: 当前值
             threshold: 阈值
             hostname: 主机名
+            unit: 单位
+            detail: 附加说明（组合规则、预测等），模板中可用 {detail} 引用
+            server_ip: 服务器IP，为None时实时获取
             
         Returns:
             格式化的消息体
@@ -99,10 +129,11 @@ class DingTalkNotifier:
         timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         
         # 获取服务器IP地址
-        server_ip = self._get_server_ip()
+        if server_ip is None:
+            server_ip = self._get_server_ip()
         
         # 确定告警级别
-        level = self._determine_alert_level(current_value, threshold)
+        level = self._determine_alert_level(current_value, threshold, metric)
         
         # 替换模板变量
         message_text = template.format(
@@ -110,11 +141,16 @@ class DingTalkNotifier:
             server_ip=server_ip,
             timestamp=timestamp,
             metric_name=self._get_metric_display_name(metric),
-            current_value=f"{current_value:.2f}%",
-            threshold=f"{threshold:.2f}%",
-            level=level
+            current_value=self._format_value(current_value, unit, metric),
+            threshold=f"{threshold:.2f}{unit}",
+            level=level,
+            detail=detail
         )
         
+        # 模板未引用 {detail} 时，将附加说明追加到消息末尾
+        if detail and '{detail}' not in template:
+            message_text = f"{message_text.rstrip()}\n\n**详情**: {detail}\n"
+        
         # 构建钉钉消息体
         message = {
             "msgtype": "markdown",
@@ -129,12 +165,14 @@ class DingTalkNotifier:
         
         return message
     
-    def _format_recovery_message(self, monitor_data: 'MonitorData') -> Dict[str, Any]:
+    def _format_recovery_message(self, monitor_data: 'MonitorData',
+                                 server_ip: Optional[str] = None) -> Dict[str, Any]:
         """
         格式化告警恢复消息
         
         Args:
             monitor_data: 监控数据
+            server_ip: 服务器IP，为None时实时获取
             
         Returns:
             格式化的消息体
@@ -158,7 +196,8 @@ class DingTalkNotifier:
         timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         
         # 获取服务器IP地址
-        server_ip = self._get_server_ip()
+        if server_ip is None:
+            server_ip = self._get_server_ip()
         
         # 替换模板变量
         message_text = template.format(
@@ -166,7 +205,7 @@ class DingTalkNotifier:
             server_ip=server_ip,
             timestamp=timestamp,
             metric_name=self._get_metric_display_name(monitor_data.metric),
-            current_value=f"{monitor_data.value:.2f}{monitor_data.unit}",
+            current_value=self._format_value(monitor_data.value, monitor_data.unit, monitor_data.metric),
             threshold=f"{monitor_data.threshold:.2f}{monitor_data.unit}"
         )
         
@@ -181,17 +220,118 @@ class DingTalkNotifier:
         
         return message
     
-    def _determine_alert_level(self, current_value: float, threshold: float) -> str:
+    def _format_group_message(self, items: List['MonitorData'], recovery: bool = False,
+                              max_listed: int = 50) -> Dict[str, Any]:
+        """
+        格式化多台主机同一指标的汇总消息（告警风暴合并）
+        
+        Args:
+            items: 同一指标的监控数据列表（每台主机一条）
+            recovery: 是否为恢复通知
+            max_listed: 消息中最多列出的主机数，其余只计数
+            
+        Returns:
+            格式化的消息体
+        """
+        first = items[0]
+        unit = first.unit
+        metric_name = self._get_metric_display_name(first.metric)
+        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        values = [monitor_data.value for monitor_data in items]
+        
+        if recovery:
+            title = f"告警恢复 - {metric_name} {len(items)}台主机"
+            lines = ["✅ **集群告警恢复**", "", f"**监控项**: {metric_name}"]
+        else:
+            title = f"集群告警 - {metric_name} {len(items)}台主机"
+            lines = [
+                "🚨 **集群告警汇总**",
+                "",
+                f"**告警项**: {metric_name}",
+                f"**告警级别**: {self._determine_alert_level(first.value, first.threshold, first.metric)}",
+                f"**告警阈值**: {first.threshold:.2f}{unit}",
+            ]
+        lines += [
+            f"**主机数**: {len(items)}",
+            f"**时间**: {timestamp}",
+            f"**当前值**: {self._format_value(min(values), unit, first.metric)} ~ "
+            f"{self._format_value(max(values), unit, first.metric)}",
+            "",
+            "**受影响主机**:" if not recovery else "**已恢复主机**:",
+        ]
+        
+        # 按当前值从高到低列出，超出部分只计数
+        listed = sorted(items, key=lambda monitor_data: monitor_data.value, reverse=True)[:max_listed]
+        for monitor_data in listed:
+            address = f" ({monitor_data.server_ip})" if monitor_data.server_ip else ''
+            lines.append(f"- {monitor_data.hostname}{address}: "
+                         f"{self._format_value(monitor_data.value, unit, monitor_data.metric)}")
+        if len(items) > len(listed):
+            lines.append(f"- 等共 {len(items)} 台")
+        
+        if not recovery and first.detail and all(monitor_data.detail == first.detail for monitor_data in items):
+            lines += ["", f"**详情**: {first.detail}"]
+        
+        return {
+            "msgtype": "markdown",
+            "markdown": {
+                "title": title,
+                "text": "\n".join(lines) + "\n"
+            },
+            "at": {
+                "atAll": False
+            }
+        }
+    
+    def get_alert_level(self, monitor_data: 'MonitorData') -> str:
+        """
+        获取监控数据的告警级别（与告警消息中的级别一致）
+        
+        Args:
+            monitor_data: 监控数据
+            
+        Returns:
+            告警级别
+        """
+        return self._determine_alert_level(monitor_data.value, monitor_data.threshold, monitor_data.metric)
+    
+    def _format_value(self, value: float, unit: str, metric: str = '') -> str:
+        """
+        格式化消息中的数值
+        
+        Args:
+            value: 数值
+            unit: 单位
+            metric: 监控指标名称（容量预测的无穷大表示不会写满）
+            
+        Returns:
+            格式化后的字符串
+        """
+        if math.isinf(value):
+            return "不会写满" if metric.endswith('_forecast') else "∞"
+        return f"{value:.2f}{unit}"
+    
+    def _determine_alert_level(self, current_value: float, threshold: float, metric: str = '') -> str:
         """
         确定告警级别
         
         Args:
             current_value: 当前值
             threshold: 阈值
+            metric: 监控指标名称
             
         Returns:
             告警级别
         """
+        if metric.endswith('_forecast'):
+            # 容量预测的值是预计写满的剩余小时数，越小越严重
+            if current_value <= threshold / 4:
+                return "🔴 严重"
+            elif current_value <= threshold / 2:
+                return "🟠 警告"
+            else:
+                return "🟡 注意"
+        
         if current_value >= threshold * 1.2:  # 超过阈值20%
             return "🔴 严重"
         elif current_value >= threshold * 1.1:  # 超过阈值10%
@@ -213,14 +353,26 @@ class DingTalkNotifier:
             'cpu': 'CPU使用率',
             'memory': '内存使用率',
             'disk': '磁盘使用率',
-            'network': '网络IO'
+            'network': '网络IO',
+            'agent_offline': 'Agent离线时长'
         }
+        if metric.startswith('rule_'):
+            return f"组合规则({metric[len('rule_'):]})"
+        if metric.endswith('_anomaly'):
+            return f"{self._get_metric_display_name(metric[:-len('_anomaly')])}异常波动"
+        if metric.endswith('_forecast'):
+            return f"{self._get_metric_display_name(metric[:-len('_forecast')])}写满预测"
+        if metric.endswith('_rate'):
+            return f"{self._get_metric_display_name(metric[:-len('_rate')])}增长过快"
         return metric_names.get(metric, metric)
     
-    def _get_server_ip(self) -> str:
+    def _get_server_ip(self, public_ip: Optional[str] = None) -> str:
         """
         获取服务器IP地址（支持外网IP）
         
+        Args:
+            public_ip: 已获取到的外网IP（空字符串表示获取失败），为None时实时获取
+        
         Returns:
             服务器IP地址
         """
@@ -231,7 +383,7 @@ class DingTalkNotifier:
         if ip_mode == 'manual':
             manual_ip = server_config.get('manual_ip', '').strip()
             if manual_ip:
-                logger_manager.debug(f"使用手动指定的IP地址: {manual_ip}")
+                logger_manager.debug("使用手动指定的IP地址: %s", manual_ip)
                 return manual_ip
             else:
                 logger_manager.warning("手动IP模式但未指定IP地址，切换到自动模式")
@@ -239,7 +391,7 @@ class DingTalkNotifier:
         
         # 强制获取外网IP
         if ip_mode == 'public':
-            public_ip = self._get_public_ip()
+            public_ip = self._get_public_ip() if public_ip is None else public_ip
             if public_ip:
                 return public_ip
             else:
@@ -252,18 +404,26 @@ class DingTalkNotifier:
         
         # 自动模式：先尝试外网IP，失败则用内网IP
         if ip_mode == 'auto':
-            public_ip = self._get_public_ip()
+            public_ip = self._get_public_ip() if public_ip is None else public_ip
             if public_ip:
-                logger_manager.debug(f"获取到外网IP: {public_ip}")
+                logger_manager.debug("获取到外网IP: %s", public_ip)
                 return public_ip
             else:
                 private_ip = self._get_private_ip()
-                logger_manager.debug(f"外网IP获取失败，使用内网IP: {private_ip}")
+                logger_manager.debug("外网IP获取失败，使用内网IP: %s", private_ip)
                 return private_ip
         
         # 默认返回内网IP
         return self._get_private_ip()
     
+    def _needs_public_ip(self) -> bool:
+        """当前IP模式是否需要获取外网IP"""
+        server_config = config_manager.get_server_config()
+        ip_mode = server_config.get('ip_mode', 'auto')
+        if ip_mode == 'manual':
+            return not server_config.get('manual_ip', '').strip()
+        return ip_mode in ('public', 'auto')
+    
     def _get_public_ip(self) -> str:
         """
         获取外网IP地址
@@ -281,7 +441,7 @@ class DingTalkNotifier:
         
         for service_url in services:
             try:
-                logger_manager.debug(f"尝试从 {service_url} 获取外网IP")
+                logger_manager.debug("尝试从 %s 获取外网IP", service_url)
                 response = requests.get(service_url, timeout=timeout)
                 if response.status_code == 200:
                     # 处理不同服务的响应格式
@@ -294,19 +454,19 @@ class DingTalkNotifier:
                     
                     # 验证IP格式
                     if self._is_valid_ip(ip):
-                        logger_manager.debug(f"成功获取外网IP: {ip}")
+                        logger_manager.debug("成功获取外网IP: %s", ip)
                         return ip
                     else:
-                        logger_manager.debug(f"无效的IP格式: {ip}")
+                        logger_manager.debug("无效的IP格式: %s", ip)
                         
             except requests.exceptions.Timeout:
-                logger_manager.debug(f"请求超时: {service_url}")
+                logger_manager.debug("请求超时: %s", service_url)
                 continue
             except requests.exceptions.RequestException as e:
-                logger_manager.debug(f"请求失败: {service_url}, 错误: {str(e)}")
+                logger_manager.debug("请求失败: %s, 错误: %s", service_url, e)
                 continue
             except Exception as e:
-                logger_manager.debug(f"获取外网IP异常: {service_url}, 错误: {str(e)}")
+                logger_manager.debug("获取外网IP异常: %s, 错误: %s", service_url, e)
                 continue
         
         logger_manager.debug("所有外网IP服务都无法访问")
@@ -357,6 +517,28 @@ class DingTalkNotifier:
         except (ValueError, AttributeError):
             return False
     
+    def _check_response(self, status_code: int, result: Optional[Dict[str, Any]],
+                        metric_name: str) -> bool:
+        """
+        检查钉钉接口响应
+        
+        Args:
+            status_code: HTTP状态码
+            result: 响应JSON
+            metric_name: 监控指标名称 (用于日志)
+            
+        Returns:
+            发送是否成功
+        """
+        if status_code != 200:
+            logger_manager.log_alert_failed(metric_name, f"HTTP错误: {status_code}")
+            return False
+        if result.get('errcode') == 0:
+            return True
+        error_msg = result.get('errmsg', '未知错误')
+        logger_manager.log_alert_failed(metric_name, f"钉钉API错误: {error_msg}")
+        return False
+    
     def _send_message(self, message: Dict[str, Any], metric_name: str) -> bool:
         """
         通用消息发送方法
@@ -374,7 +556,7 @@ class DingTalkNotifier:
                 return False
 
             url = self._build_webhook_url()
-            logger_manager.debug(f"发送钉钉消息: {message}")
+            logger_manager.debug("发送钉钉消息: %s", message)
 
             response = requests.post(
                 url,
@@ -383,17 +565,8 @@ class DingTalkNotifier:
                 headers={'Content-Type': 'application/json'}
             )
 
-            if response.status_code == 200:
-                result = response.json()
-                if result.get('errcode') == 0:
-                    return True
-                else:
-                    error_msg = result.get('errmsg', '未知错误')
-                    logger_manager.log_alert_failed(metric_name, f"钉钉API错误: {error_msg}")
-                    return False
-            else:
-                logger_manager.log_alert_failed(metric_name, f"HTTP错误: {response.status_code}")
-                return False
+            result = response.json() if response.status_code == 200 else None
+            return self._check_response(response.status_code, result, metric_name)
 
         except requests.exceptions.Timeout:
             logger_manager.log_alert_failed(metric_name, "请求超时")
@@ -419,7 +592,10 @@ class DingTalkNotifier:
             metric=monitor_data.metric,
             current_value=monitor_data.value,
             threshold=monitor_data.threshold,
-            hostname=monitor_data.hostname
+            hostname=monitor_data.hostname,
+            unit=monitor_data.unit,
+            detail=monitor_data.detail,
+            server_ip=monitor_data.server_ip
         )
         success = self._send_message(message, monitor_data.metric)
         if success:
@@ -438,12 +614,184 @@ class DingTalkNotifier:
         Returns:
             发送是否成功
         """
-        message = self._format_recovery_message(monitor_data)
+        message = self._format_recovery_message(monitor_data, server_ip=monitor_data.server_ip)
         success = self._send_message(message, monitor_data.metric)
         if success:
             logger_manager.info(f"告警恢复通知已发送 - {monitor_data.metric}")
         return success
 
+    def send_group_alert(self, items: List['MonitorData'], max_listed: int = 50) -> bool:
+        """
+        发送多台主机同一指标、同一级别的汇总告警
+        
+        Args:
+            items: 监控数据列表（每台主机一条）
+            max_listed: 消息中最多列出的主机数
+            
+        Returns:
+            发送是否成功
+        """
+        metric = items[0].metric
+        success = self._send_message(self._format_group_message(items, max_listed=max_listed), metric)
+        if success:
+            logger_manager.info(f"汇总告警已发送 - {metric} ({len(items)} 台主机)")
+        return success
+
+    def send_group_recovery(self, items: List['MonitorData'], max_listed: int = 50) -> bool:
+        """
+        发送多台主机同一指标的汇总恢复通知
+        
+        Args:
+            items: 监控数据列表（每台主机一条）
+            max_listed: 消息中最多列出的主机数
+            
+        Returns:
+            发送是否成功
+        """
+        metric = items[0].metric
+        message = self._format_group_message(items, recovery=True, max_listed=max_listed)
+        success = self._send_message(message, metric)
+        if success:
+            logger_manager.info(f"汇总恢复通知已发送 - {metric} ({len(items)} 台主机)")
+        return success
+
+    async def _get_session(self):
+        """获取（必要时创建）当前事件循环中复用的 aiohttp 会话"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers={'Content-Type': 'application/json'}
+            )
+        return self._session
+    
+    async def async_close(self) -> None:
+        """关闭 asyncio 运行模式下的HTTP会话"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+    
+    async def _async_get_public_ip(self) -> str:
+        """
+        异步获取外网IP地址
+        
+        Returns:
+            外网IP地址，获取失败返回空字符串
+        """
+        if aiohttp is None:
+            loop = asyncio.get_event_loop()
+            return await loop.run_in_executor(None, self._get_public_ip)
+        
+        server_config = config_manager.get_server_config()
+        services = server_config.get('public_ip_services', [
+            "https://ipv4.icanhazip.com",
+            "https://api.ipify.org",
+            "https://checkip.amazonaws.com"
+        ])
+        timeout = aiohttp.ClientTimeout(total=server_config.get('public_ip_timeout', 5))
+        session = await self._get_session()
+        
+        for service_url in services:
+            try:
+                async with session.get(service_url, timeout=timeout) as response:
+                    if response.status != 200:
+                        continue
+                    if 'httpbin.org' in service_url:
+                        ip = (await response.json(content_type=None)).get('origin', '').strip()
+                    else:
+                        ip = (await response.text()).strip()
+                if self._is_valid_ip(ip):
+                    logger_manager.debug("成功获取外网IP: %s", ip)
+                    return ip
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                logger_manager.debug("请求失败: %s, 错误: %s", service_url, e)
+        
+        logger_manager.debug("所有外网IP服务都无法访问")
+        return ""
+    
+    async def _async_get_server_ip(self) -> str:
+        """异步获取服务器IP地址，IP模式逻辑与 _get_server_ip 一致"""
+        if self._needs_public_ip():
+            return self._get_server_ip(public_ip=await self._async_get_public_ip())
+        return self._get_server_ip()
+    
+    async def _async_send_message(self, message: Dict[str, Any], metric_name: str) -> bool:
+        """
+        异步发送消息
+        
+        Args:
+            message: 消息体
+            metric_name: 监控指标名称 (用于日志)
+        
+        Returns:
+            发送是否成功
+        """
+        if aiohttp is None:
+            loop = asyncio.get_event_loop()
+            return await loop.run_in_executor(None, self._send_message, message, metric_name)
+        
+        if not self.webhook_url:
+            logger_manager.error("钉钉Webhook URL未配置")
+            return False
+        
+        logger_manager.debug("发送钉钉消息: %s", message)
+        try:
+            session = await self._get_session()
+            async with session.post(self._build_webhook_url(), json=message) as response:
+                result = await response.json(content_type=None) if response.status == 200 else None
+                return self._check_response(response.status, result, metric_name)
+        except asyncio.TimeoutError:
+            logger_manager.log_alert_failed(metric_name, "请求超时")
+            return False
+        except aiohttp.ClientError as e:
+            logger_manager.log_alert_failed(metric_name, f"网络错误: {str(e)}")
+            return False
+        except Exception as e:
+            logger_manager.log_alert_failed(metric_name, f"发送失败: {str(e)}")
+            return False
+    
+    async def async_send_alert(self, monitor_data: 'MonitorData') -> bool:
+        """
+        异步发送告警消息
+        
+        Args:
+            monitor_data: 监控数据对象
+            
+        Returns:
+            发送是否成功
+        """
+        message = self._format_alert_message(
+            metric=monitor_data.metric,
+            current_value=monitor_data.value,
+            threshold=monitor_data.threshold,
+            hostname=monitor_data.hostname,
+            unit=monitor_data.unit,
+            detail=monitor_data.detail,
+            server_ip=monitor_data.server_ip or await self._async_get_server_ip()
+        )
+        success = await self._async_send_message(message, monitor_data.metric)
+        if success:
+            logger_manager.log_alert_sent(
+                monitor_data.metric, monitor_data.value, monitor_data.threshold
+            )
+        return success
+    
+    async def async_send_recovery_notification(self, monitor_data: 'MonitorData') -> bool:
+        """
+        异步发送告警恢复通知
+        
+        Args:
+            monitor_data: 监控数据对象
+            
+        Returns:
+            发送是否成功
+        """
+        server_ip = monitor_data.server_ip or await self._async_get_server_ip()
+        message = self._format_recovery_message(monitor_data, server_ip=server_ip)
+        success = await self._async_send_message(message, monitor_data.metric)
+        if success:
+            logger_manager.info(f"告警恢复通知已发送 - {monitor_data.metric}")
+        return success
+
     def test_connection(self) -> bool:
         """
         测试钉钉连接
@@ -6,10 +6,68 @@
 import logging
 import logging.handlers
 import os
+import queue
+import atexit
+import threading
 from pathlib import Path
-from typing import Optional
+from typing import Any, Callable, Dict, Optional, Union
 
-from .config import config_manager
+from .config import config_manager, ConfigSnapshot
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    有界队列日志处理器
+
+    队列已满时直接丢弃日志并计数，不阻塞调用方；
+    队列恢复空闲后补记一条警告，说明期间丢弃了多少条日志。
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        """
+        初始化处理器
+
+        Args:
+            log_queue: 有界日志队列
+        """
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._unreported = 0
+        self._drop_lock = threading.Lock()
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        """放入队列，队列已满时丢弃"""
+        if self._unreported:
+            self._report_dropped()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._drop_lock:
+                self.dropped += 1
+                self._unreported += 1
+
+    def _report_dropped(self) -> None:
+        """队列有空间时补记丢弃的日志条数"""
+        with self._drop_lock:
+            count, self._unreported = self._unreported, 0
+        if not count:
+            return
+
+        record = logging.LogRecord('monitor4dingtalk', logging.WARNING, __file__, 0,
+                                   f"日志队列已满，丢弃了 {count} 条日志", None, None)
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._drop_lock:
+                self._unreported += count
+
+
+class BlockingStopQueueListener(logging.handlers.QueueListener):
+    """停止时等待队列中已有日志写完的后台写入线程"""
+
+    def enqueue_sentinel(self) -> None:
+        """以阻塞方式放入结束标记，队列已满时也不会丢失"""
+        self.queue.put(self._sentinel)
 
 
 class LoggerManager:
@@ -18,7 +76,16 @@ class LoggerManager:
     def __init__(self):
         """初始化日志管理器"""
         self._logger: Optional[logging.Logger] = None
+        self._file_handler: Optional[logging.Handler] = None
+        self._queue_handler: Optional[DroppingQueueHandler] = None
+        self._listener: Optional[BlockingStopQueueListener] = None
         self._setup_logger()
+        
+        # 启用结构化指标输出后，逐条监控数据降为 DEBUG，保持可读日志精简
+        self._monitor_data_level = self._get_monitor_data_level(config_manager.snapshot)
+        
+        # 配置文件变化时自动调整日志级别
+        config_manager.subscribe(self.apply_config)
     
     def _setup_logger(self) -> None:
         """设置日志配置"""
@@ -50,6 +117,7 @@ class LoggerManager:
             encoding='utf-8'
         )
         file_handler.setLevel(getattr(logging, level.upper()))
+        self._file_handler = file_handler
         
         # 创建控制台handler
         console_handler = logging.StreamHandler()
@@ -64,9 +132,66 @@ class LoggerManager:
         file_handler.setFormatter(formatter)
         console_handler.setFormatter(formatter)
         
-        # 添加handler到logger
-        self._logger.addHandler(file_handler)
-        self._logger.addHandler(console_handler)
+        if not logging_config.get('async', True):
+            # 同步写入：在调用方线程中直接写文件和控制台
+            self._logger.addHandler(file_handler)
+            self._logger.addHandler(console_handler)
+            return
+        
+        # 异步写入：调用方只把日志放入有界队列，由后台线程写文件（包括轮转）和控制台，
+        # 磁盘缓慢时不会拖慢监控任务
+        log_queue = queue.Queue(maxsize=int(logging_config.get('queue_size', 10000)))
+        self._queue_handler = DroppingQueueHandler(log_queue)
+        self._listener = BlockingStopQueueListener(log_queue, file_handler, console_handler,
+                                                   respect_handler_level=True)
+        self._listener.start()
+        self._logger.addHandler(self._queue_handler)
+        
+        # 进程退出时写完队列中剩余的日志
+        atexit.register(self.shutdown)
+    
+    def shutdown(self) -> None:
+        """停止后台写入线程，写完队列中已有的日志"""
+        listener, self._listener = self._listener, None
+        if listener is not None:
+            listener.stop()
+            for handler in listener.handlers:
+                try:
+                    handler.flush()
+                except (OSError, ValueError):
+                    # 控制台等输出流可能已被关闭
+                    pass
+    
+    def get_queue_stats(self) -> Dict[str, int]:
+        """
+        获取日志队列状态
+        
+        Returns:
+            {'queued': 队列中待写入条数, 'dropped': 累计丢弃条数}，同步写入模式下均为0
+        """
+        if self._queue_handler is None:
+            return {'queued': 0, 'dropped': 0}
+        return {'queued': self._queue_handler.queue.qsize(), 'dropped': self._queue_handler.dropped}
+    
+    @staticmethod
+    def _get_monitor_data_level(snapshot: ConfigSnapshot) -> int:
+        """监控数据日志的级别，启用结构化指标输出时为 DEBUG"""
+        if snapshot.get('logging.metrics_sink.enabled', False):
+            return logging.DEBUG
+        return logging.INFO
+    
+    def apply_config(self, snapshot: ConfigSnapshot) -> None:
+        """
+        应用新的日志级别（日志文件和轮转参数需重启后生效）
+        
+        Args:
+            snapshot: 新的配置快照
+        """
+        level = getattr(logging, snapshot.logging.get('level', 'INFO').upper())
+        self._logger.setLevel(level)
+        if self._file_handler is not None:
+            self._file_handler.setLevel(level)
+        self._monitor_data_level = self._get_monitor_data_level(snapshot)
     
     def get_logger(self) -> logging.Logger:
         """获取logger实例"""
@@ -74,25 +199,53 @@ class LoggerManager:
             self._setup_logger()
         return self._logger
     
-    def debug(self, message: str) -> None:
+    def is_enabled_for(self, level: int) -> bool:
+        """
+        判断指定级别的日志是否会被记录，用于跳过昂贵的诊断信息构造
+        
+        Args:
+            level: 日志级别，如 logging.DEBUG
+            
+        Returns:
+            是否会被记录
+        """
+        return self.get_logger().isEnabledFor(level)
+    
+    def _log(self, level: int, message: Union[str, Callable[[], str]], args: tuple) -> None:
+        """
+        按级别记录日志，级别未启用时不做任何格式化
+        
+        Args:
+            level: 日志级别
+            message: 日志消息，可以是 % 格式串（配合 args 延迟格式化），或返回消息的无参函数
+            args: 格式化参数
+        """
+        logger = self.get_logger()
+        if not logger.isEnabledFor(level):
+            return
+        if callable(message):
+            message = message()
+        logger.log(level, message, *args)
+    
+    def debug(self, message: Union[str, Callable[[], str]], *args: Any) -> None:
         """记录调试日志"""
-        self.get_logger().debug(message)
+        self._log(logging.DEBUG, message, args)
     
-    def info(self, message: str) -> None:
+    def info(self, message: Union[str, Callable[[], str]], *args: Any) -> None:
         """记录信息日志"""
-        self.get_logger().info(message)
+        self._log(logging.INFO, message, args)
     
-    def warning(self, message: str) -> None:
+    def warning(self, message: Union[str, Callable[[], str]], *args: Any) -> None:
         """记录警告日志"""
-        self.get_logger().warning(message)
+        self._log(logging.WARNING, message, args)
     
-    def error(self, message: str) -> None:
+    def error(self, message: Union[str, Callable[[], str]], *args: Any) -> None:
         """记录错误日志"""
-        self.get_logger().error(message)
+        self._log(logging.ERROR, message, args)
     
-    def critical(self, message: str) -> None:
+    def critical(self, message: Union[str, Callable[[], str]], *args: Any) -> None:
         """记录严重错误日志"""
-        self.get_logger().critical(message)
+        self._log(logging.CRITICAL, message, args)
     
     def log_monitor_data(self, metric: str, value: float, threshold: float) -> None:
         """
@@ -103,7 +256,7 @@ class LoggerManager:
             value: 当前值
             threshold: 阈值
         """
-        self.info(f"监控数据 - {metric}: {value:.2f}% (阈值: {threshold:.2f}%)")
+        self._log(self._monitor_data_level, "监控数据 - %s: %.2f%% (阈值: %.2f%%)", (metric, value, threshold))
     
     def log_alert_sent(self, metric: str, value: float, threshold: float) -> None:
         """
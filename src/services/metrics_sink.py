@@ -0,0 +1,244 @@
+"""
+结构化指标输出服务
+每个监控周期写入一条紧凑的 JSON（或 msgpack）记录，包含本周期全部监控数据，
+供日志采集管道直接解析；支持缓冲写入、按大小/时间轮转以及 gzip/zstd 压缩
+"""
+
+import io
+import os
+import json
+import gzip
+import time
+import atexit
+import socket
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, TYPE_CHECKING
+
+from .config import config_manager, ConfigSnapshot
+from .logger import logger_manager
+
+try:
+    import msgpack
+except ImportError:  # 可选依赖，仅 format: msgpack 时使用
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:  # 可选依赖，仅 compress: zstd 时使用
+    zstandard = None
+
+if TYPE_CHECKING:
+    from ..core.monitor import MonitorData
+
+
+# 各压缩方式对应的文件扩展名
+COMPRESS_SUFFIXES = {'none': '', 'gzip': '.gz', 'zstd': '.zst'}
+
+
+class MetricsSink:
+    """结构化指标输出"""
+
+    def __init__(self):
+        """初始化指标输出"""
+        self.hostname = socket.gethostname()
+        self._lock = threading.Lock()
+        self._raw: Optional[io.BufferedWriter] = None
+        self._stream: Any = None
+        self._opened_at = 0.0
+        self._last_flush = 0.0
+
+        # 已写入的记录数
+        self.records = 0
+
+        self._load_settings(config_manager.get('logging.metrics_sink', {}))
+
+        # 配置文件变化时重新打开输出文件
+        config_manager.subscribe(self.apply_config)
+        atexit.register(self.close)
+
+    def _load_settings(self, sink_config: Dict[str, Any]) -> None:
+        """
+        读取输出配置
+
+        Args:
+            sink_config: logging.metrics_sink 配置
+        """
+        self.sink_config = sink_config
+        self.enabled = bool(sink_config.get('enabled', False))
+
+        self.format = sink_config.get('format', 'json')
+        if self.format == 'msgpack' and msgpack is None:
+            logger_manager.warning("未安装 msgpack，指标输出改用 json 格式")
+            self.format = 'json'
+
+        self.compress = sink_config.get('compress', 'none')
+        if self.compress not in COMPRESS_SUFFIXES:
+            logger_manager.warning(f"未知的压缩方式 {self.compress}，不压缩")
+            self.compress = 'none'
+        if self.compress == 'zstd' and zstandard is None:
+            logger_manager.warning("未安装 zstandard，指标输出改用 gzip 压缩")
+            self.compress = 'gzip'
+
+        suffix = '.jsonl' if self.format == 'json' else '.msgpack'
+        base = sink_config.get('file', 'logs/metrics')
+        self.path = Path(base + suffix + COMPRESS_SUFFIXES[self.compress])
+
+        self.max_size = int(sink_config.get('max_size', 52428800))  # 50MB
+        self.rotate_interval = float(sink_config.get('rotate_interval', 86400))
+        self.backup_count = int(sink_config.get('backup_count', 7))
+        self.buffer_size = int(sink_config.get('buffer_size', 65536))
+        self.flush_interval = float(sink_config.get('flush_interval', 10))
+
+    def apply_config(self, snapshot: ConfigSnapshot) -> None:
+        """
+        应用新的输出配置
+
+        Args:
+            snapshot: 新的配置快照
+        """
+        sink_config = snapshot.logging.get('metrics_sink', {})
+        if sink_config == self.sink_config:
+            return
+
+        with self._lock:
+            self._close()
+            self._load_settings(sink_config)
+
+    def _open(self) -> None:
+        """打开（追加）当前输出文件"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._raw = open(str(self.path), 'ab', buffering=self.buffer_size)
+
+        # 追加模式下每次打开都开始一个新的压缩帧，多帧拼接的文件可以被正常解压
+        if self.compress == 'gzip':
+            self._stream = gzip.GzipFile(fileobj=self._raw, mode='ab')
+        elif self.compress == 'zstd':
+            self._stream = zstandard.ZstdCompressor().stream_writer(self._raw)
+        else:
+            self._stream = self._raw
+
+        self._opened_at = time.time()
+        self._last_flush = time.monotonic()
+
+    def _close(self) -> None:
+        """结束压缩帧并关闭输出文件"""
+        if self._raw is None:
+            return
+
+        try:
+            if self._stream is not self._raw:
+                self._stream.close()
+            self._raw.close()
+        except (OSError, ValueError) as e:
+            logger_manager.error(f"关闭指标输出文件失败: {str(e)}")
+        self._raw = None
+        self._stream = None
+
+    def _should_rotate(self) -> bool:
+        """是否达到轮转条件（文件大小或打开时长）"""
+        if self.max_size > 0 and self._raw.tell() >= self.max_size:
+            return True
+        return self.rotate_interval > 0 and time.time() - self._opened_at >= self.rotate_interval
+
+    def _rotate(self) -> None:
+        """关闭当前文件，以时间戳重命名，并只保留最近 backup_count 个历史文件"""
+        self._close()
+
+        stamp = time.strftime('%Y%m%d-%H%M%S')
+        rotated = self.path.with_name(f"{self.path.name}.{stamp}")
+        sequence = 1
+        while rotated.exists():
+            # 同一秒内多次轮转时追加序号，避免覆盖
+            rotated = self.path.with_name(f"{self.path.name}.{stamp}-{sequence}")
+            sequence += 1
+        if self.path.exists():
+            os.replace(str(self.path), str(rotated))
+
+        history = sorted(self.path.parent.glob(f"{self.path.name}.*"))
+        for old in history[:max(len(history) - self.backup_count, 0)]:
+            try:
+                old.unlink()
+            except OSError:
+                pass
+
+    def encode(self, all_metrics: List['MonitorData'], timestamp: Optional[float] = None) -> bytes:
+        """
+        将一个周期的监控数据编码为一条记录
+
+        Args:
+            all_metrics: 本周期的监控数据列表
+            timestamp: 记录时间（Unix 秒），默认当前时间
+
+        Returns:
+            编码后的记录（json 格式以换行结尾）
+        """
+        record = {
+            'ts': round(time.time() if timestamp is None else timestamp, 3),
+            'host': self.hostname,
+            'metrics': [
+                {
+                    'metric': data.metric,
+                    'value': data.value,
+                    'threshold': data.threshold,
+                    'unit': data.unit,
+                    'alert': data.is_alert,
+                }
+                for data in all_metrics
+            ],
+        }
+
+        if self.format == 'msgpack':
+            return msgpack.packb(record, use_bin_type=True)
+        return json.dumps(record, ensure_ascii=False, separators=(',', ':')).encode('utf-8') + b'\n'
+
+    def write(self, all_metrics: List['MonitorData']) -> None:
+        """
+        写入一个周期的监控数据
+
+        Args:
+            all_metrics: 本周期的监控数据列表
+        """
+        if not self.enabled or not all_metrics:
+            return
+
+        data = self.encode(all_metrics)
+        with self._lock:
+            try:
+                if self._raw is None:
+                    self._open()
+                elif self._should_rotate():
+                    self._rotate()
+                    self._open()
+
+                self._stream.write(data)
+                self.records += 1
+
+                # 缓冲写入，按间隔刷新到磁盘
+                if time.monotonic() - self._last_flush >= self.flush_interval:
+                    self._flush()
+            except OSError as e:
+                logger_manager.error(f"写入指标输出失败: {str(e)}")
+                self._close()
+
+    def _flush(self) -> None:
+        """把缓冲区内容写到磁盘（压缩流会结束当前压缩块）"""
+        if self._stream is not self._raw and hasattr(self._stream, 'flush'):
+            self._stream.flush()
+        self._raw.flush()
+        self._last_flush = time.monotonic()
+
+    def flush(self) -> None:
+        """立即刷新缓冲区"""
+        with self._lock:
+            if self._raw is not None:
+                self._flush()
+
+    def close(self) -> None:
+        """刷新并关闭输出文件"""
+        with self._lock:
+            self._close()
+
+
+# 全局指标输出实例
+metrics_sink = MetricsSink()
@@ -0,0 +1,4 @@
+"""
+历史数据存储模块
+包含基于内存映射环形缓冲区的本地时序存储
+""" 
@@ -0,0 +1,237 @@
+"""
+历史数据归档
+定期把原始样本编码为压缩数据块（见 gorilla.py），按 序列/UTC日期 追加到归档文件，
+环形缓冲区覆盖旧样本后仍可在本地保留数月的历史
+"""
+
+import os
+import time
+import struct
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from .ringbuffer import np, SAMPLE_FIELDS
+from .gorilla import encode_block, decode_block, block_info, compression_ratio
+
+
+# 归档文件中每个数据块前的长度前缀
+LENGTH_PREFIX = struct.Struct('<I')
+
+# 归档文件扩展名
+ARCHIVE_SUFFIX = '.gor'
+
+SECONDS_PER_DAY = 86400
+
+
+def _day_of(timestamp: float) -> str:
+    """时间戳对应的 UTC 日期（归档文件名）"""
+    return time.strftime('%Y%m%d', time.gmtime(timestamp))
+
+
+class HistoryArchive:
+    """压缩历史归档"""
+
+    def __init__(self, directory: str, retention_days: float = 180):
+        """
+        初始化归档
+
+        Args:
+            directory: 归档目录，每个序列一个子目录
+            retention_days: 归档保留天数
+        """
+        self.directory = Path(directory)
+        self.retention_days = retention_days
+
+        # 各序列已归档的最新时间戳
+        self._last_archived: Dict[str, float] = {}
+
+        # 本进程中已检查过末尾完整性的归档文件
+        self._checked = set()
+
+    def _series_dir(self, name: str) -> Path:
+        """序列的归档子目录"""
+        return self.directory / name
+
+    def _iter_blocks(self, path: Path) -> Iterator[bytes]:
+        """
+        依次读取归档文件中的数据块
+
+        末尾不完整的数据块（写入时进程崩溃）会被忽略。
+        """
+        try:
+            with open(str(path), 'rb') as file:
+                data = file.read()
+        except OSError:
+            return
+
+        offset = 0
+        while offset + LENGTH_PREFIX.size <= len(data):
+            (length,) = LENGTH_PREFIX.unpack_from(data, offset)
+            offset += LENGTH_PREFIX.size
+            if offset + length > len(data):
+                break
+            yield data[offset:offset + length]
+            offset += length
+
+    def _repair(self, path: Path) -> None:
+        """截掉归档文件末尾不完整的数据块，避免之后追加的数据块无法读取"""
+        if path in self._checked or not path.exists():
+            self._checked.add(path)
+            return
+
+        valid = 0
+        for block in self._iter_blocks(path):
+            valid += LENGTH_PREFIX.size + len(block)
+        if valid != path.stat().st_size:
+            with open(str(path), 'r+b') as file:
+                file.truncate(valid)
+        self._checked.add(path)
+
+    def _day_files(self, name: str) -> List[Path]:
+        """序列的归档文件，按日期排序"""
+        series_dir = self._series_dir(name)
+        if not series_dir.exists():
+            return []
+        return sorted(series_dir.glob('*' + ARCHIVE_SUFFIX))
+
+    def last_archived(self, name: str) -> Optional[float]:
+        """
+        获取序列已归档的最新时间戳
+
+        Args:
+            name: 序列名
+
+        Returns:
+            最新时间戳，未归档过时返回None
+        """
+        if name in self._last_archived:
+            return self._last_archived[name]
+
+        last = None
+        for path in reversed(self._day_files(name)):
+            for block in self._iter_blocks(path):
+                last = block_info(block)[2]
+            if last is not None:
+                break
+
+        if last is not None:
+            self._last_archived[name] = last
+        return last
+
+    def append(self, name: str, samples) -> int:
+        """
+        归档一段样本（按 UTC 日期拆分为数据块）
+
+        Args:
+            name: 序列名
+            samples: 含 t、v 字段、按时间排序的 numpy 结构化数组
+
+        Returns:
+            归档的样本数
+        """
+        if len(samples) == 0:
+            return 0
+
+        series_dir = self._series_dir(name)
+        series_dir.mkdir(parents=True, exist_ok=True)
+
+        days = (samples['t'] // SECONDS_PER_DAY).astype(np.int64)
+        starts = np.flatnonzero(np.r_[True, days[1:] != days[:-1]])
+        ends = np.r_[starts[1:], len(samples)]
+
+        for start, end in zip(starts, ends):
+            part = samples[start:end]
+            block = encode_block(part['t'], part['v'])
+            path = series_dir / (_day_of(part['t'][0]) + ARCHIVE_SUFFIX)
+            self._repair(path)
+            with open(str(path), 'ab') as file:
+                file.write(LENGTH_PREFIX.pack(len(block)) + block)
+
+        self._last_archived[name] = float(samples['t'][-1])
+        return len(samples)
+
+    def read(self, name: str, start: Optional[float] = None, end: Optional[float] = None):
+        """
+        读取时间范围 [start, end) 内的归档样本
+
+        只解压时间范围相交的数据块。
+
+        Args:
+            name: 序列名
+            start: 起始时间（Unix 秒）
+            end: 结束时间（Unix 秒）
+
+        Returns:
+            含 t、v 字段的 numpy 结构化数组
+        """
+        first_day = _day_of(start) if start is not None else None
+        last_day = _day_of(end) if end is not None else None
+
+        parts = []
+        for path in self._day_files(name):
+            day = path.name[:-len(ARCHIVE_SUFFIX)]
+            if (first_day and day < first_day) or (last_day and day > last_day):
+                continue
+            for block in self._iter_blocks(path):
+                _, first, last = block_info(block)
+                if (start is not None and last < start) or (end is not None and first >= end):
+                    continue
+                samples = decode_block(block)
+                mask = np.ones(len(samples), dtype=bool)
+                if start is not None:
+                    mask &= samples['t'] >= start
+                if end is not None:
+                    mask &= samples['t'] < end
+                parts.append(samples[mask])
+
+        if not parts:
+            return np.empty(0, dtype=SAMPLE_FIELDS)
+        return np.concatenate(parts)
+
+    def prune(self, now: Optional[float] = None) -> int:
+        """
+        删除超过保留天数的归档文件
+
+        Args:
+            now: 当前时间（Unix 秒）
+
+        Returns:
+            删除的文件数
+        """
+        if not self.directory.exists():
+            return 0
+
+        cutoff = _day_of((time.time() if now is None else now) - self.retention_days * SECONDS_PER_DAY)
+        removed = 0
+        for path in self.directory.glob('*/*' + ARCHIVE_SUFFIX):
+            if path.name[:-len(ARCHIVE_SUFFIX)] < cutoff:
+                try:
+                    os.remove(str(path))
+                    removed += 1
+                except OSError:
+                    pass
+        return removed
+
+    def stats(self) -> Dict[str, float]:
+        """
+        统计归档规模和压缩率（只读取数据块头）
+
+        Returns:
+            {'series', 'blocks', 'samples', 'bytes', 'ratio'}
+        """
+        series = set()
+        blocks = samples = size = 0
+        for path in self.directory.glob('*/*' + ARCHIVE_SUFFIX) if self.directory.exists() else ():
+            series.add(path.parent.name)
+            for block in self._iter_blocks(path):
+                blocks += 1
+                samples += block_info(block)[0]
+                size += len(block) + LENGTH_PREFIX.size
+
+        return {
+            'series': len(series),
+            'blocks': blocks,
+            'samples': samples,
+            'bytes': size,
+            'ratio': compression_ratio(samples, size),
+        }
@@ -0,0 +1,170 @@
+"""
+历史数据查询
+按指标名通配符和时间范围查询本地历史，从能覆盖该范围的最快数据源
+（原始样本或某个降采样层级）读取，并用 numpy 向量运算计算统计值和文本迷你图
+"""
+
+import fnmatch
+from typing import Any, Dict, List, Optional, Tuple
+
+from .ringbuffer import np
+from .rollup import tier_name, summarize
+from .tsdb import TimeSeriesStore
+
+
+# 单次查询最多读取的点数，超过时改用更粗的降采样层级
+MAX_POINTS = 5000
+
+# 迷你图使用的字符（由低到高）
+SPARK_CHARS = '▁▂▃▄▅▆▇█'
+
+# 输出的百分位
+PERCENTILES = (50, 95, 99)
+
+
+def sparkline(times, values, start: float, end: float, width: int = 60) -> str:
+    """
+    生成文本迷你图：把时间范围等分为 width 段，每段取平均值
+
+    Args:
+        times: 时间戳数组
+        values: 数值数组
+        start: 起始时间
+        end: 结束时间
+        width: 字符数
+
+    Returns:
+        迷你图字符串，没有数据的时间段显示为空格
+    """
+    if len(values) == 0 or end <= start:
+        return ''
+
+    index = np.clip(((times - start) / (end - start) * width).astype(np.int64), 0, width - 1)
+    counts = np.bincount(index, minlength=width)
+    sums = np.bincount(index, weights=values, minlength=width)
+
+    filled = counts > 0
+    means = np.zeros(width)
+    means[filled] = sums[filled] / counts[filled]
+
+    low, high = means[filled].min(), means[filled].max()
+    span = high - low
+    levels = np.zeros(width, dtype=np.int64)
+    if span > 0:
+        levels = np.round((means - low) / span * (len(SPARK_CHARS) - 1)).astype(np.int64)
+
+    return ''.join(SPARK_CHARS[level] if ok else ' ' for level, ok in zip(levels, filled))
+
+
+def _oldest(ring) -> Optional[float]:
+    """环形缓冲区中最旧记录的时间戳"""
+    first = ring.segments()[0]['t'][:1]
+    return float(first[0]) if len(first) else None
+
+
+def choose_source(store: TimeSeriesStore, metric: str, start: float, end: float,
+                  max_points: int = MAX_POINTS) -> Tuple[str, Any]:
+    """
+    选择覆盖时间范围的最快数据源
+
+    按原始样本、由细到粗的降采样层级依次检查，返回第一个覆盖整个范围
+    且点数不超过 max_points 的数据源；原始样本不足时，按采样间隔估算点数，
+    估算值不超过 max_points 才解压归档。都不满足时使用覆盖时间最早的层级。
+
+    Args:
+        store: 时序存储
+        metric: 指标（序列）名
+        start: 起始时间（Unix 秒）
+        end: 结束时间（Unix 秒）
+        max_points: 最多读取的点数
+
+    Returns:
+        (数据源名称, 数据)，原始样本含 t、v 字段，层级数据含 t/min/max/sum/count/last 字段；
+        没有该指标时数据为None
+    """
+    series = store.get_series(metric)
+    if series is None:
+        return 'raw', None
+
+    raw = series.raw.query(start, end)
+    oldest = _oldest(series.raw)
+    if oldest is not None and oldest <= start:
+        if len(raw) <= max_points:
+            return 'raw', raw
+    elif store.archive is not None and len(raw) > 1:
+        # 按最近的平均采样间隔估算整个范围的点数
+        interval = (raw['t'][-1] - raw['t'][0]) / (len(raw) - 1)
+        if interval > 0 and (end - start) / interval <= max_points:
+            return 'raw', store.query_history(metric, start, end)
+
+    fallback = None
+    for tier in series.tiers:
+        oldest = _oldest(tier.ring)
+        if oldest is None:
+            continue
+        buckets = tier.query(start, end)
+        if oldest <= tier.bucket_of(start) and len(buckets) <= max_points:
+            return tier_name(tier.resolution), buckets
+        if fallback is None or oldest < fallback[2]:
+            fallback = (tier_name(tier.resolution), buckets, oldest)
+
+    if fallback is not None and len(fallback[1]):
+        return fallback[0], fallback[1]
+    return 'raw', raw
+
+
+def summarize_history(store: TimeSeriesStore, pattern: str, start: float, end: float,
+                      max_points: int = MAX_POINTS, width: int = 60) -> List[Dict[str, Any]]:
+    """
+    查询匹配通配符的所有指标的统计值
+
+    使用降采样层级时 min/max/avg 精确，百分位基于各桶平均值（近似）。
+
+    Args:
+        store: 时序存储
+        pattern: 指标名通配符，如 "disk_*"
+        start: 起始时间（Unix 秒）
+        end: 结束时间（Unix 秒）
+        max_points: 单个指标最多读取的点数
+        width: 迷你图字符数
+
+    Returns:
+        每个指标一项：metric、source、points、samples、min、avg、p50、p95、p99、max、
+        sparkline，以及百分位是否为近似值 approximate
+    """
+    results = []
+    for metric in store.list_series():
+        if not fnmatch.fnmatchcase(metric, pattern):
+            continue
+
+        source, data = choose_source(store, metric, start, end, max_points)
+        if data is None or len(data) == 0:
+            continue
+
+        if source == 'raw':
+            values = data['v']
+            low, high = values.min(), values.max()
+            samples = len(values)
+            average = values.mean()
+        else:
+            summary = summarize(data)
+            low, high, average, samples = summary['min'], summary['max'], summary['avg'], summary['count']
+            values = data['sum'] / data['count']
+
+        p50, p95, p99 = np.percentile(values, PERCENTILES)
+        results.append({
+            'metric': metric,
+            'source': source,
+            'points': len(data),
+            'samples': samples,
+            'min': float(low),
+            'avg': float(average),
+            'p50': float(p50),
+            'p95': float(p95),
+            'p99': float(p99),
+            'max': float(high),
+            'sparkline': sparkline(data['t'], values, start, end, width),
+            'approximate': source != 'raw',
+        })
+
+    return results
@@ -0,0 +1,269 @@
+"""
+内存映射环形缓冲区
+每个文件由固定长度的文件头和 capacity 条定长记录组成，写满后覆盖最旧的记录，
+磁盘和内存占用恒定；读取直接返回内存映射上的 numpy 视图，不复制数据
+"""
+
+import os
+import zlib
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # 可选依赖，缺失时本地时序存储不可用
+    np = None
+
+
+# 文件头：魔数、版本、单条记录字节数、记录格式校验值、容量、累计写入条数
+MAGIC = b'M4DRING1'
+VERSION = 1
+HEADER_SIZE = 64
+HEADER_FIELDS = [
+    ('magic', 'S8'),
+    ('version', '<u4'),
+    ('record_size', '<u4'),
+    ('capacity', '<u8'),
+    ('total', '<u8'),        # 偏移 24，8 字节对齐，单次写入即可原子更新
+    ('dtype_crc', '<u4'),
+    ('reserved', 'V28'),
+]
+
+# 默认记录格式：时间戳（Unix 秒）和数值
+SAMPLE_FIELDS = [('t', '<f8'), ('v', '<f8')]
+
+
+def _dtype_crc(dtype) -> int:
+    """记录格式的校验值，用于发现文件与当前记录格式不一致"""
+    return zlib.crc32(str(dtype.descr).encode('utf-8'))
+
+
+class RingBuffer:
+    """
+    单个序列的内存映射环形缓冲区
+
+    追加时先写记录，再把累计写入条数 total 加一（一次 8 字节对齐写入），
+    进程在两步之间崩溃时新记录只是不可见，已有数据不会损坏。
+    第一个字段必须是单调递增的时间戳 t。
+    """
+
+    def __init__(self, path: str, capacity: int, fields: Sequence[Tuple[str, str]] = SAMPLE_FIELDS,
+                 readonly: bool = False):
+        """
+        打开或创建环形缓冲区文件
+
+        Args:
+            path: 文件路径
+            capacity: 最多保留的记录条数
+            fields: 记录格式 [(字段名, numpy 类型)]，第一个字段为时间戳 t
+            readonly: 是否只读打开（供查询进程使用，文件必须已存在）
+
+        Raises:
+            ImportError: 未安装 numpy
+            ValueError: 只读打开时文件格式不匹配
+        """
+        if np is None:
+            raise ImportError("本地时序存储需要安装 numpy")
+
+        self.path = Path(path)
+        self.dtype = np.dtype(list(fields))
+        self.readonly = readonly
+        self._header_dtype = np.dtype(HEADER_FIELDS)
+
+        if readonly:
+            self._map(np.memmap(str(self.path), dtype=np.uint8, mode='r'))
+            if not self._valid(capacity=None):
+                raise ValueError(f"环形缓冲区文件格式不匹配: {self.path}")
+            return
+
+        if self.path.exists():
+            self._map(np.memmap(str(self.path), dtype=np.uint8, mode='r+'))
+            if self._valid(capacity):
+                return
+            # 容量或记录格式变化：保留最新的记录迁移到新文件
+            self._migrate(capacity)
+        else:
+            self._create(capacity)
+
+    def _map(self, mm) -> None:
+        """在内存映射上建立文件头和记录视图"""
+        self._mm = mm
+        self._header = mm[:HEADER_SIZE].view(self._header_dtype)
+        self._data = None
+        if len(mm) > HEADER_SIZE and (len(mm) - HEADER_SIZE) % self.dtype.itemsize == 0:
+            self._data = mm[HEADER_SIZE:].view(self.dtype)
+
+    def _valid(self, capacity: Optional[int]) -> bool:
+        """检查文件头是否与期望的格式和容量一致"""
+        header = self._header[0]
+        return (self._data is not None
+                and header['magic'] == MAGIC
+                and header['version'] == VERSION
+                and header['record_size'] == self.dtype.itemsize
+                and header['dtype_crc'] == _dtype_crc(self.dtype)
+                and len(self._data) == header['capacity']
+                and (capacity is None or header['capacity'] == capacity))
+
+    def _create(self, capacity: int, records=None) -> None:
+        """
+        创建新文件（先写临时文件再重命名，避免留下不完整的文件）
+
+        Args:
+            capacity: 容量
+            records: 需要写入的初始记录（按时间顺序）
+        """
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        size = HEADER_SIZE + capacity * self.dtype.itemsize
+        with open(str(tmp_path), 'wb') as file:
+            file.truncate(size)
+
+        mm = np.memmap(str(tmp_path), dtype=np.uint8, mode='r+')
+        header = mm[:HEADER_SIZE].view(self._header_dtype)
+        header['magic'] = MAGIC
+        header['version'] = VERSION
+        header['record_size'] = self.dtype.itemsize
+        header['capacity'] = capacity
+        header['dtype_crc'] = _dtype_crc(self.dtype)
+        header['total'] = 0
+
+        if records is not None and len(records):
+            data = mm[HEADER_SIZE:].view(self.dtype)
+            data[:len(records)] = records
+            header['total'] = len(records)
+
+        mm.flush()
+        del header, mm
+        os.replace(str(tmp_path), str(self.path))
+        self._map(np.memmap(str(self.path), dtype=np.uint8, mode='r+'))
+
+    def _migrate(self, capacity: int) -> None:
+        """按新的容量重建文件，记录格式一致时保留最新的记录"""
+        records = None
+        header = self._header[0]
+        if (self._data is not None and header['magic'] == MAGIC
+                and header['dtype_crc'] == _dtype_crc(self.dtype)
+                and header['record_size'] == self.dtype.itemsize):
+            records = np.array(self.read()[-capacity:])
+
+        self.close()
+        self._create(capacity, records)
+
+    @property
+    def capacity(self) -> int:
+        """容量（记录条数）"""
+        return len(self._data)
+
+    @property
+    def total(self) -> int:
+        """累计写入的记录条数（包括已被覆盖的）"""
+        return int(self._header['total'][0])
+
+    def __len__(self) -> int:
+        """当前保留的记录条数"""
+        return min(self.total, self.capacity)
+
+    def append(self, record: tuple) -> None:
+        """
+        追加一条记录，写满后覆盖最旧的记录
+
+        Args:
+            record: 与记录格式字段顺序一致的元组
+        """
+        total = self.total
+        self._data[total % self.capacity] = record
+        self._header['total'] = total + 1
+
+    def last(self):
+        """
+        获取最新的一条记录
+
+        Returns:
+            最新记录（numpy 结构化标量视图），没有记录时返回None
+        """
+        total = self.total
+        if total == 0:
+            return None
+        return self._data[(total - 1) % self.capacity]
+
+    def replace_last(self, record: tuple) -> None:
+        """
+        原地更新最新的一条记录（供降采样桶增量更新使用）
+
+        Args:
+            record: 与记录格式字段顺序一致的元组
+        """
+        total = self.total
+        if total == 0:
+            self.append(record)
+            return
+        self._data[(total - 1) % self.capacity] = record
+
+    def segments(self) -> List:
+        """
+        按时间顺序返回记录的零拷贝视图
+
+        Returns:
+            至多两段 numpy 结构化数组视图（未写满时只有一段）
+        """
+        total = self.total
+        if total <= self.capacity:
+            return [self._data[:total]]
+        head = total % self.capacity
+        if head == 0:
+            return [self._data]
+        return [self._data[head:], self._data[:head]]
+
+    def read(self):
+        """
+        按时间顺序返回全部记录
+
+        Returns:
+            numpy 结构化数组；未发生回绕时为零拷贝视图，否则为拼接后的副本
+        """
+        parts = self.segments()
+        if len(parts) == 1:
+            return parts[0]
+        return np.concatenate(parts)
+
+    def query(self, start: Optional[float] = None, end: Optional[float] = None):
+        """
+        返回时间范围 [start, end) 内的记录
+
+        时间戳单调递增，用二分查找定位，每段最多复制一次。
+
+        Args:
+            start: 起始时间（Unix 秒），None 表示不限
+            end: 结束时间（Unix 秒），None 表示不限
+
+        Returns:
+            numpy 结构化数组
+        """
+        parts = []
+        for part in self.segments():
+            times = part['t']
+            lo = 0 if start is None else int(np.searchsorted(times, start, side='left'))
+            hi = len(part) if end is None else int(np.searchsorted(times, end, side='left'))
+            if hi > lo:
+                parts.append(part[lo:hi])
+
+        if not parts:
+            return self._data[:0]
+        if len(parts) == 1:
+            return parts[0]
+        return np.concatenate(parts)
+
+    def flush(self) -> None:
+        """将内存映射的修改同步到磁盘"""
+        if not self.readonly:
+            self._mm.flush()
+
+    def close(self) -> None:
+        """同步并释放内存映射"""
+        if getattr(self, '_mm', None) is None:
+            return
+        self.flush()
+        self._header = None
+        self._data = None
+        self._mm = None
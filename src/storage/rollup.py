@@ -0,0 +1,151 @@
+"""
+降采样层级
+按固定分辨率（如1分钟、1小时）把原始样本聚合为 min/max/sum/count/last 桶，
+每来一个样本只更新最新的桶（O(1)），各层级使用独立的环形缓冲区和保留条数
+"""
+
+from typing import Dict, Optional
+
+from .ringbuffer import RingBuffer, np
+
+
+# 聚合桶记录格式：桶起始时间、最小值、最大值、累加和、样本数、最后一个值
+ROLLUP_FIELDS = [
+    ('t', '<f8'),
+    ('min', '<f8'),
+    ('max', '<f8'),
+    ('sum', '<f8'),
+    ('count', '<u8'),
+    ('last', '<f8'),
+]
+
+# 聚合层级文件扩展名（与原始样本的 .ring 区分）
+ROLLUP_SUFFIX = '.roll'
+
+
+def tier_name(resolution: float) -> str:
+    """
+    层级名称
+
+    Args:
+        resolution: 分辨率（秒）
+
+    Returns:
+        如 '60s'、'3600s'
+    """
+    return f"{resolution:g}s"
+
+
+class RollupTier:
+    """单个序列的一个降采样层级"""
+
+    def __init__(self, path: str, resolution: float, capacity: int, readonly: bool = False):
+        """
+        打开或创建降采样层级
+
+        Args:
+            path: 文件路径
+            resolution: 分辨率（秒）
+            capacity: 保留的桶数
+            readonly: 是否只读打开
+        """
+        self.resolution = float(resolution)
+        self.ring = RingBuffer(path, capacity, ROLLUP_FIELDS, readonly=readonly)
+
+    def bucket_of(self, timestamp: float) -> float:
+        """样本所属桶的起始时间"""
+        return (timestamp // self.resolution) * self.resolution
+
+    def add(self, timestamp: float, value: float) -> None:
+        """
+        增量加入一个样本：属于最新的桶时原地更新，否则开启新桶
+
+        Args:
+            timestamp: 采样时间（Unix 秒），不早于已加入的样本
+            value: 数值
+        """
+        bucket = self.bucket_of(timestamp)
+        last = self.ring.last()
+
+        if last is not None and last['t'] == bucket:
+            self.ring.replace_last((bucket, min(last['min'], value), max(last['max'], value),
+                                    last['sum'] + value, last['count'] + 1, value))
+        else:
+            self.ring.append((bucket, value, value, value, 1, value))
+
+    def backfill(self, samples) -> None:
+        """
+        用已有的原始样本一次性构建层级（仅在层级为空时使用）
+
+        Args:
+            samples: 含 t、v 字段、按时间排序的 numpy 结构化数组
+        """
+        if len(samples) == 0 or self.ring.total:
+            return
+
+        buckets = (samples['t'] // self.resolution) * self.resolution
+        starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+        ends = np.r_[starts[1:], len(samples)] - 1
+        values = samples['v']
+
+        rollup = np.empty(len(starts), dtype=self.ring.dtype)
+        rollup['t'] = buckets[starts]
+        rollup['min'] = np.minimum.reduceat(values, starts)
+        rollup['max'] = np.maximum.reduceat(values, starts)
+        rollup['sum'] = np.add.reduceat(values, starts)
+        rollup['count'] = np.diff(np.r_[starts, len(samples)])
+        rollup['last'] = values[ends]
+
+        for record in rollup[-self.ring.capacity:]:
+            self.ring.append(record)
+
+    @property
+    def retention(self) -> float:
+        """层级覆盖的最长时间跨度（秒）"""
+        return self.resolution * self.ring.capacity
+
+    def query(self, start: Optional[float] = None, end: Optional[float] = None):
+        """
+        返回与时间范围 [start, end) 相交的桶
+
+        Args:
+            start: 起始时间（Unix 秒）
+            end: 结束时间（Unix 秒）
+
+        Returns:
+            含 t/min/max/sum/count/last 字段的 numpy 结构化数组
+        """
+        if start is not None:
+            start = self.bucket_of(start)
+        return self.ring.query(start, end)
+
+    def flush(self) -> None:
+        """同步到磁盘"""
+        self.ring.flush()
+
+    def close(self) -> None:
+        """关闭层级文件"""
+        self.ring.close()
+
+
+def summarize(rollup) -> Dict[str, float]:
+    """
+    合并多个桶的统计值（向量化）
+
+    Args:
+        rollup: 含 min/max/sum/count/last 字段的 numpy 结构化数组
+
+    Returns:
+        {'min', 'max', 'avg', 'count', 'last'}，没有数据时返回空字典
+    """
+    if len(rollup) == 0:
+        return {}
+
+    count = int(rollup['count'].sum())
+    return {
+        'min': float(rollup['min'].min()),
+        'max': float(rollup['max'].max()),
+        'avg': float(rollup['sum'].sum() / count) if count else float('nan'),
+        'count': count,
+        'last': float(rollup['last'][-1]),
+    }
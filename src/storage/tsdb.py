@@ -0,0 +1,370 @@
+"""
+本地时序存储
+每个监控指标对应一个内存映射环形缓冲区文件，保存 (时间戳, 数值) 样本，
+并按配置的分辨率维护降采样层级；由监控任务在每次采集后写入，
+供告警消息、历史查询和趋势分析读取
+"""
+
+import re
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, TYPE_CHECKING
+
+from .ringbuffer import RingBuffer, np
+from .rollup import RollupTier, ROLLUP_SUFFIX, tier_name
+from .archive import HistoryArchive
+from ..services.config import config_manager, ConfigSnapshot
+from ..services.logger import logger_manager
+
+if TYPE_CHECKING:
+    from ..core.monitor import MonitorData
+
+
+# 原始样本文件扩展名
+RAW_SUFFIX = '.ring'
+
+# 默认降采样层级：1分钟桶保留7天，1小时桶保留1年
+DEFAULT_TIERS = (
+    {'resolution': 60, 'capacity': 10080},
+    {'resolution': 3600, 'capacity': 8760},
+)
+
+
+def series_filename(metric: str) -> str:
+    """
+    将指标名转换为安全的文件名
+
+    Args:
+        metric: 指标名称
+
+    Returns:
+        仅包含字母、数字、下划线、点和短横线的文件名（不含扩展名）
+    """
+    return re.sub(r'[^A-Za-z0-9_.-]', '_', metric)
+
+
+class Series:
+    """单个指标的原始样本及其降采样层级"""
+
+    def __init__(self, raw: RingBuffer, tiers: List[RollupTier]):
+        """
+        初始化序列
+
+        Args:
+            raw: 原始样本环形缓冲区
+            tiers: 按分辨率从小到大排列的降采样层级
+        """
+        self.raw = raw
+        self.tiers = tiers
+
+    def append(self, timestamp: float, value: float) -> None:
+        """追加一个样本，并增量更新各降采样层级"""
+        self.raw.append((timestamp, value))
+        for tier in self.tiers:
+            tier.add(timestamp, value)
+
+    def flush(self) -> None:
+        """同步到磁盘"""
+        self.raw.flush()
+        for tier in self.tiers:
+            tier.flush()
+
+    def close(self) -> None:
+        """关闭全部文件"""
+        self.raw.close()
+        for tier in self.tiers:
+            tier.close()
+
+
+class TimeSeriesStore:
+    """本地时序存储"""
+
+    def __init__(self, directory: Optional[str] = None, capacity: Optional[int] = None,
+                 readonly: bool = False):
+        """
+        初始化时序存储
+
+        Args:
+            directory: 存储目录，默认读取 storage.path
+            capacity: 每个序列保留的样本数，默认读取 storage.capacity
+            readonly: 是否只读（查询进程使用，不创建文件）
+        """
+        self.readonly = readonly
+        self._explicit = (directory, capacity)
+        self._series: Dict[str, Series] = {}
+        self._lock = threading.Lock()
+        self._load_settings(config_manager.snapshot)
+
+        # 配置文件变化时更新存储参数
+        config_manager.subscribe(self.apply_config)
+
+    def _load_settings(self, snapshot: ConfigSnapshot) -> None:
+        """
+        读取存储配置
+
+        Args:
+            snapshot: 配置快照
+        """
+        directory, capacity = self._explicit
+        self.enabled = bool(snapshot.get('storage.enabled', False)) or directory is not None
+        self.directory = Path(directory or snapshot.get('storage.path', 'data/tsdb'))
+        self.capacity = int(capacity or snapshot.get('storage.capacity', 10080))
+
+        # 降采样层级 [(分辨率, 保留桶数)]，按分辨率从小到大
+        tiers = snapshot.get('storage.tiers', DEFAULT_TIERS) or ()
+        self.tiers = sorted((float(tier['resolution']), int(tier['capacity'])) for tier in tiers)
+
+        # 压缩归档：定期把原始样本编码为压缩数据块，环形缓冲区覆盖后仍可查询
+        self.archive: Optional[HistoryArchive] = None
+        if snapshot.get('storage.archive.enabled', False):
+            self.archive = HistoryArchive(str(self.directory / 'archive'),
+                                          snapshot.get('storage.archive.retention_days', 180))
+
+        if self.enabled and np is None:
+            logger_manager.warning("未安装 numpy，本地时序存储已禁用")
+            self.enabled = False
+
+    def apply_config(self, snapshot: ConfigSnapshot) -> None:
+        """
+        应用新的存储配置，目录或容量变化时重新打开各序列
+
+        Args:
+            snapshot: 新的配置快照
+        """
+        with self._lock:
+            old = (self.enabled, self.directory, self.capacity, self.tiers)
+            self._load_settings(snapshot)
+            if (self.enabled, self.directory, self.capacity, self.tiers) != old:
+                self._close_all()
+
+    def _open(self, metric: str) -> Optional[Series]:
+        """打开（必要时创建）指标对应的原始样本和降采样层级"""
+        series = self._series.get(metric)
+        if series is not None:
+            return series
+
+        base = self.directory / series_filename(metric)
+        path = base.with_name(base.name + RAW_SUFFIX)
+        if self.readonly and not path.exists():
+            return None
+
+        try:
+            raw = RingBuffer(str(path), self.capacity, readonly=self.readonly)
+            tiers = []
+            for resolution, capacity in self.tiers:
+                tier_path = base.with_name(f"{base.name}.{tier_name(resolution)}{ROLLUP_SUFFIX}")
+                if self.readonly and not tier_path.exists():
+                    continue
+                tier = RollupTier(str(tier_path), resolution, capacity, readonly=self.readonly)
+                if not self.readonly:
+                    # 新增的层级用已有的原始样本补齐
+                    tier.backfill(raw.read())
+                tiers.append(tier)
+        except (OSError, ValueError) as e:
+            logger_manager.error(f"打开时序文件失败 {path}: {str(e)}")
+            return None
+
+        series = Series(raw, tiers)
+        self._series[metric] = series
+        return series
+
+    def append(self, metric: str, timestamp: float, value: float) -> bool:
+        """
+        追加一个样本
+
+        Args:
+            metric: 指标名称
+            timestamp: 采样时间（Unix 秒）
+            value: 数值
+
+        Returns:
+            是否写入（时间早于最新样本时丢弃，保证时间戳单调递增）
+        """
+        series = self._open(metric)
+        if series is None:
+            return False
+
+        last = series.raw.last()
+        if last is not None and timestamp < last['t']:
+            logger_manager.debug("时钟回拨，丢弃样本: %s %.3f < %.3f", metric, timestamp, last['t'])
+            return False
+
+        series.append(timestamp, value)
+        return True
+
+    def append_metrics(self, all_metrics: List['MonitorData']) -> int:
+        """
+        写入一次采集的全部监控数据
+
+        Args:
+            all_metrics: 监控数据列表
+
+        Returns:
+            写入的样本数
+        """
+        if not self.enabled or self.readonly or not all_metrics:
+            return 0
+
+        written = 0
+        with self._lock:
+            for data in all_metrics:
+                timestamp = data.timestamp.timestamp() if data.timestamp is not None else None
+                if timestamp is None:
+                    continue
+                try:
+                    written += self.append(data.metric, timestamp, float(data.value))
+                except OSError as e:
+                    logger_manager.error(f"写入时序数据失败 {data.metric}: {str(e)}")
+        return written
+
+    def get_series(self, metric: str) -> Optional[Series]:
+        """
+        获取指标对应的序列
+
+        Args:
+            metric: 指标名称
+
+        Returns:
+            序列（原始样本及降采样层级），尚无数据时返回None
+        """
+        with self._lock:
+            return self._open(metric)
+
+    def query(self, metric: str, start: Optional[float] = None, end: Optional[float] = None):
+        """
+        查询时间范围 [start, end) 内的样本
+
+        Args:
+            metric: 指标名称
+            start: 起始时间（Unix 秒）
+            end: 结束时间（Unix 秒）
+
+        Returns:
+            含 t、v 字段的 numpy 结构化数组，没有该指标时返回None
+        """
+        series = self.get_series(metric)
+        if series is None:
+            return None
+        return series.raw.query(start, end)
+
+    def query_tier(self, metric: str, resolution: float, start: Optional[float] = None,
+                   end: Optional[float] = None):
+        """
+        查询指定降采样层级中与时间范围 [start, end) 相交的桶
+
+        Args:
+            metric: 指标名称
+            resolution: 层级分辨率（秒）
+            start: 起始时间（Unix 秒）
+            end: 结束时间（Unix 秒）
+
+        Returns:
+            含 t/min/max/sum/count/last 字段的 numpy 结构化数组，没有该层级时返回None
+        """
+        series = self.get_series(metric)
+        if series is None:
+            return None
+        for tier in series.tiers:
+            if tier.resolution == resolution:
+                return tier.query(start, end)
+        return None
+
+    def query_history(self, metric: str, start: Optional[float] = None, end: Optional[float] = None):
+        """
+        查询时间范围 [start, end) 内的样本，早于环形缓冲区最旧样本的部分从归档读取
+
+        Args:
+            metric: 指标名称
+            start: 起始时间（Unix 秒）
+            end: 结束时间（Unix 秒）
+
+        Returns:
+            含 t、v 字段的 numpy 结构化数组，没有该指标时返回None
+        """
+        recent = self.query(metric, start, end)
+        if self.archive is None:
+            return recent
+
+        series = self.get_series(metric)
+        oldest = series.raw.segments()[0]['t'][:1] if series is not None else []
+        boundary = float(oldest[0]) if len(oldest) else end
+        if boundary is not None and end is not None:
+            boundary = min(boundary, end)
+        if start is not None and boundary is not None and start >= boundary:
+            return recent
+
+        archived = self.archive.read(series_filename(metric), start, boundary)
+        if recent is None:
+            return archived if len(archived) else None
+        return np.concatenate([archived, recent])
+
+    def archive_pending(self) -> int:
+        """
+        把尚未归档的原始样本编码为压缩数据块写入归档，并清理过期归档
+
+        按本进程已打开的序列（以指标名为键）归档：文件名经过 series_filename 转换，
+        无法还原指标名，按文件名打开会为同一组文件再建一份映射。采集中的指标在启动后第一个周期即已打开。
+
+        Returns:
+            归档的样本数
+        """
+        if self.archive is None or not self.enabled or self.readonly:
+            return 0
+
+        with self._lock:
+            metrics = list(self._series)
+
+        archived = 0
+        for metric in metrics:
+            name = series_filename(metric)
+            with self._lock:
+                # 期间配置变化时序列可能已关闭
+                series = self._series.get(metric)
+                if series is None:
+                    continue
+                last = self.archive.last_archived(name)
+                samples = series.raw.read()
+                if last is not None:
+                    # 归档的时间戳精确到毫秒（重启后 last 取自数据块），按同样的取整比较，避免重复归档最后一个样本
+                    samples = samples[np.round(samples['t'] * 1000) > round(last * 1000)]
+                # 复制后再编码，避免编码期间环形缓冲区被覆盖
+                samples = np.array(samples)
+            try:
+                archived += self.archive.append(name, samples)
+            except OSError as e:
+                logger_manager.error(f"归档时序数据失败 {name}: {str(e)}")
+
+        self.archive.prune()
+        return archived
+
+    def list_series(self) -> List[str]:
+        """
+        列出存储目录中已有的序列
+
+        Returns:
+            序列文件名（不含扩展名）列表
+        """
+        if not self.directory.exists():
+            return []
+        return sorted(path.name[:-len(RAW_SUFFIX)] for path in self.directory.glob('*' + RAW_SUFFIX))
+
+    def flush(self) -> None:
+        """将所有序列同步到磁盘"""
+        with self._lock:
+            for series in self._series.values():
+                series.flush()
+
+    def _close_all(self) -> None:
+        """关闭所有已打开的序列"""
+        for series in self._series.values():
+            series.close()
+        self._series = {}
+
+    def close(self) -> None:
+        """同步并关闭所有序列"""
+        with self._lock:
+            self._close_all()
+
+
+# 全局时序存储实例
+time_series_store = TimeSeriesStore()
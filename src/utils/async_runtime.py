@@ -0,0 +1,244 @@
+"""
+asyncio 运行模式
+在单个事件循环线程中完成调度、采集和推送：采集在线程池中执行，
+钉钉推送和外网IP查询使用原生异步HTTP并发进行，调度使用事件循环定时器
+"""
+
+import time
+import asyncio
+import signal
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+from .scheduler import MonitorScheduler, ScheduledJob
+from .exporter import prometheus_exporter
+from ..fleet.agent import fleet_agent
+from ..services.config import ConfigSnapshot
+from ..services.logger import logger_manager
+from ..services.metrics_sink import metrics_sink
+from ..services.dingtalk import dingtalk_notifier
+from ..storage.tsdb import time_series_store
+from ..core.monitor import resource_monitor, MonitorData
+from ..core.alert import alert_engine
+
+
+class AsyncMonitorScheduler(MonitorScheduler):
+    """基于 asyncio 的监控任务调度器，截止时间、批次、超时策略与线程模式一致"""
+
+    def __init__(self):
+        """初始化调度器"""
+        super().__init__()
+
+        # 执行阻塞采集的线程池
+        self.executor_workers = int(self.monitor_config.get('executor_workers', 4))
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+        # 事件循环及用于唤醒调度协程的事件
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+        # 任务锁：控制接口触发的立即采集、重新加载配置与到期任务串行执行
+        self._job_lock: Optional[asyncio.Lock] = None
+
+    def _wake(self) -> None:
+        """唤醒调度协程（可在任意线程调用）"""
+        if self._loop is not None and self._wakeup is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def apply_config(self, snapshot: ConfigSnapshot) -> None:
+        """应用新的监控配置，运行中时转到事件循环线程执行"""
+        loop = self._loop
+        if self.running and loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(MonitorScheduler.apply_config, self, snapshot)
+        else:
+            MonitorScheduler.apply_config(self, snapshot)
+
+    def setup_jobs(self) -> None:
+        """设置定时任务，并立即唤醒调度协程"""
+        super().setup_jobs()
+        self._wake()
+
+    async def _monitor_job(self, collectors: Optional[List[str]] = None) -> List[MonitorData]:
+        """
+        主监控任务
+
+        Args:
+            collectors: 本批次到期的采集项，为None时采集全部启用的指标
+
+        Returns:
+            本次采集的监控数据，执行异常时返回空列表
+        """
+        try:
+            logger_manager.debug("开始执行监控任务: %s", collectors or '全部')
+            loop = asyncio.get_event_loop()
+
+            # 阻塞的采集在线程池中执行，不占用事件循环
+            if collectors is None:
+                all_metrics = await loop.run_in_executor(self._executor, resource_monitor.collect_all_metrics)
+            else:
+                all_metrics = await loop.run_in_executor(self._executor, resource_monitor.collect_metrics,
+                                                         collectors)
+
+            # 写入结构化指标输出和本地时序存储（未启用时直接返回）；
+            # 文件写入、压缩和轮转都是阻塞操作，放到线程池执行，不占用事件循环
+            await loop.run_in_executor(self._executor, self._persist, all_metrics)
+
+            # 推送到集群汇聚端（非 agent 模式时直接返回）
+            fleet_agent.push(all_metrics)
+
+            # 告警和恢复通知并发推送（agent 模式下默认由汇聚端统一告警）
+            if fleet_agent.alerts_locally:
+                await alert_engine.async_check_and_process(all_metrics)
+
+            # 重新渲染 Prometheus 暴露文本（未启用时直接返回）
+            prometheus_exporter.publish(all_metrics, self)
+
+            logger_manager.debug("监控任务执行完成")
+            return all_metrics
+
+        except Exception as e:
+            logger_manager.error(f"监控任务执行异常: {str(e)}")
+            return []
+
+    @staticmethod
+    def _persist(all_metrics: List[MonitorData]) -> None:
+        """写入结构化指标输出和本地时序存储（在线程池中执行）"""
+        metrics_sink.write(all_metrics)
+        time_series_store.append_metrics(all_metrics)
+
+    def run_once(self, timeout: float = 60.0) -> List[MonitorData]:
+        """
+        从其他线程（如控制接口）触发一次监控任务，在事件循环中执行并等待完成
+
+        Args:
+            timeout: 等待超时（秒）
+
+        Returns:
+            本次采集的监控数据
+
+        Raises:
+            RuntimeError: 调度器未运行
+        """
+        loop = self._loop
+        if not self.running or loop is None or loop.is_closed():
+            raise RuntimeError("调度器未运行")
+        logger_manager.info("手动执行监控任务")
+        return asyncio.run_coroutine_threadsafe(self._run_locked(self._monitor_job), loop).result(timeout)
+
+    def reload_config(self, timeout: float = 60.0) -> List[Tuple[str, Exception]]:
+        """
+        从其他线程（如控制接口）重新加载配置，运行中时在事件循环中等当前任务结束后执行
+
+        Args:
+            timeout: 等待超时（秒）
+
+        Returns:
+            应用失败的订阅者及异常列表
+        """
+        loop = self._loop
+        if not self.running or loop is None or loop.is_closed():
+            return MonitorScheduler.reload_config(self)
+        return asyncio.run_coroutine_threadsafe(self._reload_locked(), loop).result(timeout)
+
+    async def _run_locked(self, func, *args):
+        """持有任务锁执行一个任务协程"""
+        async with self._job_lock:
+            return await func(*args)
+
+    async def _reload_locked(self) -> List[Tuple[str, Exception]]:
+        """持有任务锁重新加载配置"""
+        async with self._job_lock:
+            return MonitorScheduler.reload_config(self)
+
+    async def _cleanup_job(self) -> None:
+        """清理任务（包括历史归档的文件读写，放到线程池执行）"""
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(self._executor, MonitorScheduler._cleanup_job, self)
+
+    async def _health_check_job(self) -> None:
+        """系统健康检查任务（涉及文件和系统调用，放到线程池执行）"""
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(self._executor, MonitorScheduler._health_check_job, self)
+
+    async def _wait(self, timeout: Optional[float]) -> None:
+        """等待到超时或被唤醒"""
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        self._wakeup.clear()
+
+    async def _execute(self, jobs: List[ScheduledJob]) -> None:
+        """执行一批到期任务并记录统计"""
+        started = time.monotonic()
+        try:
+            for job in jobs:
+                job.last_run = time.time()
+            if jobs[0].batch is None:
+                await self._run_locked(jobs[0].func)
+            else:
+                await self._run_locked(jobs[0].func, [job.name for job in jobs])
+        except Exception as e:
+            logger_manager.error(f"调度器运行异常: {str(e)}")
+
+        self._finish_run(jobs, started)
+
+    async def run(self) -> None:
+        """运行调度协程，直到 stop() 被调用"""
+        self._loop = asyncio.get_event_loop()
+        self._wakeup = asyncio.Event()
+        self._job_lock = asyncio.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=self.executor_workers)
+
+        self.setup_jobs()
+        self.running = True
+        logger_manager.info("监控调度器已启动 (asyncio 模式)")
+
+        try:
+            while self.running:
+                if not self._jobs:
+                    await self._wait(None)
+                    continue
+
+                job = min(self._jobs, key=lambda item: item.due_at)
+                remaining = job.due_at - time.monotonic()
+                if remaining > 0:
+                    await self._wait(remaining)
+                    continue
+
+                await self._execute(self._due_batch(job))
+        finally:
+            self._executor.shutdown(wait=False)
+            await dingtalk_notifier.async_close()
+            logger_manager.info("监控调度器已停止 (asyncio 模式)")
+
+    def start(self) -> None:
+        """在新的事件循环中运行调度器（阻塞直到停止），SIGINT/SIGTERM 触发停止"""
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(signum, self.stop)
+            except (NotImplementedError, RuntimeError):
+                # 非主线程或不支持信号处理的平台
+                pass
+
+        try:
+            loop.run_until_complete(self.run())
+        finally:
+            loop.close()
+            self._loop = None
+
+    def stop(self) -> None:
+        """停止调度器"""
+        if not self.running:
+            return
+
+        with self._condition:
+            self.running = False
+            self._jobs = []
+        self._wake()
+
+
+# 全局异步调度器实例
+async_monitor_scheduler = AsyncMonitorScheduler()
@@ -0,0 +1,314 @@
+"""
+本地控制接口
+监控进程在 Unix 域套接字上提供控制 API：查询运行状态、告警状态、任务耗时和队列深度，
+并接受重新加载配置、立即采集、静默和刷盘命令。每个连接发送一行 JSON 请求，返回一行 JSON 响应
+"""
+
+import os
+import time
+import socket
+import threading
+import socketserver
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from .control_client import ControlClient, DEFAULT_SOCKET, MAX_MESSAGE_SIZE, encode_message, decode_message
+from .scheduler import MonitorScheduler
+from .exporter import prometheus_exporter
+from ..services.config import config_manager, ConfigSnapshot
+from ..services.logger import logger_manager
+from ..services.metrics_sink import metrics_sink
+from ..services.config_watcher import config_watcher
+from ..storage.tsdb import time_series_store
+from ..core.monitor import resource_monitor, COLLECTORS
+from ..core.alert import alert_engine
+from ..fleet.agent import fleet_agent
+from ..fleet.aggregator import fleet_aggregator
+
+
+def collect_status(scheduler: Optional[MonitorScheduler], started: Optional[float] = None) -> Dict[str, Any]:
+    """
+    汇总运行状态（控制接口和本地 --status 共用）
+
+    Args:
+        scheduler: 调度器，为None或未运行时显示已停止
+        started: 进程启动时间，守护进程中提供
+
+    Returns:
+        可 JSON 序列化的状态字典
+    """
+    metrics = []
+    for metric in COLLECTORS:
+        settings = config_manager.get_metric_settings(metric)
+        if settings.enabled:
+            metrics.append({'name': metric, 'threshold': settings.threshold, 'interval': settings.interval})
+
+    storage: Dict[str, Any] = {'enabled': time_series_store.enabled}
+    if time_series_store.enabled:
+        storage['directory'] = str(time_series_store.directory)
+        storage['series'] = len(time_series_store.list_series())
+        storage['archive'] = (time_series_store.archive.stats()
+                              if time_series_store.archive is not None else None)
+
+    running = scheduler is not None and scheduler.running
+    schedule: Dict[str, Any] = {'running': running}
+    if running:
+        schedule.update({
+            'runtime': config_manager.get('monitor.runtime', 'thread'),
+            'next_run': scheduler.get_next_run_time(),
+            'overrun_policy': scheduler.overrun_policy,
+            'due_jobs': scheduler.count_due_jobs(),
+            'jobs': scheduler.get_jobs_info(),
+        })
+
+    return {
+        'pid': os.getpid(),
+        'uptime': round(time.time() - started, 1) if started else None,
+        'system': resource_monitor.get_system_info(),
+        'monitor_interval': config_manager.get_monitor_config().get('interval', 60),
+        'metrics': metrics,
+        'alerts': alert_engine.get_alert_status(),
+        'storage': storage,
+        'scheduler': schedule,
+        'queues': {
+            'log': logger_manager.get_queue_stats(),
+            'metrics_sink_records': metrics_sink.records,
+        },
+        'config': {
+            'path': str(config_manager.config_path),
+            'reloads': config_watcher.reload_count,
+            'last_error': str(config_watcher.last_error) if config_watcher.last_error else None,
+        },
+        'exporter': {'running': prometheus_exporter.running, 'scrapes': prometheus_exporter.scrapes},
+        'fleet': (fleet_aggregator.get_status() if fleet_aggregator.enabled
+                  else fleet_agent.get_status() if fleet_agent.enabled else {'mode': fleet_agent.mode}),
+    }
+
+
+class _ControlServer(getattr(socketserver, 'ThreadingUnixStreamServer', object)):
+    """每个连接一个线程的 Unix 域套接字服务"""
+
+    daemon_threads = True
+
+
+class _ControlHandler(socketserver.StreamRequestHandler):
+    """读取一行请求，执行命令后写回一行响应"""
+
+    def handle(self):
+        """处理一个请求"""
+        line = self.rfile.readline(MAX_MESSAGE_SIZE)
+        if not line:
+            return
+        try:
+            request = decode_message(line)
+            result = self.server.controller.dispatch(request.get('command', ''), request.get('args') or {})
+            response = {'ok': True, 'result': result}
+        except Exception as e:
+            response = {'ok': False, 'error': str(e)}
+        self.wfile.write(encode_message(response))
+
+
+class ControlServer:
+    """控制接口服务"""
+
+    def __init__(self):
+        """初始化控制接口"""
+        self.scheduler: Optional[MonitorScheduler] = None
+        self.started = time.time()
+        self._server: Optional[_ControlServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+        # 正在监听的套接字路径（配置变更后 path 可能已是新路径）
+        self._listening: Optional[str] = None
+
+        # 已处理的命令数
+        self.requests = 0
+
+        # 命令表 {命令名称: 处理函数}
+        self.commands: Dict[str, Callable[..., Any]] = {
+            'status': self._status,
+            'alerts': self._alerts,
+            'jobs': self._jobs,
+            'reload': self._reload,
+            'run_once': self._run_once,
+            'silence': self._silence,
+            'unsilence': self._unsilence,
+            'silences': self._silences,
+            'flush': self._flush,
+        }
+
+        self._load_settings(config_manager.snapshot)
+
+        # 配置文件变化时按需更换套接字路径
+        config_manager.subscribe(self.apply_config)
+
+    def _load_settings(self, snapshot: ConfigSnapshot) -> None:
+        """
+        读取控制接口配置
+
+        Args:
+            snapshot: 配置快照
+        """
+        self.enabled = bool(snapshot.get('control.enabled', True))
+        self.path = snapshot.get('control.socket', DEFAULT_SOCKET)
+
+    def apply_config(self, snapshot: ConfigSnapshot) -> None:
+        """
+        应用新的控制接口配置，路径或开关变化时重新监听
+
+        Args:
+            snapshot: 新的配置快照
+        """
+        old = (self.enabled, self.path)
+        self._load_settings(snapshot)
+        if self.running and (self.enabled, self.path) != old:
+            self.stop()
+            self.start(self.scheduler)
+
+    @property
+    def running(self) -> bool:
+        """是否正在监听"""
+        return self._server is not None
+
+    def start(self, scheduler: Optional[MonitorScheduler]) -> bool:
+        """
+        开始监听控制套接字
+
+        Args:
+            scheduler: 当前运行模式的调度器
+
+        Returns:
+            是否启动成功（未启用或平台不支持时返回False）
+        """
+        self.scheduler = scheduler
+        if not self.enabled or self.running:
+            return self.running
+        if not hasattr(socket, 'AF_UNIX'):
+            logger_manager.warning("当前平台不支持 Unix 域套接字，控制接口已禁用")
+            return False
+
+        path = Path(self.path)
+        if path.exists():
+            # 另一个监控进程正在监听时不抢占；无人监听的残留文件直接删除
+            if ControlClient(str(path), timeout=1.0).available():
+                logger_manager.error(f"控制套接字已被其他监控进程占用: {path}")
+                return False
+            path.unlink()
+
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            old_umask = os.umask(0o077)  # 仅当前用户可连接
+            try:
+                server = _ControlServer(str(path), _ControlHandler)
+            finally:
+                os.umask(old_umask)
+        except OSError as e:
+            logger_manager.error(f"控制接口启动失败 {path}: {str(e)}")
+            return False
+
+        server.controller = self
+        self._server = server
+        self._listening = str(path)
+        self._thread = threading.Thread(target=server.serve_forever, daemon=True)
+        self._thread.start()
+        logger_manager.info(f"控制接口已启动: {path}")
+        return True
+
+    def stop(self) -> None:
+        """停止监听并删除套接字文件"""
+        server, self._server = self._server, None
+        if server is None:
+            return
+        server.shutdown()
+        server.server_close()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        try:
+            os.unlink(self._listening)
+        except OSError:
+            pass
+        self._listening = None
+        logger_manager.info("控制接口已停止")
+
+    def dispatch(self, command: str, args: Dict[str, Any]) -> Any:
+        """
+        执行控制命令
+
+        Args:
+            command: 命令名称
+            args: 命令参数
+
+        Returns:
+            命令结果（可 JSON 序列化）
+
+        Raises:
+            ValueError: 未知命令或参数错误
+        """
+        handler = self.commands.get(command)
+        if handler is None:
+            raise ValueError(f"未知命令: {command}，可用命令: {', '.join(sorted(self.commands))}")
+        self.requests += 1
+        logger_manager.debug("控制命令: %s %s", command, args)
+        try:
+            return handler(**args)
+        except TypeError as e:
+            raise ValueError(f"命令参数错误 {command}: {e}")
+
+    def _status(self) -> Dict[str, Any]:
+        """运行状态"""
+        status = collect_status(self.scheduler, self.started)
+        status['control'] = {'path': self.path, 'requests': self.requests}
+        return status
+
+    def _alerts(self) -> Dict[str, Any]:
+        """告警状态"""
+        return alert_engine.get_alert_status()
+
+    def _jobs(self) -> List[Dict[str, Any]]:
+        """各任务的执行时间和统计"""
+        return self.scheduler.get_jobs_info() if self.scheduler is not None else []
+
+    def _reload(self) -> Dict[str, Any]:
+        """重新加载配置文件（交给调度器，与采集任务串行执行，不在控制接口线程中与采集并发）"""
+        if self.scheduler is not None:
+            errors = self.scheduler.reload_config()
+        else:
+            errors = config_manager.reload_config()
+            for name, error in errors:
+                logger_manager.error(f"配置变更应用失败 - {name}: {str(error)}")
+        return {'errors': [f"{name}: {error}" for name, error in errors]}
+
+    def _run_once(self) -> List[Dict[str, Any]]:
+        """立即执行一次采集和告警判断"""
+        if self.scheduler is None or not self.scheduler.running:
+            raise RuntimeError("调度器未运行")
+        return [{
+            'metric': data.metric,
+            'value': data.value,
+            'threshold': data.threshold,
+            'unit': data.unit,
+            'alert': data.is_alert,
+        } for data in self.scheduler.run_once()]
+
+    def _silence(self, metric: str, duration: Any = '1h', comment: str = '') -> str:
+        """添加运行时静默"""
+        return alert_engine.silence_manager.add(metric, duration, comment).describe()
+
+    def _unsilence(self, silence_id: str) -> bool:
+        """删除运行时静默"""
+        return alert_engine.silence_manager.remove(silence_id)
+
+    def _silences(self) -> List[Dict[str, Any]]:
+        """生效中的静默"""
+        return [{'description': silence.describe(), 'runtime': silence.runtime}
+                for silence in alert_engine.silence_manager.list_silences()]
+
+    def _flush(self) -> Dict[str, Any]:
+        """把时序存储、指标输出同步到磁盘"""
+        time_series_store.flush()
+        metrics_sink.flush()
+        return {'log': logger_manager.get_queue_stats()}
+
+
+# 全局控制接口实例
+control_server = ControlServer()
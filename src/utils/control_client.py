@@ -0,0 +1,117 @@
+"""
+控制接口客户端
+通过 Unix 域套接字向运行中的监控进程发送命令（状态查询、重新加载、立即采集、静默、刷盘），
+只依赖标准库，命令行查询无需导入采集和告警模块
+"""
+
+import json
+import socket
+from typing import Any, Dict, Optional
+
+# 默认套接字路径（与 control.socket 配置一致）
+DEFAULT_SOCKET = 'data/monitor4dingtalk.sock'
+
+# 单条消息的最大字节数
+MAX_MESSAGE_SIZE = 16 * 1024 * 1024
+
+
+class ControlError(Exception):
+    """控制命令执行失败（守护进程返回的错误）"""
+
+
+def encode_message(message: Dict[str, Any]) -> bytes:
+    """
+    编码一条消息：一行 JSON
+
+    Args:
+        message: 消息字典
+
+    Returns:
+        以换行结尾的 UTF-8 字节串
+    """
+    return json.dumps(message, ensure_ascii=False, default=str).encode('utf-8') + b'\n'
+
+
+def decode_message(line: bytes) -> Dict[str, Any]:
+    """
+    解码一条消息
+
+    Args:
+        line: 一行 JSON
+
+    Returns:
+        消息字典
+
+    Raises:
+        ValueError: 不是 JSON 对象
+    """
+    message = json.loads(line.decode('utf-8'))
+    if not isinstance(message, dict):
+        raise ValueError("控制消息必须是 JSON 对象")
+    return message
+
+
+class ControlClient:
+    """控制接口客户端"""
+
+    def __init__(self, path: str = DEFAULT_SOCKET, timeout: float = 5.0):
+        """
+        初始化客户端
+
+        Args:
+            path: 守护进程的套接字路径
+            timeout: 连接和等待响应的超时（秒）
+        """
+        self.path = path
+        self.timeout = timeout
+
+    def available(self) -> bool:
+        """守护进程是否在监听"""
+        if not hasattr(socket, 'AF_UNIX'):
+            return False
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.settimeout(self.timeout)
+                sock.connect(self.path)
+            return True
+        except OSError:
+            return False
+
+    def request(self, command: str, timeout: Optional[float] = None, **args: Any) -> Any:
+        """
+        发送命令并等待结果
+
+        Args:
+            command: 命令名称，如 status、reload、run_once、silence、flush
+            timeout: 本次命令的超时（秒），默认使用客户端超时
+            **args: 命令参数
+
+        Returns:
+            命令结果
+
+        Raises:
+            OSError: 无法连接守护进程（未运行或套接字不可用）
+            ControlError: 守护进程执行命令失败
+        """
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout or self.timeout)
+            sock.connect(self.path)
+            sock.sendall(encode_message({'command': command, 'args': args}))
+
+            chunks = []
+            size = 0
+            while True:
+                chunk = sock.recv(65536)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+                size += len(chunk)
+                if chunk.endswith(b'\n') or size > MAX_MESSAGE_SIZE:
+                    break
+
+        if not chunks:
+            raise ConnectionError("守护进程未返回响应")
+        response = decode_message(b''.join(chunks))
+        if not response.get('ok'):
+            raise ControlError(response.get('error', '未知错误'))
+        return response.get('result')
@@ -0,0 +1,349 @@
+"""
+Prometheus 指标导出
+可选的内置 HTTP 端点，以 Prometheus 文本格式暴露最新采集值、告警状态和本程序自身的运行指标。
+暴露文本在每个采集周期结束时渲染一次并缓存，抓取请求直接返回缓存的字节串，
+抓取频率再高也不会触发采集或重新渲染
+"""
+
+import time
+import threading
+from http.server import BaseHTTPRequestHandler
+from typing import Any, Dict, List, Optional, Tuple, TYPE_CHECKING
+
+from ..services.config import config_manager, ConfigSnapshot
+from ..services.logger import logger_manager
+from ..services.metrics_sink import metrics_sink
+from ..services.config_watcher import config_watcher
+from ..core.alert import alert_engine
+from .httpserver import ThreadingHTTPServer
+
+if TYPE_CHECKING:
+    from ..core.monitor import MonitorData
+    from .scheduler import MonitorScheduler
+
+
+# 指标名前缀
+PREFIX = 'monitor4dingtalk'
+
+# Prometheus 文本格式的 Content-Type
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# 进程启动时间
+START_TIME = time.time()
+
+
+def _escape(value: Any) -> str:
+    """转义标签值中的反斜杠、双引号和换行"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value: float) -> str:
+    """格式化样本值（Prometheus 使用 +Inf/-Inf/NaN）"""
+    if isinstance(value, int):
+        return str(int(value))
+    value = float(value)
+    if value != value:
+        return 'NaN'
+    if value in (float('inf'), float('-inf')):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(value)
+
+
+class Exposition:
+    """Prometheus 文本格式构建器"""
+
+    def __init__(self):
+        """初始化构建器"""
+        self._lines: List[str] = []
+
+    def family(self, name: str, metric_type: str, help_text: str,
+               samples: List[Tuple[Dict[str, Any], float]], suffix: str = '') -> None:
+        """
+        添加一个指标族
+
+        Args:
+            name: 指标名（不含前缀）
+            metric_type: gauge、counter、histogram 或 summary
+            help_text: 说明
+            samples: [(标签字典, 值)]
+            suffix: 样本名后缀（如 histogram 的 _bucket），为空时使用指标名
+        """
+        full_name = f'{PREFIX}_{name}'
+        self._lines.append(f'# HELP {full_name} {help_text}')
+        self._lines.append(f'# TYPE {full_name} {metric_type}')
+        self.samples(full_name + suffix, samples)
+
+    def samples(self, full_name: str, samples: List[Tuple[Dict[str, Any], float]]) -> None:
+        """
+        添加样本行
+
+        Args:
+            full_name: 完整的样本名
+            samples: [(标签字典, 值)]
+        """
+        for labels, value in samples:
+            if labels:
+                label_text = ','.join(f'{key}="{_escape(val)}"' for key, val in labels.items())
+                self._lines.append(f'{full_name}{{{label_text}}} {_format_value(value)}')
+            else:
+                self._lines.append(f'{full_name} {_format_value(value)}')
+
+    def render(self) -> bytes:
+        """渲染为 UTF-8 字节串"""
+        return ('\n'.join(self._lines) + '\n').encode('utf-8')
+
+
+class PrometheusExporter:
+    """Prometheus 指标导出器"""
+
+    def __init__(self):
+        """初始化导出器"""
+        self._lock = threading.Lock()
+
+        # 各指标最新的监控数据 {metric_name: MonitorData}（采集项分批执行，需要合并）
+        self._latest: Dict[str, 'MonitorData'] = {}
+
+        # 缓存的暴露文本
+        self._cache = b''
+
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+        # 自身统计
+        self.renders = 0
+        self.scrapes = 0
+        self.last_render_duration = 0.0
+
+        self._load_settings(config_manager.get('exporter', {}))
+
+        # 配置文件变化时按需重启 HTTP 服务
+        config_manager.subscribe(self.apply_config)
+
+    def _load_settings(self, exporter_config: Dict[str, Any]) -> None:
+        """
+        读取导出配置
+
+        Args:
+            exporter_config: exporter 配置
+        """
+        self.exporter_config = exporter_config
+        self.enabled = bool(exporter_config.get('enabled', False))
+        self.host = exporter_config.get('host', '127.0.0.1')
+        self.port = int(exporter_config.get('port', 9464))
+        self.path = exporter_config.get('path', '/metrics')
+
+    def apply_config(self, snapshot: ConfigSnapshot) -> None:
+        """
+        应用新的导出配置，监听地址变化时重启 HTTP 服务
+
+        Args:
+            snapshot: 新的配置快照
+        """
+        exporter_config = snapshot.get('exporter', {})
+        if exporter_config == self.exporter_config:
+            return
+
+        running = self.running
+        self.stop()
+        self._load_settings(exporter_config)
+        if running or self.enabled:
+            self.start()
+
+    @property
+    def running(self) -> bool:
+        """HTTP 服务是否在运行"""
+        return self._server is not None
+
+    @property
+    def cached(self) -> bytes:
+        """缓存的暴露文本"""
+        return self._cache
+
+    def _make_handler(self):
+        """创建请求处理类（闭包引用导出器）"""
+        exporter = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            """/metrics 请求处理"""
+
+            def do_GET(self):
+                """返回缓存的暴露文本"""
+                if self.path.split('?', 1)[0] != exporter.path:
+                    self.send_error(404)
+                    return
+                body = exporter._cache
+                exporter.scrapes += 1
+                self.send_response(200)
+                self.send_header('Content-Type', CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                """访问日志降为 DEBUG，避免频繁抓取刷屏"""
+                logger_manager.debug("指标端点请求: " + format, *args)
+
+        return MetricsHandler
+
+    def start(self) -> bool:
+        """
+        启动 HTTP 服务
+
+        Returns:
+            是否启动成功（未启用时返回False）
+        """
+        if not self.enabled or self.running:
+            return self.running
+
+        try:
+            self._server = ThreadingHTTPServer((self.host, self.port), self._make_handler())
+        except OSError as e:
+            logger_manager.error(f"指标端点启动失败 {self.host}:{self.port}: {str(e)}")
+            self._server = None
+            return False
+
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        logger_manager.info(f"Prometheus 指标端点已启动: http://{self.host}:{self.port}{self.path}")
+        return True
+
+    def stop(self) -> None:
+        """停止 HTTP 服务"""
+        server, self._server = self._server, None
+        if server is None:
+            return
+        server.shutdown()
+        server.server_close()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        logger_manager.info("Prometheus 指标端点已停止")
+
+    def publish(self, all_metrics: List['MonitorData'],
+                scheduler: Optional['MonitorScheduler'] = None) -> None:
+        """
+        采集周期结束后更新最新值并重新渲染暴露文本
+
+        Args:
+            all_metrics: 本批次的监控数据
+            scheduler: 调度器，用于导出任务执行统计
+        """
+        if not self.enabled:
+            return
+
+        started = time.perf_counter()
+        with self._lock:
+            for metric_data in all_metrics:
+                self._latest[metric_data.metric] = metric_data
+            self._cache = self.render(scheduler)
+            self.renders += 1
+        self.last_render_duration = time.perf_counter() - started
+
+    def render(self, scheduler: Optional['MonitorScheduler'] = None) -> bytes:
+        """
+        渲染暴露文本
+
+        Args:
+            scheduler: 调度器，用于导出任务执行统计
+
+        Returns:
+            Prometheus 文本格式的字节串
+        """
+        exposition = Exposition()
+        latest = sorted(self._latest.values(), key=lambda data: data.metric)
+
+        # 最新采集值
+        exposition.family('metric_value', 'gauge', '最新采集值',
+                          [({'metric': data.metric, 'unit': data.unit}, data.value) for data in latest])
+        exposition.family('metric_threshold', 'gauge', '告警阈值',
+                          [({'metric': data.metric}, data.threshold) for data in latest])
+        exposition.family('metric_breach', 'gauge', '最新采集值是否超过阈值',
+                          [({'metric': data.metric}, int(data.is_alert)) for data in latest])
+        exposition.family('metric_timestamp_seconds', 'gauge', '最新采集时间',
+                          [({'metric': data.metric}, data.timestamp.timestamp())
+                           for data in latest if data.timestamp is not None])
+
+        # 告警状态
+        status = alert_engine.get_alert_status()
+        firing = set(status['persistent_alerts'])
+        exposition.family('alert_firing', 'gauge', '指标是否处于持续告警状态（1为告警中）',
+                          [({'metric': metric}, int(metric in firing))
+                           for metric in sorted(firing | set(status['consecutive_counts']))])
+        exposition.family('alert_consecutive', 'gauge', '指标连续超阈值的次数',
+                          [({'metric': metric}, count)
+                           for metric, count in sorted(status['consecutive_counts'].items())])
+        exposition.family('alert_consecutive_threshold', 'gauge', '触发告警所需的连续次数',
+                          [({}, status['consecutive_checks_threshold'])])
+        exposition.family('alerts_active', 'gauge', '去重窗口内已发送的告警数',
+                          [({}, len(status['active_alerts']))])
+        exposition.family('silences', 'gauge', '生效中的静默规则数',
+                          [({}, len(status['silences']))])
+
+        # 分位数草图（启用时）
+        quantiles = status.get('quantiles') or {}
+        if quantiles:
+            samples, sums, counts = [], [], []
+            for metric, summary in sorted(quantiles.items()):
+                for key in ('p50', 'p95', 'p99'):
+                    if summary.get(key) is not None:
+                        samples.append(({'metric': metric, 'quantile': str(int(key[1:]) / 100)}, summary[key]))
+                if summary['count']:
+                    sums.append(({'metric': metric}, summary['avg'] * summary['count']))
+                counts.append(({'metric': metric}, summary['count']))
+            exposition.family('metric_quantile', 'summary', '采集值分布（DDSketch 估算）', samples)
+            exposition.samples(f'{PREFIX}_metric_quantile_sum', sums)
+            exposition.samples(f'{PREFIX}_metric_quantile_count', counts)
+
+        # 自身运行指标
+        if scheduler is not None:
+            self._render_jobs(exposition, scheduler)
+
+        queue_stats = logger_manager.get_queue_stats()
+        exposition.family('log_queue_depth', 'gauge', '异步日志队列中待写入的记录数',
+                          [({}, queue_stats['queued'])])
+        exposition.family('log_dropped_total', 'counter', '日志队列满时丢弃的记录数',
+                          [({}, queue_stats['dropped'])])
+        exposition.family('config_reloads_total', 'counter', '配置文件自动重新加载次数',
+                          [({}, config_watcher.reload_count)])
+        exposition.family('metrics_sink_records_total', 'counter', '结构化指标输出的记录数',
+                          [({}, metrics_sink.records)])
+        exposition.family('exporter_render_seconds', 'gauge', '上一次渲染暴露文本的耗时',
+                          [({}, self.last_render_duration)])
+        exposition.family('exporter_scrapes_total', 'counter', '指标端点被抓取的次数（截至本次渲染）',
+                          [({}, self.scrapes)])
+        exposition.family('process_start_time_seconds', 'gauge', '进程启动时间',
+                          [({}, START_TIME)])
+        exposition.family('last_publish_timestamp_seconds', 'gauge', '暴露文本的渲染时间',
+                          [({}, time.time())])
+
+        return exposition.render()
+
+    @staticmethod
+    def _render_jobs(exposition: Exposition, scheduler: 'MonitorScheduler') -> None:
+        """导出调度器各任务的执行统计"""
+        jobs = scheduler.get_jobs_info()
+        exposition.family('job_runs_total', 'counter', '任务执行次数',
+                          [({'job': job['job_func']}, job['stats']['runs']) for job in jobs])
+        exposition.family('job_late_runs_total', 'counter', '任务延迟执行次数',
+                          [({'job': job['job_func']}, job['stats']['late_runs']) for job in jobs])
+        exposition.family('job_missed_total', 'counter', '任务错过的周期数',
+                          [({'job': job['job_func']}, job['stats']['missed']) for job in jobs])
+        exposition.family('job_overruns_total', 'counter', '任务执行耗时超过周期的次数',
+                          [({'job': job['job_func']}, job['stats']['overruns']) for job in jobs])
+
+        # 耗时直方图：统计中的桶计数不累计，这里转为 Prometheus 的累计桶
+        buckets, sums, counts = [], [], []
+        for job in jobs:
+            stats = job['stats']
+            cumulative = 0
+            for bound, count in stats['duration_histogram'].items():
+                cumulative += count
+                buckets.append(({'job': job['job_func'], 'le': bound.lstrip('<=').rstrip('s')}, cumulative))
+            sums.append(({'job': job['job_func']}, stats['total_duration']))
+            counts.append(({'job': job['job_func']}, stats['runs']))
+        exposition.family('job_duration_seconds', 'histogram', '任务执行耗时', buckets, suffix='_bucket')
+        exposition.samples(f'{PREFIX}_job_duration_seconds_sum', sums)
+        exposition.samples(f'{PREFIX}_job_duration_seconds_count', counts)
+
+
+# 全局指标导出实例
+prometheus_exporter = PrometheusExporter()
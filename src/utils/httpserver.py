@@ -0,0 +1,14 @@
+"""
+内置 HTTP 服务
+Prometheus 指标端点和集群汇聚端共用的多线程 HTTP 服务
+"""
+
+import socketserver
+from http.server import HTTPServer
+
+
+class ThreadingHTTPServer(socketserver.ThreadingMixIn, HTTPServer):
+    """每个请求一个线程的 HTTP 服务（标准库 3.7 起才提供，这里兼容 Python 3.6）"""
+
+    daemon_threads = True
+    allow_reuse_address = True
@@ -1,18 +1,197 @@
 """
 任务调度器
 负责定时执行监控任务和系统维护任务
+基于单调时钟按截止时间调度，空闲时在条件变量上等待，不做轮询
 """
 
-import schedule
 import time
+import random
+import hashlib
 import threading
-from typing import Callable, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from datetime import datetime
 
-from ..services.config import config_manager
+from ..services.config import config_manager, ConfigSnapshot
 from ..services.logger import logger_manager
-from ..core.monitor import resource_monitor
+from ..services.metrics_sink import metrics_sink
+from ..services.config_watcher import config_watcher
+from ..storage.tsdb import time_series_store
+from ..core.monitor import resource_monitor, MonitorData, COLLECTORS
 from ..core.alert import alert_engine
+from .exporter import prometheus_exporter
+from ..fleet.agent import fleet_agent
+
+
+# 同一批次中截止时间相差不超过该值（秒）的任务视为同一时刻到期
+BATCH_TOLERANCE = 0.05
+
+# 超时（任务执行慢于周期）时的处理策略
+# skip: 丢弃错过的周期，回到原有节拍的下一个时刻
+# coalesce: 错过的多个周期合并为一次立即执行，之后回到原有节拍
+# late: 逐个补跑错过的周期
+OVERRUN_POLICIES = ('skip', 'coalesce', 'late')
+
+# 任务耗时直方图的桶上界（秒）
+DURATION_BUCKETS = (0.1, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0, 60.0, float('inf'))
+
+
+class JobStats:
+    """任务执行统计"""
+    
+    def __init__(self):
+        """初始化统计"""
+        self.runs = 0
+        self.late_runs = 0
+        self.missed = 0
+        self.coalesced = 0
+        self.overruns = 0
+        self.last_duration = 0.0
+        self.max_duration = 0.0
+        self.total_duration = 0.0
+        self.max_lateness = 0.0
+        self.duration_buckets = [0] * len(DURATION_BUCKETS)
+    
+    def record_run(self, duration: float, lateness: float, interval: float,
+                   late_tolerance: float) -> None:
+        """
+        记录一次执行
+        
+        Args:
+            duration: 执行耗时（秒）
+            lateness: 实际开始时间晚于截止时间的秒数
+            interval: 任务周期（秒）
+            late_tolerance: 判定为延迟执行的容忍秒数
+        """
+        self.runs += 1
+        self.last_duration = duration
+        self.max_duration = max(self.max_duration, duration)
+        self.total_duration += duration
+        self.max_lateness = max(self.max_lateness, lateness)
+        if lateness > late_tolerance:
+            self.late_runs += 1
+        if duration > interval:
+            self.overruns += 1
+        
+        for index, bound in enumerate(DURATION_BUCKETS):
+            if duration <= bound:
+                self.duration_buckets[index] += 1
+                break
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为状态字典"""
+        return {
+            'runs': self.runs,
+            'late_runs': self.late_runs,
+            'missed': self.missed,
+            'coalesced': self.coalesced,
+            'overruns': self.overruns,
+            'last_duration': round(self.last_duration, 3),
+            'max_duration': round(self.max_duration, 3),
+            'avg_duration': round(self.total_duration / self.runs, 3) if self.runs else 0.0,
+            'total_duration': round(self.total_duration, 3),
+            'max_lateness': round(self.max_lateness, 3),
+            'duration_histogram': {
+                (f"<={bound:g}s" if bound != float('inf') else '+Inf'): count
+                for bound, count in zip(DURATION_BUCKETS, self.duration_buckets)
+            }
+        }
+
+
+class ScheduledJob:
+    """定时任务"""
+    
+    def __init__(self, name: str, interval: float, func: Callable[..., None],
+                 align: bool = False, batch: Optional[str] = None, phase: float = 0.0):
+        """
+        初始化定时任务
+        
+        Args:
+            name: 任务名称
+            interval: 执行间隔（秒）
+            func: 任务函数；批次任务的函数接收同批到期的任务名称列表
+            align: 是否对齐到墙上时钟的整数倍（如间隔60秒时对齐到每分钟的第0秒）
+            batch: 批次名称，同一批次中同时到期的任务合并为一次调用
+            phase: 相位偏移（秒），节拍整体平移该时长
+        """
+        self.name = name
+        self.interval = float(interval)
+        self.func = func
+        self.align = align
+        self.batch = batch
+        self.phase = phase % self.interval
+        
+        # 下次执行的截止时间（单调时钟），即节拍上的时刻
+        self.deadline = 0.0
+        
+        # 本周期的随机抖动（秒），只推迟实际执行时间，不改变节拍
+        self.delay = 0.0
+        
+        # 最近一次执行时间（墙上时钟）
+        self.last_run: Optional[float] = None
+        
+        # 执行统计
+        self.stats = JobStats()
+    
+    @property
+    def due_at(self) -> float:
+        """实际执行时间（截止时间加本周期抖动）"""
+        return self.deadline + self.delay
+    
+    def first_deadline(self, now: float) -> float:
+        """
+        计算首次执行的截止时间
+        
+        Args:
+            now: 当前单调时钟时间
+            
+        Returns:
+            截止时间（单调时钟）
+        """
+        if self.align:
+            return self._aligned_deadline(now)
+        return now + (self.phase or self.interval)
+    
+    def next_deadline(self, now: float, policy: str = 'skip') -> float:
+        """
+        在上一个截止时间的基础上计算下一个截止时间
+        
+        以截止时间而非任务结束时间为基准累加间隔，任务耗时不会造成漂移；
+        已经错过的周期按超时策略处理，并计入统计。
+        
+        Args:
+            now: 当前单调时钟时间
+            policy: 超时策略 (skip, coalesce, late)
+            
+        Returns:
+            截止时间（单调时钟）
+        """
+        deadline = self.deadline + self.interval
+        if deadline > now:
+            return self._aligned_deadline(now) if self.align else deadline
+        
+        # 截至当前已经错过的周期数
+        missed = int((now - deadline) // self.interval) + 1
+        
+        if policy == 'late':
+            # 逐个补跑：下一个截止时间已过期，会立即执行
+            return deadline
+        
+        if policy == 'coalesce':
+            # 合并为一次立即执行（取最近错过的时刻），之后回到原有节拍
+            self.stats.missed += missed - 1
+            self.stats.coalesced += 1
+            return deadline + (missed - 1) * self.interval
+        
+        self.stats.missed += missed
+        if self.align:
+            return self._aligned_deadline(now)
+        return deadline + missed * self.interval
+    
+    def _aligned_deadline(self, now: float) -> float:
+        """按墙上时钟计算下一个 整数倍+相位 的时刻，并换算为单调时钟"""
+        wall_now = time.time()
+        wall_next = ((wall_now - self.phase) // self.interval + 1) * self.interval + self.phase
+        return now + (wall_next - wall_now)
 
 
 class MonitorScheduler:
@@ -20,44 +199,172 @@ class MonitorScheduler:
     
     def __init__(self):
         """初始化调度器"""
-        self.monitor_config = config_manager.get_monitor_config()
         self.running = False
         self.scheduler_thread: Optional[threading.Thread] = None
+        self._random = random.Random(resource_monitor.hostname)
+        self._load_settings(config_manager.get_monitor_config())
+        
+        # 任务列表及保护它的条件变量，stop/reload 通过它立即唤醒调度线程
+        self._jobs: List[ScheduledJob] = []
+        self._condition = threading.Condition()
+        
+        # 任务执行锁，控制接口触发的立即采集与调度线程串行执行
+        self._run_lock = threading.Lock()
+        
+        # 配置文件变化时重新设置任务
+        config_manager.subscribe(self.apply_config)
+    
+    def _load_settings(self, monitor_config: Dict[str, Any]) -> None:
+        """
+        读取调度相关配置
+        
+        Args:
+            monitor_config: 监控配置
+        """
+        self.monitor_config = monitor_config
         
         # 监控间隔（秒）
         self.monitor_interval = self.monitor_config.get('interval', 60)
+        
+        # 是否将监控任务对齐到墙上时钟的整数倍
+        self.align = self.monitor_config.get('align', False)
+        
+        # 超时策略及判定延迟执行的容忍秒数
+        self.overrun_policy = self._get_overrun_policy()
+        self.late_tolerance = float(self.monitor_config.get('late_tolerance', 1.0))
+        
+        # 大规模部署时按主机名散列错开相位，并为每个周期加入随机抖动
+        self.phase_spread = self.monitor_config.get('phase_spread', False)
+        self.jitter = float(self.monitor_config.get('jitter', 0))
+    
+    def apply_config(self, snapshot: ConfigSnapshot) -> None:
+        """
+        应用新的监控配置，监控配置变化且调度器运行中时重新设置任务
+        
+        Args:
+            snapshot: 新的配置快照
+        """
+        if snapshot.monitor == self.monitor_config:
+            return
+        
+        self._load_settings(snapshot.monitor)
+        if self.running:
+            self.setup_jobs()
+    
+    def _get_overrun_policy(self) -> str:
+        """读取超时策略，配置非法时回退为 skip"""
+        policy = self.monitor_config.get('overrun_policy', 'skip')
+        if policy not in OVERRUN_POLICIES:
+            logger_manager.warning(f"未知的超时策略 {policy}，使用 skip")
+            return 'skip'
+        return policy
+    
+    def get_phase_offset(self) -> float:
+        """
+        计算本机的相位偏移
+        
+        由主机名散列得到 [0, 1) 的固定比例，乘以全局监控间隔。所有采集项使用同一偏移，
+        因此同时到期的采集项依然合并为一个批次；同一主机每次启动的相位保持不变。
+        
+        Returns:
+            相位偏移（秒），未启用时为0
+        """
+        if not self.phase_spread:
+            return 0.0
+        digest = hashlib.md5(resource_monitor.hostname.encode('utf-8')).hexdigest()
+        return int(digest[:8], 16) / float(1 << 32) * self.monitor_interval
+    
+    def _draw_jitter(self, job: ScheduledJob) -> float:
+        """抽取本周期的随机抖动，不超过周期的一半"""
+        if self.jitter <= 0:
+            return 0.0
+        return self._random.uniform(0, min(self.jitter, job.interval / 2))
+    
+    def get_collector_intervals(self) -> Dict[str, float]:
+        """
+        获取各启用采集项的采集间隔
+        
+        Returns:
+            {collector: interval}，未单独配置 interval 的采集项使用全局监控间隔
+        """
+        return {
+            collector: config_manager.get_metric_interval(collector)
+            for collector in COLLECTORS
+            if config_manager.is_metric_enabled(collector)
+        }
     
     def setup_jobs(self) -> None:
         """设置定时任务"""
-        # 清空现有任务
-        schedule.clear()
+        collector_intervals = self.get_collector_intervals()
+        phase = self.get_phase_offset()
+        
+        # 每个采集项独立调度，同一时刻到期的采集项合并为一个批次采集和告警
+        jobs = [
+            ScheduledJob(collector, interval, self._monitor_job, align=self.align,
+                         batch='collect', phase=phase)
+            for collector, interval in collector_intervals.items()
+        ]
         
-        # 主监控任务
-        schedule.every(self.monitor_interval).seconds.do(self._monitor_job)
+        jobs += [
+            # 清理过期告警记录任务（每小时执行一次）
+            ScheduledJob('cleanup', 3600, self._cleanup_job),
+            
+            # 系统健康检查任务（每10分钟执行一次）
+            ScheduledJob('health_check', 600, self._health_check_job),
+        ]
         
-        # 清理过期告警记录任务（每小时执行一次）
-        schedule.every().hour.do(self._cleanup_job)
+        now = time.monotonic()
+        for job in jobs:
+            job.deadline = job.first_deadline(now)
+            job.delay = self._draw_jitter(job)
         
-        # 系统健康检查任务（每10分钟执行一次）
-        schedule.every(10).minutes.do(self._health_check_job)
+        with self._condition:
+            self._jobs = jobs
+            self._condition.notify_all()
         
-        logger_manager.info(f"调度器已设置 - 监控间隔: {self.monitor_interval}秒")
+        intervals = ', '.join(f"{name}={interval:g}秒" for name, interval in collector_intervals.items())
+        logger_manager.info(f"调度器已设置 - 监控间隔: {self.monitor_interval}秒 ({intervals}), "
+                            f"相位偏移: {phase:.2f}秒, 抖动: {self.jitter:g}秒")
     
-    def _monitor_job(self) -> None:
-        """主监控任务"""
+    def _monitor_job(self, collectors: Optional[List[str]] = None) -> List[MonitorData]:
+        """
+        主监控任务
+        
+        Args:
+            collectors: 本批次到期的采集项，为None时采集全部启用的指标
+            
+        Returns:
+            本次采集的监控数据，执行异常时返回空列表
+        """
         try:
-            logger_manager.debug("开始执行监控任务")
+            logger_manager.debug("开始执行监控任务: %s", collectors or '全部')
             
-            # 收集所有指标
-            all_metrics = resource_monitor.collect_all_metrics()
+            # 收集本批次指标
+            if collectors is None:
+                all_metrics = resource_monitor.collect_all_metrics()
+            else:
+                all_metrics = resource_monitor.collect_metrics(collectors)
             
-            # 交由告警引擎处理
-            alert_engine.check_and_process(all_metrics)
+            # 写入结构化指标输出和本地时序存储（未启用时直接返回）
+            metrics_sink.write(all_metrics)
+            time_series_store.append_metrics(all_metrics)
+            
+            # 推送到集群汇聚端（非 agent 模式时直接返回）
+            fleet_agent.push(all_metrics)
+            
+            # 交由告警引擎处理（agent 模式下默认由汇聚端统一告警）
+            if fleet_agent.alerts_locally:
+                alert_engine.check_and_process(all_metrics)
+            
+            # 重新渲染 Prometheus 暴露文本（未启用时直接返回）
+            prometheus_exporter.publish(all_metrics, self)
             
             logger_manager.debug("监控任务执行完成")
+            return all_metrics
             
         except Exception as e:
             logger_manager.error(f"监控任务执行异常: {str(e)}")
+            return []
     
     def _cleanup_job(self) -> None:
         """清理任务"""
@@ -67,6 +374,11 @@ class MonitorScheduler:
             # 清理过期告警记录
             alert_engine.cleanup_old_alerts()
             
+            # 把新的原始样本压缩归档，并删除过期归档
+            archived = time_series_store.archive_pending()
+            if archived:
+                logger_manager.debug("已归档 %d 个样本", archived)
+            
             logger_manager.debug("清理任务执行完成")
             
         except Exception as e:
@@ -80,12 +392,12 @@ class MonitorScheduler:
             # 获取系统信息
             system_info = resource_monitor.get_system_info()
             
-            # 检查配置是否有效
-            try:
-                config_manager.load_config()
-                logger_manager.debug("配置文件检查正常")
-            except Exception as e:
-                logger_manager.error(f"配置文件检查失败: {str(e)}")
+            # 将本地时序存储的内存映射同步到磁盘
+            time_series_store.flush()
+            
+            # 配置文件变化由监听线程处理，这里只报告最近一次加载失败
+            if config_watcher.last_error:
+                logger_manager.warning(f"配置文件最近一次加载失败，仍使用原配置: {config_watcher.last_error}")
             
             # 获取告警状态
             alert_status = alert_engine.get_alert_status()
@@ -117,75 +429,177 @@ class MonitorScheduler:
         if not self.running:
             return
         
-        self.running = False
-        schedule.clear()
+        with self._condition:
+            self.running = False
+            self._jobs = []
+            self._condition.notify_all()
         
         if self.scheduler_thread and self.scheduler_thread.is_alive():
             self.scheduler_thread.join(timeout=5)
         
         logger_manager.info("监控调度器已停止")
     
+    def _next_due_jobs(self) -> List[ScheduledJob]:
+        """
+        等待直到有任务到期
+        
+        在条件变量上睡眠到最近的截止时间，stop/reload 会立即唤醒。
+        
+        Returns:
+            到期的任务列表（同批次同时到期的任务一并返回），调度器停止时返回空列表
+        """
+        with self._condition:
+            while self.running:
+                if not self._jobs:
+                    self._condition.wait()
+                    continue
+                
+                job = min(self._jobs, key=lambda item: item.due_at)
+                remaining = job.due_at - time.monotonic()
+                if remaining > 0:
+                    self._condition.wait(remaining)
+                    continue
+                
+                return self._due_batch(job)
+        return []
+    
+    def _due_batch(self, job: ScheduledJob) -> List[ScheduledJob]:
+        """
+        获取与到期任务同批次、同一时刻到期的全部任务
+        
+        Args:
+            job: 已到期的任务
+            
+        Returns:
+            本次需要一起执行的任务列表
+        """
+        if job.batch is None:
+            return [job]
+        return [other for other in self._jobs
+                if other.batch == job.batch
+                and other.deadline <= job.deadline + BATCH_TOLERANCE]
+    
+    def _finish_run(self, jobs: List[ScheduledJob], started: float) -> None:
+        """
+        记录执行统计并推进截止时间
+        
+        Args:
+            jobs: 本次执行的任务
+            started: 开始执行的单调时钟时间
+        """
+        now = time.monotonic()
+        duration = now - started
+        
+        with self._condition:
+            # 任务执行期间可能发生了重载，只推进仍在列表中的任务
+            for job in jobs:
+                job.stats.record_run(duration, max(started - job.due_at, 0.0),
+                                     job.interval, self.late_tolerance)
+                if job in self._jobs:
+                    job.deadline = job.next_deadline(now, self.overrun_policy)
+                    job.delay = self._draw_jitter(job)
+        
+        if duration > min(job.interval for job in jobs):
+            logger_manager.warning(f"任务执行超时: {[job.name for job in jobs]} "
+                                   f"耗时 {duration:.2f}秒，超时策略: {self.overrun_policy}")
+    
     def _run_scheduler(self) -> None:
         """运行调度器主循环"""
         logger_manager.info("调度器主循环开始")
         
         while self.running:
+            jobs = self._next_due_jobs()
+            if not jobs:
+                break
+            
+            started = time.monotonic()
             try:
-                schedule.run_pending()
-                time.sleep(1)  # 每秒检查一次
+                with self._run_lock:
+                    for job in jobs:
+                        job.last_run = time.time()
+                    if jobs[0].batch is None:
+                        jobs[0].func()
+                    else:
+                        jobs[0].func([job.name for job in jobs])
             except Exception as e:
                 logger_manager.error(f"调度器运行异常: {str(e)}")
-                time.sleep(5)  # 发生异常时等待5秒后继续
+            
+            self._finish_run(jobs, started)
         
         logger_manager.info("调度器主循环结束")
     
-    def run_once(self) -> None:
-        """手动执行一次监控任务"""
+    def run_once(self) -> List[MonitorData]:
+        """
+        手动执行一次监控任务（与调度线程中的任务串行执行）
+        
+        Returns:
+            本次采集的监控数据
+        """
         logger_manager.info("手动执行监控任务")
-        self._monitor_job()
+        with self._run_lock:
+            return self._monitor_job()
+    
+    @staticmethod
+    def _format_deadline(deadline: float) -> str:
+        """将单调时钟截止时间换算为墙上时钟字符串"""
+        wall_time = time.time() + (deadline - time.monotonic())
+        return datetime.fromtimestamp(wall_time).strftime('%Y-%m-%d %H:%M:%S')
     
     def get_next_run_time(self) -> Optional[str]:
         """获取下次运行时间"""
-        try:
-            next_run = schedule.next_run()
-            if next_run:
-                return next_run.strftime('%Y-%m-%d %H:%M:%S')
-        except Exception:
-            pass
-        return None
+        with self._condition:
+            if not self._jobs:
+                return None
+            deadline = min(job.due_at for job in self._jobs)
+        return self._format_deadline(deadline)
+    
+    def count_due_jobs(self) -> int:
+        """已到期但尚未执行的任务数（调度积压）"""
+        now = time.monotonic()
+        with self._condition:
+            return sum(1 for job in self._jobs if job.due_at <= now)
     
     def get_jobs_info(self) -> list:
         """获取任务信息"""
         jobs_info = []
         
-        for job in schedule.jobs:
-            try:
-                next_run = job.next_run.strftime('%Y-%m-%d %H:%M:%S') if job.next_run else 'N/A'
-                jobs_info.append({
-                    'job_func': str(job.job_func),
-                    'interval': str(job.interval),
-                    'unit': job.unit,
-                    'next_run': next_run
-                })
-            except Exception as e:
-                logger_manager.error(f"获取任务信息失败: {str(e)}")
+        with self._condition:
+            jobs = list(self._jobs)
+        
+        for job in jobs:
+            last_run = datetime.fromtimestamp(job.last_run).strftime('%Y-%m-%d %H:%M:%S') \
+                if job.last_run else 'N/A'
+            jobs_info.append({
+                'job_func': job.name,
+                'interval': str(int(job.interval)),
+                'unit': 'seconds',
+                'aligned': job.align,
+                'last_run': last_run,
+                'next_run': self._format_deadline(job.due_at),
+                'stats': job.stats.to_dict()
+            })
         
         return jobs_info
     
-    def reload_config(self) -> None:
-        """重新加载配置并重新设置任务"""
-        if self.running:
-            logger_manager.info("重新加载配置...")
-            
-            # 重新加载配置
-            config_manager.reload_config()
-            self.monitor_config = config_manager.get_monitor_config()
-            self.monitor_interval = self.monitor_config.get('interval', 60)
-            
-            # 重新设置任务
-            self.setup_jobs()
+    def reload_config(self) -> List[Tuple[str, Exception]]:
+        """
+        重新加载配置，新配置推送给所有订阅者（包括本调度器）
+        
+        与调度线程中的任务串行执行，订阅者应用新配置时不会有采集批次正在进行。
+        
+        Returns:
+            应用失败的订阅者及异常列表
             
-            logger_manager.info("配置已重新加载")
+        Raises:
+            Exception: 配置文件无效（保留原配置）
+        """
+        logger_manager.info("重新加载配置...")
+        with self._run_lock:
+            errors = config_manager.reload_config()
+        for name, error in errors:
+            logger_manager.error(f"配置变更应用失败 - {name}: {str(error)}")
+        logger_manager.info("配置已重新加载")
+        return errors
 
 
 # 全局调度器实例
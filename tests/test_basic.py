@@ -35,6 +35,29 @@ class TestConfigManager:
         assert config_manager.is_metric_enabled('memory') == True
         assert config_manager.is_metric_enabled('disk') == True
 
+    def test_snapshot_is_frozen_and_precomputed(self):
+        """测试配置快照只读且预计算采集项配置"""
+        config_manager = ConfigManager('config/config.yaml')
+        snapshot = config_manager.snapshot
+
+        assert snapshot.metrics['cpu'].threshold == config_manager.get('monitor.cpu.threshold')
+        assert config_manager.get_metric_settings('unknown').enabled == False
+        assert config_manager.get('monitor.missing', 'default') == 'default'
+        with pytest.raises(TypeError):
+            config_manager.get_monitor_config()['interval'] = 1
+
+    def test_invalid_reload_keeps_snapshot(self, tmp_path):
+        """测试重新加载失败时保留原快照"""
+        config_file = tmp_path / 'config.yaml'
+        config_file.write_text(Path('config/config.yaml').read_text(encoding='utf-8'), encoding='utf-8')
+        config_manager = ConfigManager(str(config_file))
+        snapshot = config_manager.snapshot
+
+        config_file.write_text('monitor: {interval: 60}\n', encoding='utf-8')
+        with pytest.raises(ValueError):
+            config_manager.reload_config()
+        assert config_manager.snapshot is snapshot
+
 
 class TestResourceMonitor:
     """资源监控器测试"""
@@ -0,0 +1,125 @@
+"""
+配置热加载测试
+"""
+
+import sys
+import time
+import threading
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.services.config import ConfigManager, config_manager
+from src.services.config_watcher import ConfigWatcher
+from src.core.alert import AlertEngine
+
+
+def make_config(tmp_path, threshold=80.0):
+    """基于默认配置生成临时配置文件"""
+    content = Path('config/config.yaml').read_text(encoding='utf-8')
+    config_file = tmp_path / 'config.yaml'
+    config_file.write_text(content.replace('threshold: 80.0', f'threshold: {threshold}'), encoding='utf-8')
+    return config_file
+
+
+class TestConfigReload:
+    """配置变更推送测试"""
+
+    def test_subscribers_receive_new_snapshot(self, tmp_path):
+        """测试重新加载后订阅者收到新快照，已回收的订阅者被移除"""
+        config_file = make_config(tmp_path)
+        manager = ConfigManager(str(config_file))
+        received = []
+        manager.subscribe(lambda snapshot: received.append(snapshot.metrics['cpu'].threshold))
+
+        class Component:
+            def __init__(self):
+                self.snapshot = None
+
+            def apply_config(self, snapshot):
+                self.snapshot = snapshot
+
+        def broken(snapshot):
+            raise RuntimeError('boom')
+
+        component = Component()
+        manager.subscribe(broken)
+        manager.subscribe(component.apply_config)
+
+        make_config(tmp_path, threshold=70.0)
+        errors = manager.reload_config()
+        assert received == [70.0]
+        assert component.snapshot is manager.snapshot
+        assert len(errors) == 1
+
+        del component
+        manager.reload_config()
+        assert len(manager._subscribers) == 2
+
+    def test_has_changed_ignores_touch(self, tmp_path):
+        """测试只改元数据不改内容时不视为变化"""
+        config_file = make_config(tmp_path)
+        manager = ConfigManager(str(config_file))
+
+        config_file.write_text(config_file.read_text(encoding='utf-8'), encoding='utf-8')
+        assert not manager.has_changed()
+
+        make_config(tmp_path, threshold=75.0)
+        assert manager.has_changed()
+
+    def test_alert_engine_keeps_state(self):
+        """测试告警引擎应用新配置时保留告警状态和检测器"""
+        engine = AlertEngine()
+        engine._persistent_alerts.add('cpu')
+        detector = engine.anomaly_detector
+
+        snapshot = config_manager.snapshot
+        engine.apply_config(snapshot)
+
+        assert engine._persistent_alerts == {'cpu'}
+        assert engine.anomaly_detector is detector
+
+
+class TestConfigWatcher:
+    """配置文件监听测试"""
+
+    def test_file_change_triggers_one_reload(self, tmp_path):
+        """测试文件变化后防抖并只重新加载一次"""
+        config_file = make_config(tmp_path)
+        manager = ConfigManager(str(config_file))
+        reloaded = threading.Event()
+        thresholds = []
+
+        def on_reload(snapshot):
+            thresholds.append(snapshot.metrics['cpu'].threshold)
+            reloaded.set()
+
+        manager.subscribe(on_reload)
+        watcher = ConfigWatcher(manager)
+        watcher.start()
+        try:
+            time.sleep(0.1)
+            for threshold in (71.0, 72.0, 73.0):
+                make_config(tmp_path, threshold=threshold)
+                time.sleep(0.05)
+            assert reloaded.wait(10)
+            time.sleep(0.2)
+        finally:
+            watcher.stop()
+
+        assert thresholds == [73.0]
+        assert watcher.reload_count == 1
+
+    def test_invalid_config_keeps_previous(self, tmp_path):
+        """测试新配置无效时保留原配置且不重复尝试"""
+        config_file = make_config(tmp_path)
+        manager = ConfigManager(str(config_file))
+        snapshot = manager.snapshot
+        watcher = ConfigWatcher(manager)
+
+        config_file.write_text('monitor: {interval: 60}\n', encoding='utf-8')
+        assert not watcher.check()
+        assert watcher.last_error
+        assert manager.snapshot is snapshot
+        assert not watcher.check()
@@ -0,0 +1,139 @@
+"""
+本地控制接口测试
+"""
+
+import sys
+import socket
+import threading
+from pathlib import Path
+from datetime import datetime
+from unittest.mock import patch
+
+import pytest
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.core.alert import AlertEngine
+from src.core.monitor import MonitorData
+from src.main import Monitor4DingTalk
+from src.utils.control import ControlServer
+from src.utils.control_client import ControlClient, ControlError
+from src.utils.scheduler import MonitorScheduler
+
+pytestmark = pytest.mark.skipif(not hasattr(socket, 'AF_UNIX'), reason='需要 Unix 域套接字')
+
+
+@pytest.fixture
+def server(tmp_path):
+    """在临时目录监听的控制接口"""
+    control = ControlServer()
+    control.path = str(tmp_path / 'control.sock')
+    assert control.start(MonitorScheduler())
+    yield control
+    control.stop()
+
+
+class TestControlServer:
+    """控制接口测试"""
+
+    def test_status_roundtrip(self, server):
+        """测试通过套接字查询状态"""
+        client = ControlClient(server.path)
+        assert client.available()
+
+        status = client.request('status')
+        assert status['scheduler'] == {'running': False}
+        assert 'persistent_alerts' in status['alerts']
+        assert status['control']['requests'] == 1
+        assert client.request('jobs') == []
+
+    def test_errors_are_returned(self, server):
+        """测试未知命令、参数错误和执行失败返回给客户端"""
+        client = ControlClient(server.path)
+        with pytest.raises(ControlError, match='未知命令'):
+            client.request('nope')
+        with pytest.raises(ControlError, match='参数错误'):
+            client.request('status', verbose=True)
+        with pytest.raises(ControlError, match='调度器未运行'):
+            client.request('run_once')
+
+    def test_reload_runs_through_scheduler(self, server):
+        """测试重新加载配置交给调度器执行（与采集任务串行）"""
+        with patch.object(server.scheduler, 'reload_config', return_value=[]) as reload_config:
+            assert ControlClient(server.path).request('reload') == {'errors': []}
+        reload_config.assert_called_once_with()
+
+    def test_alert_status_while_evaluating(self):
+        """测试其它线程读取告警状态时，告警判断同时新增指标不会导致迭代出错"""
+        engine = AlertEngine()
+        stop = threading.Event()
+        errors = []
+
+        def read_status():
+            while not stop.is_set():
+                try:
+                    engine.get_alert_status()
+                except RuntimeError as e:
+                    errors.append(e)
+
+        reader = threading.Thread(target=read_status)
+        reader.start()
+        try:
+            for i in range(3000):
+                data = MonitorData(f'metric_{i}', 90.0, 80.0, '%', datetime.now(), 'test-host')
+                engine.evaluate([data])
+                engine._record_delivery(data, True)
+        finally:
+            stop.set()
+            reader.join()
+        assert errors == []
+
+    def test_cli_distinguishes_not_running_from_unreachable(self, tmp_path):
+        """测试命令行只在套接字不存在或拒绝连接时视为未运行，响应超时报告为错误"""
+        app = Monitor4DingTalk()
+        app.client = ControlClient(str(tmp_path / 'missing.sock'), timeout=0.2)
+        assert app.query_daemon('status') is None
+
+        # 在监听但不响应的进程（如正忙）
+        busy = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        busy.bind(str(tmp_path / 'busy.sock'))
+        busy.listen(1)
+        try:
+            app.client = ControlClient(str(tmp_path / 'busy.sock'), timeout=0.2)
+            with pytest.raises(ControlError, match='超时'):
+                app.query_daemon('status')
+        finally:
+            busy.close()
+
+    def test_cli_reports_daemon_errors(self, server, capsys):
+        """测试监控进程执行命令失败时命令行输出错误而不是抛出异常"""
+        app = Monitor4DingTalk()
+        app.client = ControlClient(server.path)
+        server.commands['status'] = server.commands['silences'] = server.commands['unsilence'] = \
+            lambda **args: 1 / 0
+
+        assert not app.show_status()
+        assert not app.list_silences()
+        assert not app.remove_silence('abc')
+        assert capsys.readouterr().out.count('❌') == 3
+
+    def test_stale_socket_replaced_and_removed(self, tmp_path):
+        """测试残留的套接字文件被替换，停止后删除"""
+        path = tmp_path / 'control.sock'
+        stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stale.bind(str(path))
+        stale.close()
+
+        control = ControlServer()
+        control.path = str(path)
+        assert control.start(None)
+
+        other = ControlServer()
+        other.path = str(path)
+        assert not other.start(None)
+
+        control.stop()
+        assert not path.exists()
+        with pytest.raises(OSError):
+            ControlClient(str(path)).request('status')
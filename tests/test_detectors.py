@@ -0,0 +1,207 @@
+"""
+派生告警检测器测试（异常检测、容量预测、变化率、分位数草图）
+"""
+
+import sys
+from pathlib import Path
+from datetime import datetime
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.core.monitor import MonitorData
+from src.core.anomaly import AnomalyDetector, EWMAState
+from src.core.forecast import CapacityForecaster, LinearTrend
+from src.core.rate import RateDetector
+from src.core.sketch import DDSketch, QuantileTracker
+from src.services.dingtalk import dingtalk_notifier
+
+
+def make_data(metric, value, timestamp=None):
+    """构造监控数据"""
+    return MonitorData(metric=metric, value=value, threshold=100.0,
+                       unit='%', timestamp=timestamp, hostname='test-host')
+
+
+class TestAnomalyDetector:
+    """EWMA异常检测测试"""
+
+    def test_ewma_converges(self):
+        """测试EWMA均值收敛"""
+        state = EWMAState()
+        for _ in range(200):
+            state.update(50.0, 0.1)
+        assert abs(state.mean - 50.0) < 1e-9
+        assert state.std < 1e-6
+
+    def test_flags_spike_after_warmup(self):
+        """测试预热后识别突增"""
+        detector = AnomalyDetector({'enabled': True, 'metrics': ['cpu'],
+                                    'warmup': 10, 'k': 3.0, 'min_std': 1.0})
+
+        for i in range(10):
+            assert detector.evaluate([make_data('cpu', 20.0 + (i % 2))]) == []
+
+        normal = detector.evaluate([make_data('cpu', 21.0)])
+        assert len(normal) == 1 and normal[0].metric == 'cpu_anomaly'
+        assert not normal[0].is_alert
+
+        spike = detector.evaluate([make_data('cpu', 60.0)])
+        assert spike[0].is_alert
+        assert 'σ' in spike[0].detail
+
+    def test_pattern_and_overrides(self):
+        """测试通配符匹配和单指标参数覆盖"""
+        detector = AnomalyDetector({'enabled': True,
+                                    'metrics': [{'metric': 'disk_*', 'k': 5.0}]})
+        assert detector._settings_for('disk_home')['k'] == 5.0
+        assert detector._settings_for('cpu') is None
+
+    def test_seasonal_bucket(self):
+        """测试季节性分桶基线"""
+        detector = AnomalyDetector({'enabled': True, 'metrics': ['cpu'], 'warmup': 3,
+                                    'seasonality': True, 'min_std': 1.0})
+        night = datetime(2024, 1, 1, 3)
+        noon = datetime(2024, 1, 1, 12)
+        for _ in range(5):
+            detector.evaluate([make_data('cpu', 10.0, night)])
+            detector.evaluate([make_data('cpu', 80.0, noon)])
+
+        # 中午的高负载相对中午分桶基线并不异常
+        result = detector.evaluate([make_data('cpu', 80.0, noon)])
+        assert not result[0].is_alert
+
+
+class TestCapacityForecaster:
+    """容量耗尽预测测试"""
+
+    def test_incremental_least_squares(self):
+        """测试增量最小二乘斜率与窗口淘汰"""
+        trend = LinearTrend(window=3 * 3600)
+        for i in range(100):
+            trend.add(1e6 + i * 600.0, 10.0 + i * 0.5)   # 每10分钟 +0.5，即 3/小时
+
+        assert trend.count == 19
+        assert abs(trend.slope() - 3.0) < 1e-6
+
+    def test_eta_alert(self):
+        """测试增长中的磁盘触发写满预测告警"""
+        forecaster = CapacityForecaster({'enabled': True, 'horizon_hours': 24,
+                                         'min_samples': 3, 'min_span': 600})
+        results = []
+        for i in range(7):
+            results = forecaster.evaluate([make_data('disk_data', 80.0 + i * 0.5)], now=i * 900.0)
+
+        # 每15分钟 +0.5%，即 2%/小时，剩余 17% 约 8.5 小时
+        assert len(results) == 1
+        assert results[0].metric == 'disk_data_forecast'
+        assert results[0].is_alert
+        assert abs(results[0].value - 8.5) < 1e-6
+        assert '8.5 小时' in results[0].detail
+
+    def test_flat_disk_not_alerting(self):
+        """测试用量不变时不告警"""
+        forecaster = CapacityForecaster({'enabled': True, 'min_samples': 3, 'min_span': 600})
+        for i in range(5):
+            results = forecaster.evaluate([make_data('disk_root', 91.0)], now=i * 900.0)
+        assert not results[0].is_alert
+        assert forecaster.evaluate([make_data('cpu', 91.0)], now=9000.0) == []
+
+        message = dingtalk_notifier._format_recovery_message(results[0], server_ip='10.0.0.1')
+        assert '不会写满' in message['markdown']['text'] and 'inf' not in message['markdown']['text']
+
+    def test_forecast_alert_level(self):
+        """测试预测告警的剩余时间越短级别越高"""
+        assert dingtalk_notifier._determine_alert_level(1.0, 24.0, 'disk_root_forecast') == "🔴 严重"
+        assert dingtalk_notifier._determine_alert_level(10.0, 24.0, 'disk_root_forecast') == "🟠 警告"
+        assert dingtalk_notifier._determine_alert_level(20.0, 24.0, 'disk_root_forecast') == "🟡 注意"
+        assert dingtalk_notifier._determine_alert_level(99.0, 80.0, 'cpu') == "🔴 严重"
+
+
+class TestRateDetector:
+    """变化率检测测试"""
+
+    def test_increase_over_window(self):
+        """测试窗口内增长超过阈值时告警"""
+        detector = RateDetector([{'metric': 'memory', 'increase': 10, 'window': 1800}])
+
+        results = []
+        for i in range(13):
+            # 每5分钟上升1个百分点
+            results = detector.evaluate([make_data('memory', 50.0 + i)], now=i * 300.0)
+            if i < 5:
+                assert results == []
+
+        assert results[0].metric == 'memory_rate'
+        assert results[0].value == 6.0
+        assert not results[0].is_alert
+
+        detector = RateDetector([{'metric': 'memory', 'increase': 5, 'window': 1800}])
+        for i in range(13):
+            results = detector.evaluate([make_data('memory', 50.0 + i)], now=i * 300.0)
+        assert results[0].is_alert
+
+    def test_ring_bounded(self):
+        """测试缓冲区容量有上限，抽稀后仍保留窗口基准"""
+        detector = RateDetector([{'metric': 'cpu', 'increase': 1, 'window': 50, 'max_samples': 8}])
+        for i in range(100):
+            results = detector.evaluate([make_data('cpu', float(i))], now=float(i))
+        assert len(detector._rings['cpu']) <= 8
+        assert results and results[0].value >= 50
+
+    def test_window_longer_than_capacity(self):
+        """测试窗口内的样本数远超缓冲区容量时仍能告警"""
+        detector = RateDetector([{'metric': 'memory', 'increase': 10, 'window': 1800}])
+        results = []
+        for i in range(4000):
+            # 每秒一个样本，4000秒内上升40个百分点
+            results = detector.evaluate([make_data('memory', 40.0 + i / 100)], now=float(i))
+        assert len(detector._rings['memory']) <= 1024
+        assert results[0].is_alert
+        assert 18.0 <= results[0].value <= 18.1
+
+
+class TestQuantileSketch:
+    """分位数草图测试"""
+
+    def test_relative_accuracy(self):
+        """测试分位数估计值的相对误差在配置范围内"""
+        sketch = DDSketch(relative_accuracy=0.01)
+        values = [float(i) for i in range(1, 10001)]
+        for value in values:
+            sketch.add(value)
+
+        for q in (0.5, 0.95, 0.99):
+            exact = values[int(q * (len(values) - 1))]
+            assert abs(sketch.quantile(q) - exact) <= 0.01 * exact
+        assert sketch.quantile(0) == 1.0 and sketch.quantile(1) == 10000.0
+        assert len(sketch.positive) < 1000
+
+    def test_memory_bounded(self):
+        """测试桶数不超过上限"""
+        sketch = DDSketch(relative_accuracy=0.01, max_buckets=64)
+        for i in range(1, 100000, 7):
+            sketch.add(float(i))
+        assert len(sketch.positive) == 64
+        assert sketch.count == len(range(1, 100000, 7))
+        assert abs(sketch.quantile(0.99) - 99000) <= 0.01 * 99000
+
+    def test_serialize_and_merge(self):
+        """测试序列化后合并的结果与直接合并一致"""
+        import json
+
+        first = QuantileTracker({'enabled': True, 'metrics': ['cpu']})
+        second = QuantileTracker({'enabled': True, 'metrics': ['cpu']})
+        for i in range(100):
+            first.update([make_data('cpu', float(i)), make_data('memory', 1.0)])
+            second.update([make_data('cpu', float(i + 100))])
+
+        merged = QuantileTracker({'enabled': True})
+        merged.merge(json.loads(json.dumps(first.export())))
+        merged.merge(json.loads(json.dumps(second.export(reset=True))))
+
+        sketch = merged.get_sketch('cpu')
+        assert sketch.count == 200 and sketch.min == 0.0 and sketch.max == 199.0
+        assert abs(sketch.quantile(0.5) - 99.0) <= 1.0
+        assert first.get_sketch('memory') is None
+        assert second.get_sketch('cpu') is None
@@ -0,0 +1,72 @@
+"""
+Prometheus 指标导出测试
+"""
+
+import sys
+from pathlib import Path
+from datetime import datetime
+from urllib.request import urlopen
+from urllib.error import HTTPError
+
+import pytest
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.utils.exporter import PrometheusExporter
+from src.utils.scheduler import MonitorScheduler
+from src.core.monitor import MonitorData
+
+
+def make_exporter(**overrides):
+    """创建监听随机端口的导出器"""
+    exporter = PrometheusExporter()
+    exporter._load_settings(dict({'enabled': True, 'port': 0}, **overrides))
+    return exporter
+
+
+def make_data(metric, value, unit='%'):
+    """构造监控数据"""
+    return MonitorData(metric=metric, value=value, threshold=80.0, unit=unit,
+                       timestamp=datetime(2024, 1, 1), hostname='test-host')
+
+
+class TestPrometheusExporter:
+    """指标导出测试"""
+
+    def test_render_merges_batches(self):
+        """测试分批采集的指标合并导出，标签值正确转义"""
+        exporter = make_exporter()
+        exporter.publish([make_data('cpu', 50.0)])
+        exporter.publish([make_data('disk_/data"x', 95.0)], MonitorScheduler())
+
+        text = exporter.cached.decode('utf-8')
+        assert 'monitor4dingtalk_metric_value{metric="cpu",unit="%"} 50.0' in text
+        assert 'monitor4dingtalk_metric_breach{metric="disk_/data\\"x"} 1\n' in text
+        assert '# TYPE monitor4dingtalk_job_duration_seconds histogram' in text
+        assert exporter.renders == 2
+
+    def test_disabled_does_not_render(self):
+        """测试未启用时不渲染"""
+        exporter = make_exporter(enabled=False)
+        exporter.publish([make_data('cpu', 50.0)])
+        assert exporter.cached == b'' and not exporter.start()
+
+    def test_scrape_serves_cache(self):
+        """测试抓取直接返回缓存，不触发重新渲染"""
+        exporter = make_exporter()
+        exporter.publish([make_data('cpu', 50.0)])
+        assert exporter.start()
+        try:
+            port = exporter._server.server_address[1]
+            for _ in range(3):
+                with urlopen(f'http://127.0.0.1:{port}/metrics', timeout=5) as response:
+                    assert response.read() == exporter.cached
+                    assert response.headers['Content-Type'].startswith('text/plain; version=0.0.4')
+            assert exporter.scrapes == 3 and exporter.renders == 1
+
+            with pytest.raises(HTTPError):
+                urlopen(f'http://127.0.0.1:{port}/other', timeout=5)
+        finally:
+            exporter.stop()
+        assert not exporter.running
@@ -0,0 +1,229 @@
+"""
+集群模式测试
+"""
+
+import sys
+import time
+import random
+from pathlib import Path
+from datetime import datetime
+from unittest.mock import patch
+
+import pytest
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.core.monitor import MonitorData
+from src.core.alert import AlertEngine
+from src.core.vector import VectorEvaluator, MetricBatch
+from src.services.config import config_manager
+from src.services.dingtalk import dingtalk_notifier
+from src.fleet.protocol import encode_frame, decode_frame, pack_cycle, unpack_cycle, split_payloads, FrameError
+from src.fleet.agent import parse_aggregator_url
+from src.fleet.aggregator import FleetAggregator, OFFLINE_METRIC
+
+
+def make_cycle(cpu: float, hostname: str = 'web-01'):
+    """构造一个周期的紧凑数据"""
+    now = datetime.now()
+    return pack_cycle([
+        MonitorData('cpu', cpu, 80.0, '%', now, hostname),
+        MonitorData('memory', 40.0, 85.0, '%', now, hostname),
+    ])
+
+
+class TestFleetProtocol:
+    """指标帧协议测试"""
+
+    def test_frame_roundtrip_and_signature(self):
+        """测试编解码、签名校验和按大小拆分"""
+        payload = {'h': 'web-01', 'ip': '10.0.0.1', 'b': 'abc', 'q': 1, 'c': [make_cycle(95.0)]}
+        frame = encode_frame(payload, token='secret')
+
+        decoded = decode_frame(frame, token='secret')
+        metrics = unpack_cycle(decoded['c'][0], decoded['h'], decoded['ip'])
+        assert [(data.metric, data.value, data.server_ip) for data in metrics] == [
+            ('cpu', 95.0, '10.0.0.1'), ('memory', 40.0, '10.0.0.1')]
+        assert metrics[0].is_alert and not metrics[1].is_alert
+
+        tampered = frame[:-1] + bytes([frame[-1] ^ 0xFF])
+        with pytest.raises(FrameError):
+            decode_frame(tampered, token='secret')
+        with pytest.raises(FrameError):
+            decode_frame(encode_frame(payload), token='secret')
+        with pytest.raises(FrameError):
+            decode_frame(b'garbage')
+
+        cycles = [make_cycle(float(i)) for i in range(8)]
+        payloads = split_payloads({'h': 'web-01'}, cycles, max_size=60)
+        assert len(payloads) > 1
+        assert sum(len(item['c']) for item in payloads) == 8
+
+    def test_parse_aggregator_url(self):
+        """测试汇聚端地址解析"""
+        assert parse_aggregator_url('udp://10.0.0.9') == ('udp', ('10.0.0.9', 9470))
+        assert parse_aggregator_url('http://agg:8080') == ('http', 'http://agg:8080/ingest')
+        with pytest.raises(ValueError):
+            parse_aggregator_url('tcp://agg:1')
+
+
+class TestFleetAggregator:
+    """汇聚端测试"""
+
+    @pytest.mark.parametrize('evaluator', ['engine', 'vector'])
+    def test_per_host_state_and_offline(self, evaluator):
+        """测试按主机独立告警、重复帧丢弃和离线告警"""
+        if evaluator == 'vector':
+            pytest.importorskip('numpy')
+        with patch('src.core.alert.dingtalk_notifier') as mock_notifier, \
+                patch('src.fleet.grouping.dingtalk_notifier', mock_notifier):
+            mock_notifier.send_alert.return_value = True
+            self.check_aggregator(evaluator, mock_notifier)
+
+    def check_aggregator(self, evaluator, mock_notifier):
+        """按指定的判断方式走一遍上报、重复帧、离线和恢复流程"""
+        aggregator = FleetAggregator()
+        aggregator.token = 'secret'
+        aggregator.host_timeout = 60
+        aggregator.evaluator_mode = evaluator
+        aggregator._configure_evaluator(config_manager.get_alert_config())
+        assert aggregator.get_status()['evaluator']['mode'] == evaluator
+
+        # 每帧携带连续 consecutive_checks 个周期
+        checks = config_manager.get_alert_config().get('consecutive_checks', 1)
+        now = time.time()
+        for hostname, cpu in (('web-01', 95.0), ('web-02', 10.0)):
+            frame = encode_frame({'h': hostname, 'ip': '10.0.0.1', 'b': 'boot', 'q': 1,
+                                  'c': [make_cycle(cpu, hostname)] * checks}, token='secret')
+            assert aggregator.submit(frame) == 'accepted'
+            aggregator.process(aggregator._queue.get_nowait(), now=now)
+
+        assert aggregator.submit(b'M4\x01\x00junk') == 'rejected'
+        assert aggregator.get_status()['hosts'] == 2
+        sent = [call.args[0] for call in mock_notifier.send_alert.call_args_list]
+        assert [(data.hostname, data.metric, data.server_ip) for data in sent] == [('web-01', 'cpu', '10.0.0.1')]
+
+        # 重试造成的重复帧不再计入
+        duplicate = {'h': 'web-01', 'b': 'boot', 'q': 1, 'c': [make_cycle(95.0)]}
+        assert aggregator.process(duplicate, now=now) == 0
+        assert aggregator.duplicates == 1
+
+        # 超时未上报的主机产生离线告警，web-02 恢复上报后发送恢复通知
+        for second in range(checks):
+            assert aggregator.check_offline(now + 61 + second) == ['web-01', 'web-02']
+        offline = [call.args[0] for call in mock_notifier.send_alert.call_args_list[1:]]
+        assert {data.hostname for data in offline} == {'web-01', 'web-02'}
+        assert all(data.metric == OFFLINE_METRIC for data in offline)
+
+        aggregator.process({'h': 'web-02', 'b': 'boot', 'q': 2, 'c': [make_cycle(10.0, 'web-02')]}, now=now + 70)
+        recovered = mock_notifier.send_recovery_notification.call_args[0][0]
+        assert (recovered.hostname, recovered.metric) == ('web-02', OFFLINE_METRIC)
+        assert aggregator.get_status()['offline_hosts'] == ['web-01']
+
+
+    @pytest.mark.parametrize('evaluator', ['engine', 'vector'])
+    def test_alert_storm_grouping(self, evaluator):
+        """测试多台主机同一指标、同一级别的告警和恢复合并为一条消息"""
+        if evaluator == 'vector':
+            pytest.importorskip('numpy')
+        with patch('src.core.alert.dingtalk_notifier') as mock_notifier, \
+                patch('src.fleet.grouping.dingtalk_notifier', mock_notifier), \
+                patch('src.core.alert.time') as clock:
+            mock_notifier.send_alert.return_value = True
+            mock_notifier.send_group_alert.return_value = True
+            mock_notifier.get_alert_level.side_effect = lambda data: 'high' if data.value >= 90 else 'low'
+
+            aggregator = FleetAggregator()
+            aggregator.evaluator_mode = evaluator
+            aggregator._configure_evaluator(config_manager.get_alert_config())
+            aggregator.grouper.configure({'enabled': True, 'window': 30, 'min_hosts': 3})
+
+            checks = config_manager.get_alert_config().get('consecutive_checks', 1)
+            now = clock.time.return_value = time.time()
+            hosts = {f'nfs-{i:02d}': 95.0 for i in range(5)}
+            hosts['web-01'] = 85.0
+
+            def report(seq, values, at):
+                aggregator.process_batch([{'h': hostname, 'b': 'boot', 'q': seq,
+                                           'c': [make_cycle(values.get(hostname, 10.0), hostname)] * checks}
+                                          for hostname in hosts], now=at)
+
+            # 窗口内只收集，不推送；同一主机在窗口内再次达到告警条件不会重复计入
+            report(1, hosts, now)
+            report(2, dict(hosts, **{'web-01': 95.0}), now + 10)
+            mock_notifier.send_alert.assert_not_called()
+            assert aggregator.get_status()['grouping']['pending_items'] == 6
+
+            report(3, hosts, now + 30)
+            group = mock_notifier.send_group_alert.call_args[0][0]
+            assert mock_notifier.send_group_alert.call_count == 1
+            assert sorted(data.hostname for data in group) == [f'nfs-{i:02d}' for i in range(5)]
+            # 同级别的主机不足 min_hosts 时逐条推送
+            assert [call[0][0].hostname for call in mock_notifier.send_alert.call_args_list] == ['web-01']
+
+            # 推送成功后进入去重窗口，全部恢复时恢复通知同样合并
+            clock.time.return_value = now + 30
+            report(4, hosts, now + 60)
+            aggregator.grouper.flush(now + 120)
+            assert mock_notifier.send_group_alert.call_count == 1
+            report(5, {}, now + 120)
+            aggregator.grouper.flush(now + 150)
+            recovered = mock_notifier.send_group_recovery.call_args[0][0]
+            assert len(recovered) == 6
+            mock_notifier.send_recovery_notification.assert_not_called()
+
+        # 汇总消息按当前值从高到低列出主机，超出 max_listed 的只计数
+        items = [MonitorData('cpu', value, 80.0, '%', datetime.now(), f'nfs-{i}', server_ip='10.0.0.1')
+                 for i, value in enumerate((91.0, 99.0, 95.0))]
+        text = dingtalk_notifier._format_group_message(items, max_listed=2)['markdown']['text']
+        assert text.index('nfs-1 (10.0.0.1): 99.00%') < text.index('nfs-2') and 'nfs-0' not in text
+        assert '等共 3 台' in text
+
+
+class TestVectorEvaluator:
+    """列式阈值判断测试"""
+
+    def test_matches_alert_engine(self):
+        """测试连续次数、去重和恢复的结果与告警引擎逐个判断一致"""
+        pytest.importorskip('numpy')
+        rng = random.Random(7)
+        hosts = [f'host-{i}' for i in range(30)]
+        evaluator = VectorEvaluator(consecutive_checks=3, dedup_window=300)
+
+        with patch('src.core.alert.dingtalk_notifier') as notifier, patch('src.core.alert.time') as clock:
+            notifier.send_alert.return_value = True
+            engines = {}
+            for hostname in hosts:
+                engines[hostname] = AlertEngine()
+                engines[hostname].consecutive_checks_threshold = 3
+                engines[hostname].dedup_window = 300
+
+            expected, actual = [], []
+            for tick in range(200):
+                now = 1000.0 + tick * 60
+                clock.time.return_value = now
+                notifier.reset_mock()
+                batch = MetricBatch()
+                for hostname in hosts:
+                    value = rng.choice((10.0, 50.0, 95.0))
+                    data = MonitorData('cpu', value, 80.0, '%', datetime.fromtimestamp(now), hostname)
+                    engines[hostname].check_and_process([data])
+                    batch.add(hostname, [evaluator.series_id((hostname, 'cpu'))], [value], [80.0])
+
+                expected.append(sorted(
+                    [('alert', call[0][0].hostname) for call in notifier.send_alert.call_args_list]
+                    + [('recovery', call[0][0].hostname)
+                       for call in notifier.send_recovery_notification.call_args_list]))
+
+                due, recovered = evaluator.evaluate(batch, now)
+                ids = batch.columns()[0]
+                for position in due:
+                    evaluator.record_delivery(ids[position], now)
+                actual.append(sorted([('alert', evaluator.key(ids[i])[0]) for i in due]
+                                     + [('recovery', evaluator.key(ids[i])[0]) for i in recovered]))
+
+        assert actual == expected
+        assert any(ticks for ticks in expected)
+        assert not batch.add('host-0', [evaluator.series_id(('host-0', 'cpu'))], [1.0], [80.0])
+        assert batch.locate(len(batch) - 1) == (None, 0)
@@ -0,0 +1,94 @@
+"""
+日志服务测试
+"""
+
+import sys
+import queue
+import logging
+import threading
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.services.logger import DroppingQueueHandler, BlockingStopQueueListener
+
+
+def make_record(message):
+    """构造日志记录"""
+    return logging.LogRecord('test', logging.INFO, __file__, 0, message, None, None)
+
+
+class SlowHandler(logging.Handler):
+    """模拟缓慢磁盘的处理器"""
+
+    def __init__(self):
+        super().__init__()
+        self.gate = threading.Event()
+        self.messages = []
+
+    def emit(self, record):
+        self.gate.wait(5)
+        self.messages.append(record.getMessage())
+
+
+class TestQueueLogging:
+    """异步日志测试"""
+
+    def test_full_queue_drops_without_blocking(self):
+        """测试队列已满时丢弃日志且不阻塞调用方"""
+        handler = DroppingQueueHandler(queue.Queue(maxsize=2))
+        for i in range(5):
+            handler.handle(make_record(f'm{i}'))
+
+        assert handler.dropped == 3
+        assert handler.queue.qsize() == 2
+
+        # 队列腾出空间后先补记丢弃条数
+        handler.queue.get_nowait()
+        handler.queue.get_nowait()
+        handler.handle(make_record('next'))
+        messages = [handler.queue.get_nowait().getMessage() for _ in range(2)]
+        assert '丢弃了 3 条日志' in messages[0]
+        assert messages[1] == 'next'
+
+    def test_listener_writes_in_background(self):
+        """测试后台线程写入，停止时写完队列中的日志"""
+        log_queue = queue.Queue(maxsize=100)
+        slow = SlowHandler()
+        handler = DroppingQueueHandler(log_queue)
+        listener = BlockingStopQueueListener(log_queue, slow)
+        listener.start()
+
+        for i in range(3):
+            handler.handle(make_record(f'm{i}'))
+        assert slow.messages == []
+
+        slow.gate.set()
+        listener.stop()
+        assert slow.messages == ['m0', 'm1', 'm2']
+
+
+class TestLazyFormatting:
+    """延迟格式化测试"""
+
+    def test_disabled_level_skips_formatting(self):
+        """测试未启用的级别不调用消息构造函数，也不格式化参数"""
+        from src.services.logger import logger_manager
+
+        class Expensive:
+            def __str__(self):
+                raise AssertionError('不应被格式化')
+
+        calls = []
+        logger = logger_manager.get_logger()
+        level = logger.level
+        logger.setLevel(logging.INFO)
+        try:
+            assert not logger_manager.is_enabled_for(logging.DEBUG)
+            logger_manager.debug(lambda: calls.append('built') or 'message')
+            logger_manager.debug("消息: %s", Expensive())
+        finally:
+            logger.setLevel(level)
+
+        assert calls == []
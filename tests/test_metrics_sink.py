@@ -0,0 +1,65 @@
+"""
+结构化指标输出测试
+"""
+
+import sys
+import json
+import gzip
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.services.metrics_sink import MetricsSink
+from src.core.monitor import MonitorData
+
+
+def make_sink(tmp_path, **overrides):
+    """创建写入临时目录的指标输出"""
+    sink = MetricsSink()
+    sink._load_settings(dict({'enabled': True, 'file': str(tmp_path / 'metrics')}, **overrides))
+    return sink
+
+
+def make_metrics(value=50.0):
+    """构造一个周期的监控数据"""
+    return [MonitorData(metric=name, value=value, threshold=80.0, unit='%',
+                        timestamp=None, hostname='test-host') for name in ('cpu', 'memory')]
+
+
+class TestMetricsSink:
+    """指标输出测试"""
+
+    def test_one_json_record_per_cycle(self, tmp_path):
+        """测试每个周期写入一条包含全部指标的 JSON 记录"""
+        sink = make_sink(tmp_path)
+        sink.write(make_metrics(50.0))
+        sink.write(make_metrics(90.0))
+        sink.close()
+
+        lines = (tmp_path / 'metrics.jsonl').read_text(encoding='utf-8').splitlines()
+        records = [json.loads(line) for line in lines]
+        assert len(records) == 2
+        assert [m['metric'] for m in records[0]['metrics']] == ['cpu', 'memory']
+        assert records[1]['metrics'][0]['alert'] is True
+
+    def test_gzip_survives_reopen(self, tmp_path):
+        """测试 gzip 压缩文件多次打开追加后仍可完整解压"""
+        sink = make_sink(tmp_path, compress='gzip')
+        sink.write(make_metrics())
+        sink.close()
+        sink.write(make_metrics())
+        sink.close()
+
+        with gzip.open(str(tmp_path / 'metrics.jsonl.gz'), 'rt', encoding='utf-8') as file:
+            assert len(file.read().splitlines()) == 2
+
+    def test_size_rotation_keeps_backups(self, tmp_path):
+        """测试按大小轮转且只保留指定个数的历史文件"""
+        sink = make_sink(tmp_path, max_size=1, backup_count=2, buffer_size=0)
+        for _ in range(5):
+            sink.write(make_metrics())
+        sink.close()
+
+        assert len(list(tmp_path.glob('metrics.jsonl.*'))) == 2
+        assert (tmp_path / 'metrics.jsonl').exists()
@@ -90,8 +90,7 @@ class TestPython36Compatibility(unittest.TestCase):
         required_packages = [
             'psutil',
             'yaml', 
-            'requests',
-            'schedule'
+            'requests'
         ]
         
         for package in required_packages:
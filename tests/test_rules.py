@@ -0,0 +1,90 @@
+"""
+组合告警规则测试
+"""
+
+import sys
+import pytest
+from pathlib import Path
+from unittest.mock import patch
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.core.rules import compile_expression, compile_rules, RuleSyntaxError
+from src.core.monitor import MonitorData
+from src.core.alert import AlertEngine
+
+
+def make_data(metric, value, threshold=80.0):
+    """构造监控数据"""
+    return MonitorData(metric=metric, value=value, threshold=threshold,
+                       unit='%', timestamp=None, hostname='test-host')
+
+
+class TestRuleExpression:
+    """规则表达式测试"""
+
+    def test_boolean_and_comparison(self):
+        """测试比较和逻辑运算"""
+        expression = compile_expression("cpu > 85 and memory > 90")
+
+        assert expression.names == frozenset({'cpu', 'memory'})
+        assert expression.evaluate({'cpu': 90.0, 'memory': 95.0}) is True
+        assert expression.evaluate({'cpu': 90.0, 'memory': 50.0}) is False
+
+    def test_arithmetic_and_chained_compare(self):
+        """测试算术和链式比较"""
+        expression = compile_expression("10 < (disk_root + disk_home) / 2 <= 50 or not cpu < 99")
+
+        assert expression.evaluate({'disk_root': 20.0, 'disk_home': 40.0, 'cpu': 10.0}) is True
+        assert expression.evaluate({'disk_root': 80.0, 'disk_home': 90.0, 'cpu': 10.0}) is False
+
+    def test_missing_metric(self):
+        """测试引用未采集的指标"""
+        expression = compile_expression("swap > 50")
+        assert expression.evaluate({'cpu': 10.0}) is None
+
+    @pytest.mark.parametrize('source', [
+        "__import__('os').system('id')",
+        "cpu.real > 1",
+        "cpu > 'a'",
+        "[cpu]",
+        "cpu if memory else 1",
+        "",
+    ])
+    def test_rejects_unsafe_syntax(self, source):
+        """测试拒绝不安全或不支持的语法"""
+        with pytest.raises(RuleSyntaxError):
+            compile_expression(source)
+
+    def test_duplicate_rule_names(self):
+        """测试规则名称重复"""
+        with pytest.raises(ValueError):
+            compile_rules([
+                {'name': 'a', 'expression': 'cpu > 1'},
+                {'name': 'a', 'expression': 'memory > 1'},
+            ])
+
+
+class TestRuleAlerting:
+    """规则告警流程测试"""
+
+    @patch('src.core.alert.dingtalk_notifier')
+    def test_rule_follows_consecutive_and_recovery(self, mock_notifier):
+        """测试规则遵循连续次数与恢复通知逻辑"""
+        mock_notifier.send_alert.return_value = True
+        engine = AlertEngine()
+        engine.consecutive_checks_threshold = 2
+        engine.rules = compile_rules([{'name': 'pressure', 'expression': 'cpu > 85 and memory > 90'}])
+
+        breach = [make_data('cpu', 90.0, 95.0), make_data('memory', 95.0, 99.0)]
+
+        assert engine.check_and_process(breach) == {}
+        assert engine.check_and_process(breach) == {'rule_pressure': True}
+        sent = mock_notifier.send_alert.call_args[0][0]
+        assert sent.metric == 'rule_pressure'
+        assert 'cpu=90.00' in sent.detail
+
+        engine.check_and_process([make_data('cpu', 50.0, 95.0)])
+        mock_notifier.send_recovery_notification.assert_called_once()
+        assert 'rule_pressure' not in engine._persistent_alerts
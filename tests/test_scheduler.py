@@ -0,0 +1,252 @@
+"""
+任务调度器测试
+"""
+
+import sys
+import time
+import threading
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.utils.scheduler import MonitorScheduler, ScheduledJob
+
+
+class TestScheduledJob:
+    """截止时间计算测试"""
+
+    def test_no_drift_from_run_duration(self):
+        """测试任务耗时不影响后续节拍"""
+        job = ScheduledJob('monitor', 60, lambda: None)
+        job.deadline = 1000.0
+
+        # 任务在截止时间后 1.5 秒才结束，下次仍在 1060
+        assert job.next_deadline(1001.5) == 1060.0
+
+    def test_skips_missed_cycles(self):
+        """测试错过的周期被跳过且保持原有节拍"""
+        job = ScheduledJob('monitor', 60, lambda: None)
+        job.deadline = 1000.0
+        assert job.next_deadline(1130.0) == 1180.0
+
+    def test_wall_clock_alignment(self):
+        """测试对齐到墙上时钟"""
+        job = ScheduledJob('monitor', 60, lambda: None, align=True)
+        now = time.monotonic()
+        wall_at_deadline = time.time() + (job.first_deadline(now) - now)
+        assert abs(wall_at_deadline % 60) < 0.05 or abs(wall_at_deadline % 60 - 60) < 0.05
+
+
+class TestMonitorScheduler:
+    """调度线程测试"""
+
+    def test_runs_on_deadline_and_stops_immediately(self):
+        """测试按截止时间执行且 stop 立即唤醒调度线程"""
+        scheduler = MonitorScheduler()
+        ran = threading.Event()
+        scheduler.setup_jobs = lambda: None
+        scheduler._jobs = [ScheduledJob('fast', 0.05, ran.set), ScheduledJob('slow', 3600, lambda: None)]
+        for job in scheduler._jobs:
+            job.deadline = job.first_deadline(time.monotonic())
+
+        scheduler.start()
+        assert ran.wait(2)
+
+        started = time.monotonic()
+        scheduler.stop()
+        assert time.monotonic() - started < 1
+        assert not scheduler.scheduler_thread.is_alive()
+
+    def test_collectors_due_together_run_as_one_batch(self):
+        """测试同一时刻到期的采集项合并为一个批次"""
+        scheduler = MonitorScheduler()
+        batches = []
+        done = threading.Event()
+
+        def collect(names):
+            batches.append(sorted(names))
+            if len(batches) >= 3:
+                done.set()
+
+        scheduler.setup_jobs = lambda: None
+        scheduler._jobs = [ScheduledJob('cpu', 0.1, collect, batch='collect'),
+                           ScheduledJob('disk', 0.2, collect, batch='collect')]
+        now = time.monotonic()
+        for job in scheduler._jobs:
+            job.deadline = now + 0.1
+
+        scheduler.start()
+        assert done.wait(3)
+        scheduler.stop()
+
+        assert batches[0] == ['cpu', 'disk']
+        assert batches[1] == ['cpu']
+        assert batches[2] == ['cpu', 'disk']
+
+
+class TestOverrunPolicy:
+    """超时策略测试"""
+
+    def make_job(self):
+        job = ScheduledJob('monitor', 10, lambda: None)
+        job.deadline = 100.0
+        return job
+
+    def test_skip(self):
+        """测试 skip 丢弃错过的周期"""
+        job = self.make_job()
+        assert job.next_deadline(135.0, 'skip') == 140.0
+        assert job.stats.missed == 3
+
+    def test_coalesce(self):
+        """测试 coalesce 合并为一次立即执行"""
+        job = self.make_job()
+        assert job.next_deadline(135.0, 'coalesce') == 130.0
+        assert job.stats.missed == 2
+        assert job.stats.coalesced == 1
+
+    def test_late(self):
+        """测试 late 逐个补跑"""
+        job = self.make_job()
+        assert job.next_deadline(135.0, 'late') == 110.0
+        assert job.stats.missed == 0
+
+    def test_stats_histogram(self):
+        """测试耗时统计与直方图"""
+        job = self.make_job()
+        job.stats.record_run(0.3, 0.0, 10, 1.0)
+        job.stats.record_run(12.0, 2.5, 10, 1.0)
+        stats = job.stats.to_dict()
+
+        assert stats['runs'] == 2
+        assert stats['late_runs'] == 1
+        assert stats['overruns'] == 1
+        assert stats['duration_histogram']['<=0.5s'] == 1
+        assert stats['duration_histogram']['<=30s'] == 1
+
+
+class TestPhaseSpread:
+    """相位偏移与抖动测试"""
+
+    def test_phase_is_deterministic_per_host(self):
+        """测试相位偏移由主机名决定且在周期内"""
+        scheduler = MonitorScheduler()
+        scheduler.phase_spread = True
+        scheduler.monitor_interval = 60
+
+        phase = scheduler.get_phase_offset()
+        assert 0 <= phase < 60
+        assert phase == scheduler.get_phase_offset()
+
+    def test_aligned_phase(self):
+        """测试对齐模式下节拍按相位平移"""
+        job = ScheduledJob('cpu', 60, lambda: None, align=True, phase=17)
+        now = time.monotonic()
+        wall_at_deadline = time.time() + (job.first_deadline(now) - now)
+        assert abs((wall_at_deadline - 17) % 60) < 0.05 or abs((wall_at_deadline - 17) % 60 - 60) < 0.05
+
+    def test_jitter_does_not_shift_cadence(self):
+        """测试抖动只推迟执行时间，不改变节拍"""
+        scheduler = MonitorScheduler()
+        scheduler.jitter = 5
+        job = ScheduledJob('cpu', 60, lambda: None)
+        job.deadline = 1000.0
+        job.delay = scheduler._draw_jitter(job)
+
+        assert 0 <= job.delay <= 5
+        assert job.due_at == 1000.0 + job.delay
+        assert job.next_deadline(job.due_at + 1) == 1060.0
+
+
+class TestAsyncRuntime:
+    """asyncio 运行模式测试"""
+
+    def test_async_scheduler_runs_and_stops(self):
+        """测试异步调度器按截止时间执行批次并可立即停止"""
+        import asyncio
+        from src.utils.async_runtime import AsyncMonitorScheduler
+
+        scheduler = AsyncMonitorScheduler()
+        batches = []
+
+        async def collect(names):
+            batches.append(sorted(names))
+            if len(batches) >= 2:
+                scheduler.stop()
+
+        def setup_jobs():
+            scheduler._jobs = [ScheduledJob('cpu', 0.05, collect, batch='collect'),
+                               ScheduledJob('memory', 0.05, collect, batch='collect')]
+            for job in scheduler._jobs:
+                job.deadline = job.first_deadline(time.monotonic())
+
+        scheduler.setup_jobs = setup_jobs
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(asyncio.wait_for(scheduler.run(), 5))
+        finally:
+            loop.close()
+
+        assert batches == [['cpu', 'memory'], ['cpu', 'memory']]
+        assert scheduler._jobs == []
+
+    def test_async_check_and_process_delivers_concurrently(self):
+        """测试异步告警处理与同步流程状态一致"""
+        import asyncio
+        from unittest.mock import patch
+        from src.core.alert import AlertEngine
+        from src.core.monitor import MonitorData
+
+        sent = []
+
+        async def fake_send(monitor_data):
+            await asyncio.sleep(0.01)
+            sent.append(monitor_data.metric)
+            return True
+
+        engine = AlertEngine()
+        engine.consecutive_checks_threshold = 1
+        metrics = [MonitorData(metric=name, value=95.0, threshold=80.0, unit='%',
+                               timestamp=None, hostname='test-host') for name in ('cpu', 'memory')]
+
+        with patch('src.core.alert.dingtalk_notifier') as notifier:
+            notifier.async_send_alert = fake_send
+            loop = asyncio.new_event_loop()
+            try:
+                results = loop.run_until_complete(engine.async_check_and_process(metrics))
+            finally:
+                loop.close()
+
+        assert results == {'cpu': True, 'memory': True}
+        assert sorted(sent) == ['cpu', 'memory']
+        assert engine._persistent_alerts == {'cpu', 'memory'}
+
+    def test_async_monitor_job_persists_off_loop(self):
+        """测试 asyncio 模式下指标输出和时序存储的写入不在事件循环线程中执行"""
+        import asyncio
+        import threading
+        from concurrent.futures import ThreadPoolExecutor
+        from unittest.mock import patch
+        from src.utils.async_runtime import AsyncMonitorScheduler
+
+        writers = []
+        scheduler = AsyncMonitorScheduler()
+        scheduler._executor = ThreadPoolExecutor(max_workers=1)
+        with patch('src.utils.async_runtime.resource_monitor') as monitor, \
+                patch('src.utils.async_runtime.metrics_sink') as sink, \
+                patch('src.utils.async_runtime.time_series_store') as store, \
+                patch('src.utils.async_runtime.fleet_agent') as agent:
+            monitor.collect_all_metrics.return_value = []
+            agent.alerts_locally = False
+            sink.write.side_effect = lambda metrics: writers.append(threading.current_thread())
+            store.append_metrics.side_effect = lambda metrics: writers.append(threading.current_thread())
+            loop = asyncio.new_event_loop()
+            try:
+                loop.run_until_complete(scheduler._monitor_job())
+            finally:
+                loop.close()
+                scheduler._executor.shutdown()
+
+        assert len(writers) == 2
+        assert threading.main_thread() not in writers
@@ -0,0 +1,95 @@
+"""
+告警静默测试
+"""
+
+import sys
+import time
+import pytest
+from pathlib import Path
+from datetime import datetime
+from unittest.mock import patch
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.core.silence import SilenceManager, CronWindow, parse_duration
+from src.core.monitor import MonitorData
+from src.core.alert import AlertEngine
+
+
+class TestSilenceManager:
+    """静默管理器测试"""
+
+    def test_parse_duration(self):
+        """测试时长解析"""
+        assert parse_duration('90s') == 90
+        assert parse_duration('1h30m') == 5400
+        assert parse_duration(600) == 600
+        with pytest.raises(ValueError):
+            parse_duration('2 hours')
+
+    def test_cron_window(self):
+        """测试周期维护窗口"""
+        window = CronWindow('0 2 * * sun', 7200)
+        sunday = datetime(2024, 1, 7, 3, 30).timestamp()
+        monday = datetime(2024, 1, 8, 3, 30).timestamp()
+        sunday_late = datetime(2024, 1, 7, 4, 0).timestamp()
+
+        assert window.active(sunday)
+        assert not window.active(monday)
+        assert not window.active(sunday_late)
+
+        # 日和周都受限时按标准cron取"或"：每月1日（2024-01-01 为周一）及每个周日
+        window = CronWindow('0 2 1 * sun', 3600)
+        assert window.active(datetime(2024, 1, 1, 2, 30).timestamp())
+        assert window.active(datetime(2024, 1, 7, 2, 30).timestamp())
+        assert not window.active(datetime(2024, 1, 8, 2, 30).timestamp())
+        # 其一以 * 开头时仍取"且"
+        assert not CronWindow('0 2 */2 * sun', 3600).active(datetime(2024, 1, 1, 2, 30).timestamp())
+
+    def test_static_and_pattern_match(self, tmp_path):
+        """测试配置静默的精确和通配符匹配"""
+        now = time.time()
+        manager = SilenceManager({
+            'silence_file': str(tmp_path / 'silences.json'),
+            'silences': [
+                {'metric': 'cpu', 'start': now - 60, 'end': now + 60},
+                {'metric': 'disk_*', 'start': now + 600, 'duration': '1h'},
+            ]
+        })
+
+        assert manager.match('cpu', now) is not None
+        assert manager.match('memory', now) is None
+        assert manager.match('disk_data', now) is None
+        assert manager.match('disk_data', now + 900) is not None
+
+    def test_runtime_silence_persisted(self, tmp_path):
+        """测试运行时静默持久化并被其它实例读取"""
+        config = {'silence_file': str(tmp_path / 'silences.json')}
+        writer = SilenceManager(config)
+        reader = SilenceManager(config)
+
+        silence = writer.add('memory', '30m', comment='扩容')
+        assert reader.match('memory') is not None
+
+        assert writer.remove(silence.id)
+        assert reader.match('memory') is None
+
+
+class TestSilencedAlerting:
+    """静默与告警流程集成测试"""
+
+    @patch('src.core.alert.dingtalk_notifier')
+    def test_silenced_alert_not_sent(self, mock_notifier, tmp_path):
+        """测试静默期间告警被抑制"""
+        engine = AlertEngine()
+        engine.consecutive_checks_threshold = 1
+        engine.silence_manager = SilenceManager({'silence_file': str(tmp_path / 's.json')})
+        engine.silence_manager.add('cpu', '10m')
+
+        data = MonitorData(metric='cpu', value=95.0, threshold=80.0,
+                           unit='%', timestamp=None, hostname='test-host')
+
+        assert engine.check_and_process([data]) == {'cpu': True}
+        mock_notifier.send_alert.assert_not_called()
+        assert 'cpu' not in engine._persistent_alerts
@@ -0,0 +1,233 @@
+"""
+本地时序存储测试
+"""
+
+import sys
+import pytest
+from pathlib import Path
+from datetime import datetime
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+np = pytest.importorskip('numpy')
+
+from src.storage.ringbuffer import RingBuffer
+from src.storage.tsdb import TimeSeriesStore
+from src.core.monitor import MonitorData
+
+
+class TestRingBuffer:
+    """环形缓冲区测试"""
+
+    def test_wraps_and_keeps_order(self, tmp_path):
+        """测试写满后覆盖最旧的记录且按时间顺序读取"""
+        ring = RingBuffer(str(tmp_path / 'cpu.ring'), 4)
+        for i in range(6):
+            ring.append((float(i), i * 10.0))
+
+        assert len(ring) == 4
+        assert ring.read()['t'].tolist() == [2.0, 3.0, 4.0, 5.0]
+        assert ring.query(3.0, 5.0)['v'].tolist() == [30.0, 40.0]
+
+    def test_unwrapped_read_is_zero_copy(self, tmp_path):
+        """测试未回绕时读取直接返回内存映射视图"""
+        ring = RingBuffer(str(tmp_path / 'cpu.ring'), 8)
+        ring.append((1.0, 1.0))
+        ring.append((2.0, 2.0))
+
+        view = ring.read()
+        assert not view.flags['OWNDATA']
+        assert np.shares_memory(view, ring._mm)
+
+    def test_persist_and_resize(self, tmp_path):
+        """测试重新打开后数据仍在，容量变化时保留最新记录"""
+        path = str(tmp_path / 'cpu.ring')
+        ring = RingBuffer(path, 4)
+        for i in range(4):
+            ring.append((float(i), float(i)))
+        ring.close()
+
+        reader = RingBuffer(path, 4, readonly=True)
+        assert reader.read()['t'].tolist() == [0.0, 1.0, 2.0, 3.0]
+
+        resized = RingBuffer(path, 2)
+        assert resized.capacity == 2
+        assert resized.read()['t'].tolist() == [2.0, 3.0]
+
+    def test_uncommitted_record_is_invisible(self, tmp_path):
+        """测试只写入记录、未更新计数（模拟崩溃）时读取不到该记录"""
+        ring = RingBuffer(str(tmp_path / 'cpu.ring'), 4)
+        ring.append((1.0, 1.0))
+        ring._data[1] = (2.0, 2.0)
+
+        assert ring.read()['t'].tolist() == [1.0]
+
+
+class TestTimeSeriesStore:
+    """时序存储测试"""
+
+    def test_append_metrics(self, tmp_path):
+        """测试写入采集结果并按指标查询"""
+        store = TimeSeriesStore(str(tmp_path), capacity=16)
+        for minute, value in enumerate((10.0, 20.0, 30.0)):
+            store.append_metrics([MonitorData('cpu', value, 80.0, '%', datetime(2024, 1, 1, 0, minute), 'h')])
+
+        samples = store.query('cpu')
+        assert samples['v'].tolist() == [10.0, 20.0, 30.0]
+        assert store.list_series() == ['cpu']
+
+        # 时钟回拨的样本被丢弃
+        assert not store.append('cpu', samples['t'][0], 99.0)
+
+
+class TestRollup:
+    """降采样层级测试"""
+
+    def test_incremental_buckets(self, tmp_path):
+        """测试样本逐个加入时按桶增量聚合"""
+        from src.storage.rollup import RollupTier, summarize
+
+        tier = RollupTier(str(tmp_path / 'cpu.60s.roll'), 60, 10)
+        for t, v in ((0, 5.0), (30, 1.0), (59, 3.0), (60, 8.0)):
+            tier.add(float(t), v)
+
+        buckets = tier.query()
+        assert buckets['t'].tolist() == [0.0, 60.0]
+        assert buckets[0]['min'] == 1.0 and buckets[0]['max'] == 5.0
+        assert buckets[0]['count'] == 3 and buckets[0]['last'] == 3.0
+        assert summarize(buckets) == {'min': 1.0, 'max': 8.0, 'avg': 17.0 / 4, 'count': 4, 'last': 8.0}
+
+    def test_store_updates_tiers_and_backfills(self, tmp_path):
+        """测试写入样本时同步更新各层级，新增层级由原始样本补齐"""
+        store = TimeSeriesStore(str(tmp_path), capacity=1000)
+        store.tiers = [(60.0, 100)]
+        for i in range(180):
+            store.append('cpu', float(i), float(i % 60))
+
+        incremental = store.query_tier('cpu', 60.0)
+        assert incremental['count'].tolist() == [60, 60, 60]
+        store.close()
+
+        # 新增 1 小时层级，用原始样本补齐，结果与增量计算一致
+        store.tiers = [(60.0, 100), (3600.0, 10)]
+        hourly = store.query_tier('cpu', 3600.0)
+        assert hourly['count'].tolist() == [180]
+        assert hourly['max'].tolist() == [59.0]
+        assert store.query_tier('cpu', 60.0)['sum'].tolist() == incremental['sum'].tolist()
+
+
+class TestArchive:
+    """压缩归档测试"""
+
+    def test_block_roundtrip_and_ratio(self):
+        """测试数据块编解码无损且固定间隔、缓变数值压缩率高"""
+        from src.storage.gorilla import encode_block, decode_block, compression_ratio
+
+        times = 1.7e9 + np.arange(1440) * 60.0
+        values = np.round(40 + np.sin(np.arange(1440) / 100.0), 1)
+        block = encode_block(times, values)
+        samples = decode_block(block)
+
+        assert np.array_equal(samples['v'], values)
+        assert np.allclose(samples['t'], times)
+        assert compression_ratio(len(times), len(block)) > 5
+
+    def test_archive_pending_and_history_query(self, tmp_path):
+        """测试归档后环形缓冲区覆盖的样本仍可查询"""
+        from src.storage.archive import HistoryArchive
+
+        store = TimeSeriesStore(str(tmp_path), capacity=80)
+        store.tiers = []
+        store.archive = HistoryArchive(str(tmp_path / 'archive'), retention_days=36500)
+
+        for i in range(40):
+            store.append('cpu', 1.7e9 + i * 60, float(i))
+        assert store.archive_pending() == 40
+        for i in range(40, 100):
+            store.append('cpu', 1.7e9 + i * 60, float(i))
+        assert store.archive_pending() == 60
+        assert store.archive_pending() == 0
+
+        history = store.query_history('cpu')
+        assert history['v'].tolist() == [float(i) for i in range(100)]
+        assert store.archive.stats()['samples'] == 100
+
+    def test_restart_does_not_rearchive_last_sample(self, tmp_path):
+        """测试重启后（最新归档时间取自毫秒精度的数据块）不会重复归档最后一个样本"""
+        from src.storage.archive import HistoryArchive
+
+        store = TimeSeriesStore(str(tmp_path), capacity=80)
+        store.tiers = []
+        store.archive = HistoryArchive(str(tmp_path / 'archive'), retention_days=36500)
+        store.append('cpu', 1000000000.0, 1.0)
+        store.append('cpu', 1000000120.1231, 2.0)
+        assert store.archive_pending() == 2
+
+        store.archive = HistoryArchive(str(tmp_path / 'archive'), retention_days=36500)
+        assert store.archive.last_archived('cpu') == pytest.approx(1000000120.123)
+        assert store.archive_pending() == 0
+        assert store.archive.stats()['samples'] == 2
+
+    def test_archive_sanitized_metric_name(self, tmp_path):
+        """测试文件名经过转换的指标按指标名归档，不会重复打开同一组文件"""
+        from src.storage.archive import HistoryArchive
+
+        store = TimeSeriesStore(str(tmp_path), capacity=80)
+        store.archive = HistoryArchive(str(tmp_path / 'archive'), retention_days=36500)
+        for i in range(10):
+            store.append('disk_/mnt/备份 盘', 1.7e9 + i * 60, float(i))
+
+        assert store.archive_pending() == 10
+        assert list(store._series) == ['disk_/mnt/备份 盘']
+        assert len(store.query_history('disk_/mnt/备份 盘')) == 10
+
+    def test_torn_tail_is_repaired(self, tmp_path):
+        """测试归档文件末尾不完整的数据块被截掉后仍可继续追加"""
+        from src.storage.archive import HistoryArchive
+
+        archive = HistoryArchive(str(tmp_path))
+        samples = np.zeros(3, dtype=[('t', '<f8'), ('v', '<f8')])
+        samples['t'] = 1.7e9 + np.arange(3)
+        archive.append('cpu', samples)
+        path = next(tmp_path.glob('cpu/*.gor'))
+        with open(str(path), 'ab') as file:
+            file.write(b'\x40\x00\x00\x00partial')
+
+        samples['t'] += 10
+        HistoryArchive(str(tmp_path)).append('cpu', samples)
+        assert len(HistoryArchive(str(tmp_path)).read('cpu')) == 6
+
+
+class TestHistoryQuery:
+    """历史查询测试"""
+
+    def test_reads_raw_when_small(self, tmp_path):
+        """测试原始样本覆盖范围且点数不多时直接读取，百分位精确"""
+        from src.storage.query import summarize_history
+
+        store = TimeSeriesStore(str(tmp_path), capacity=1000)
+        store.tiers = [(60.0, 100)]
+        for i in range(101):
+            store.append('cpu', float(i), float(i))
+
+        (result,) = summarize_history(store, 'c*', 0.0, 101.0, width=10)
+        assert result['source'] == 'raw' and not result['approximate']
+        assert (result['min'], result['p50'], result['p95'], result['max']) == (0.0, 50.0, 95.0, 100.0)
+        assert len(result['sparkline']) == 10
+        assert result['sparkline'][0] == '▁' and result['sparkline'][-1] == '█'
+        assert summarize_history(store, 'mem*', 0.0, 101.0) == []
+
+    def test_uses_coarser_tier_for_long_range(self, tmp_path):
+        """测试点数超过上限时改用覆盖范围的降采样层级，min/max/avg 仍精确"""
+        from src.storage.query import summarize_history
+
+        store = TimeSeriesStore(str(tmp_path), capacity=100)
+        store.tiers = [(60.0, 20), (600.0, 100)]
+        for i in range(3000):
+            store.append('cpu', float(i), float(i % 100))
+
+        (result,) = summarize_history(store, 'cpu', 0.0, 3000.0, max_points=50)
+        assert result['source'] == '600s' and result['approximate']
+        assert result['samples'] == 3000
+        assert (result['min'], result['max'], result['avg']) == (0.0, 99.0, 49.5)